@@ -0,0 +1,19 @@
+from typing import Any
+
+import pytest
+
+import ruuvitag_ble.parser
+
+# mypyc replaces compiled modules with extension modules of the same name
+COMPILED = not ruuvitag_ble.parser.__file__.endswith(".py")
+
+
+def pytest_report_header() -> str:
+    return f"ruuvitag_ble: {'compiled' if COMPILED else 'interpreted'}"
+
+
+def pytest_benchmark_update_machine_info(
+    config: pytest.Config,
+    machine_info: dict[str, Any],
+) -> None:
+    machine_info["ruuvitag_ble_compiled"] = COMPILED
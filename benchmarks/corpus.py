@@ -0,0 +1,60 @@
+"""
+Synthetic corpus of advertisements for the benchmarks.
+
+Payloads are the test vectors with their measured values jittered, sequence
+numbers counting up and MAC addresses spread over a few tags, so decoding
+takes realistic paths (including the occasional "not available" value).
+"""
+
+from __future__ import annotations
+
+import random
+
+from tests.test_e1 import E1_VALID_DATA
+from tests.test_v3 import V3_SENSOR_DATA
+from tests.test_v5 import V5_OUTDOOR_SENSOR_DATA
+from tests.test_v6 import V6_BASELINE_SENSOR_DATA
+
+# Name -> (test vector, offsets of low bytes of measured values,
+# (offset, width) of the sequence number, offset of the last MAC byte)
+_FORMATS: dict[
+    str,
+    tuple[bytes, tuple[int, ...], tuple[int, int] | None, int | None],
+] = {
+    "df3": (V3_SENSOR_DATA, (5, 7, 9, 11, 13), None, None),
+    "df5": (V5_OUTDOOR_SENSOR_DATA, (2, 4, 6, 8, 10, 12, 15), (16, 2), 23),
+    "df6": (V6_BASELINE_SENSOR_DATA, (2, 4, 6, 8, 10, 13), (15, 1), 19),
+    "e1": (E1_VALID_DATA, (2, 4, 6, 8, 10, 12, 14, 16, 21), (25, 3), 39),
+}
+
+# One in this many payloads has no temperature reading.
+_UNAVAILABLE_EVERY = 50
+
+
+def make_corpus(name: str, count: int = 1000, seed: int = 0) -> list[bytes]:
+    """Return `count` payloads of the data format `name` (e.g. "df5")."""
+    vector, jitter, sequence, mac = _FORMATS[name]
+    rng = random.Random(seed)
+    payloads = []
+    for i in range(count):
+        data = bytearray(vector)
+        for offset in jitter:
+            data[offset] = rng.randrange(256)
+        if name == "df3":
+            data[1] = rng.randrange(201)  # Humidity, in 0.5 % steps
+            data[3] = rng.randrange(100)  # Temperature fraction
+        elif i % _UNAVAILABLE_EVERY == 0:
+            data[1:3] = b"\x80\x00"
+        if sequence is not None:
+            offset, width = sequence
+            data[offset : offset + width] = (i % (1 << 8 * width)).to_bytes(
+                width,
+                "big",
+            )
+        if mac is not None:
+            data[mac] = i % 64
+        payloads.append(bytes(data))
+    return payloads
+
+
+CORPUS: dict[str, list[bytes]] = {name: make_corpus(name) for name in _FORMATS}
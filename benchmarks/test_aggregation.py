@@ -0,0 +1,14 @@
+from ruuvitag_ble.aggregation import WindowAggregator
+from ruuvitag_ble.parser import decode_advertisement
+from tests.test_v6 import V6_C_TEST_DATA
+
+
+def test_add_advertisement(benchmark):
+    """Feeding a decoded DF6 advertisement to 1-minute windows sliding by 15 s."""
+    aggregator = WindowAggregator(60, slide=15)
+    decoded = decode_advertisement(V6_C_TEST_DATA)
+    assert decoded is not None
+    clock = iter(range(1 << 30))
+    # Sequence numbers aren't advanced, so don't deduplicate.
+    readings = [(key, value) for key, _, _, value in decoded.sensors]
+    benchmark(lambda: aggregator.add_readings("tag", readings, next(clock)))
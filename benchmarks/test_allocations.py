@@ -0,0 +1,42 @@
+import tracemalloc
+
+import pytest
+
+from benchmarks.corpus import CORPUS
+from ruuvitag_ble import RuuvitagBluetoothDeviceData
+from tests.utils import bytes_to_service_info
+
+# Budgets in bytes per advertisement, to catch regressions: memory still
+# allocated after an update, and the peak allocated during one.
+RETAINED_BUDGET = 64
+PEAK_BUDGET = 8 * 1024
+
+
+@pytest.mark.parametrize("data_format", CORPUS)
+def test_allocations_per_update(benchmark, data_format):
+    """Memory allocated per advertisement by a full update, via tracemalloc."""
+    device = RuuvitagBluetoothDeviceData(cache_size=0)
+    service_infos = [bytes_to_service_info(p) for p in CORPUS[data_format]]
+    for service_info in service_infos[:10]:  # Warm up
+        device.update(service_info)
+
+    def measure() -> tuple[float, float]:
+        tracemalloc.start()
+        try:
+            peak = 0
+            start, _ = tracemalloc.get_traced_memory()
+            for service_info in service_infos:
+                tracemalloc.reset_peak()
+                before, _ = tracemalloc.get_traced_memory()
+                device.update(service_info)
+                peak = max(peak, tracemalloc.get_traced_memory()[1] - before)
+            end, _ = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return (end - start) / len(service_infos), peak
+
+    retained, peak = benchmark.pedantic(measure, rounds=1, iterations=1)
+    benchmark.extra_info["retained_bytes_per_advert"] = retained
+    benchmark.extra_info["peak_bytes_per_advert"] = peak
+    assert retained <= RETAINED_BUDGET
+    assert peak <= PEAK_BUDGET
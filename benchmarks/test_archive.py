@@ -0,0 +1,37 @@
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from benchmarks.corpus import CORPUS
+from ruuvitag_ble.archive import ArchiveReader, ArchiveWriter
+
+# 100 000 advertisements of 64 tags, one per 10 ms
+COUNT = 100_000
+
+
+@pytest.fixture(scope="module")
+def reader(tmp_path_factory: pytest.TempPathFactory) -> Iterator[ArchiveReader]:
+    path: Path = tmp_path_factory.mktemp("archive") / "adverts.rva"
+    payloads = CORPUS["df5"]
+    with ArchiveWriter(path) as writer:
+        for i in range(COUNT):
+            payload = payloads[i % len(payloads)]
+            writer.append(i / 100, f"C7:1F:D4:FE:63:{payload[23]:02X}", -60, payload)
+    with ArchiveReader(path) as archive:
+        yield archive
+
+
+def test_scan_range(benchmark, reader):
+    """Scanning the records of a minute out of 1000 seconds."""
+    benchmark(lambda: sum(1 for _ in reader.scan(500, 560)))
+
+
+def test_decode_range(benchmark, reader):
+    """Decoding the records of a minute out of 1000 seconds, in place."""
+    benchmark(lambda: sum(1 for _ in reader.decode(500, 560)))
+
+
+def test_scan_tag(benchmark, reader):
+    """Scanning the records of one of 64 tags."""
+    benchmark(lambda: sum(1 for _ in reader.scan(address="C7:1F:D4:FE:63:05")))
@@ -0,0 +1,25 @@
+from ruuvitag_ble.compression import SeriesEncoder, SeriesReader
+from ruuvitag_ble.simulator import FleetSimulator
+
+READINGS = [
+    (advert.timestamp, bytes(advert.raw_data))
+    for advert in FleetSimulator(1, data_format=0x05, rate=1, seed=0).adverts(1000)
+]
+
+
+def _encode() -> bytes:
+    encoder = SeriesEncoder(0x05)
+    for timestamp, raw_data in READINGS:
+        encoder.append(timestamp, raw_data)
+    return encoder.flush()
+
+
+def test_encode_block(benchmark):
+    """Encoding a block of 1000 DF5 readings."""
+    benchmark(_encode)
+
+
+def test_decode_block(benchmark):
+    """Decoding a block of 1000 DF5 readings into decoders."""
+    reader = SeriesReader(_encode())
+    benchmark(reader.block, 0)
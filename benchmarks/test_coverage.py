@@ -0,0 +1,18 @@
+from ruuvitag_ble.coverage import CoverageTracker
+from ruuvitag_ble.simulator import FleetSimulator
+
+ADVERTS = [
+    (advert.address, advert.raw_data[0], int.from_bytes(advert.raw_data[16:18], "big"))
+    for advert in FleetSimulator(64, data_format=0x05, seed=1).adverts(10_000)
+]
+
+
+def test_coverage_add(benchmark):
+    """Tracking the sequence numbers of 10,000 advertisements of 64 tags."""
+
+    def run() -> None:
+        tracker = CoverageTracker()
+        for address, data_format, sequence in ADVERTS:
+            tracker.add(address, data_format, sequence)
+
+    benchmark(run)
@@ -0,0 +1,30 @@
+from operator import attrgetter
+
+import pytest
+
+from benchmarks.corpus import CORPUS
+from ruuvitag_ble.core import decoder_classes
+
+DECODERS = {name: decoder_classes[payloads[0][0]] for name, payloads in CORPUS.items()}
+
+
+@pytest.mark.parametrize("data_format", CORPUS)
+def test_construct(benchmark, data_format):
+    """Decoding a corpus of 1000 payloads."""
+    decoder_cls = DECODERS[data_format]
+    payloads = CORPUS[data_format]
+    benchmark(lambda: [decoder_cls(payload) for payload in payloads])
+
+
+@pytest.mark.parametrize(
+    ("data_format", "name"),
+    [
+        (data_format, name)
+        for data_format, decoder_cls in DECODERS.items()
+        for name in decoder_cls.format.names
+    ],
+)
+def test_attribute(benchmark, data_format, name):
+    """Reading a decoded value."""
+    decoder = DECODERS[data_format](CORPUS[data_format][1])
+    benchmark(attrgetter(name), decoder)
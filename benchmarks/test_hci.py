@@ -0,0 +1,21 @@
+import pytest
+
+from benchmarks.test_parser import PAYLOADS
+from ruuvitag_ble.hci import decode_hci_event
+from tests.test_capture import (
+    _advertising_report,
+    _extended_advertising_report,
+    _le_meta_event,
+)
+
+
+@pytest.mark.parametrize("data_format", PAYLOADS)
+def test_decode_hci_event(benchmark, data_format):
+    """Decoding an advertising report event straight from its bytes."""
+    payload = PAYLOADS[data_format]
+    if len(payload) > 26:  # Doesn't fit in a legacy advertisement
+        event = _le_meta_event(0x0D, [_extended_advertising_report(payload, -60)])
+    else:
+        event = _le_meta_event(0x02, [_advertising_report(payload, -60)])
+    readings = benchmark(decode_hci_event, memoryview(event))
+    assert len(readings) == 1
@@ -0,0 +1,28 @@
+from ruuvitag_ble.history import HistoryStore
+
+TAGS = [f"tag{i}" for i in range(100)]
+
+
+def test_add(benchmark):
+    """Appending a reading to each of 100 full series."""
+    store = HistoryStore(100, resolution=1, epoch=0)
+    clock = iter(range(1 << 30))
+    for _ in range(100):
+        now = next(clock)
+        for tag in TAGS:
+            store.add(tag, "temperature", now, 21.5)
+
+    def add() -> None:
+        now = next(clock)
+        for tag in TAGS:
+            store.add(tag, "temperature", now, 21.5)
+
+    benchmark(add)
+
+
+def test_readings_range(benchmark):
+    """Iterating over the last hour of a day of 10 s readings."""
+    store = HistoryStore(resolution=1, epoch=0)
+    for now in range(0, 86400, 10):
+        store.add("tag", "temperature", now, 21.5)
+    benchmark(lambda: list(store.readings("tag", "temperature", 86400 - 3600)))
@@ -0,0 +1,37 @@
+import random
+
+import pytest
+
+from ruuvitag_ble.iaqs import calculate_iaqs, calculate_iaqs_batch, use_lookup_table
+
+_rng = random.Random(0)
+# CO2 and PM2.5 spanning and exceeding the clamped ranges, some unavailable.
+READINGS = (
+    [(_rng.randrange(300, 2600), round(_rng.uniform(0, 80), 1)) for _ in range(990)]
+    + [(None, 10.0)] * 5
+    + [(800, None)] * 5
+)
+
+
+def test_calculate_iaqs(benchmark):
+    """Scoring 1000 readings."""
+    benchmark(lambda: [calculate_iaqs(co2, pm25) for co2, pm25 in READINGS])
+
+
+def test_calculate_iaqs_lookup_table(benchmark):
+    """Scoring 1000 readings, looked up in the precomputed table."""
+    use_lookup_table()
+    try:
+        benchmark(lambda: [calculate_iaqs(co2, pm25) for co2, pm25 in READINGS])
+    finally:
+        use_lookup_table(False)
+
+
+@pytest.mark.parametrize("use_numpy", [False, True], ids=["python", "numpy"])
+def test_calculate_iaqs_batch(benchmark, use_numpy):
+    """Scoring 1000 readings in one call."""
+    if use_numpy:
+        pytest.importorskip("numpy")
+    co2_values = [co2 for co2, _ in READINGS]
+    pm25_values = [pm25 for _, pm25 in READINGS]
+    benchmark(calculate_iaqs_batch, co2_values, pm25_values, use_numpy=use_numpy)
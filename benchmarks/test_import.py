@@ -0,0 +1,26 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+ENV = {**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}
+
+
+@pytest.mark.parametrize(
+    "statement",
+    [
+        "pass",
+        "import ruuvitag_ble.core",
+        "import ruuvitag_ble.parser",
+    ],
+    ids=["interpreter", "core", "parser"],
+)
+def test_import_time(benchmark, statement):
+    """Starting an interpreter and importing a module (the baseline imports nothing)."""
+    benchmark.pedantic(
+        subprocess.run,
+        ([sys.executable, "-c", statement],),
+        {"check": True, "env": ENV},
+        rounds=10,
+    )
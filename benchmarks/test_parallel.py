@@ -0,0 +1,54 @@
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from home_assistant_bluetooth import BluetoothServiceInfo
+
+from benchmarks.corpus import CORPUS
+from ruuvitag_ble.core import decode
+from ruuvitag_ble.parallel import ThreadPoolIngestor
+from ruuvitag_ble.simulator import FleetSimulator
+from tests.utils import bytes_to_service_info
+
+WORKERS = sorted({1, 2, 4, os.cpu_count() or 1})
+# Free-threaded builds report whether the GIL is enabled at runtime
+GIL = getattr(sys, "_is_gil_enabled", lambda: True)()
+
+
+def _service_infos() -> list[BluetoothServiceInfo]:
+    service_infos = []
+    for advert in FleetSimulator(256, data_format=0xE1, seed=1).adverts(4000):
+        service_info = bytes_to_service_info(advert.raw_data, advert.rssi)
+        service_info.address = advert.address
+        service_infos.append(service_info)
+    return service_infos
+
+
+SERVICE_INFOS = _service_infos()
+PAYLOADS = [payload for payloads in CORPUS.values() for payload in payloads] * 5
+
+
+@pytest.mark.parametrize("workers", WORKERS)
+def test_ingestor_scaling(benchmark, workers):
+    """Parser updates of 4,000 advertisements of 256 tags in a thread pool.
+
+    Scales with the number of workers on free-threaded builds only.
+    """
+    benchmark.extra_info["gil"] = GIL
+    with ThreadPoolIngestor(workers=workers) as ingestor:
+        updates = benchmark(ingestor.update_many, SERVICE_INFOS)
+    assert all(update is not None for update in updates)
+
+
+@pytest.mark.parametrize("workers", WORKERS)
+def test_decode_scaling(benchmark, workers):
+    """Stateless decoding of the corpus, split over threads."""
+    benchmark.extra_info["gil"] = GIL
+    chunks = [PAYLOADS[i::workers] for i in range(workers)]
+
+    def decode_all(payloads):
+        return [decode(payload) for payload in payloads]
+
+    with ThreadPoolExecutor(workers) as executor:
+        benchmark(lambda: list(executor.map(decode_all, chunks)))
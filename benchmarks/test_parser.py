@@ -0,0 +1,40 @@
+import pytest
+
+from benchmarks.corpus import CORPUS
+from ruuvitag_ble import RuuvitagBluetoothDeviceData
+from tests.test_e1 import E1_VALID_DATA
+from tests.test_v3 import V3_SENSOR_DATA
+from tests.test_v5 import V5_OUTDOOR_SENSOR_DATA
+from tests.test_v6 import V6_BASELINE_SENSOR_DATA
+from tests.utils import bytes_to_service_info
+
+PAYLOADS = {
+    "df3": V3_SENSOR_DATA,
+    "df5": V5_OUTDOOR_SENSOR_DATA,
+    "df6": V6_BASELINE_SENSOR_DATA,
+    "e1": E1_VALID_DATA,
+}
+
+
+@pytest.mark.parametrize("data_format", PAYLOADS)
+def test_update(benchmark, data_format):
+    """Per-advertisement cost of a full update, with the decode cache disabled."""
+    device = RuuvitagBluetoothDeviceData(cache_size=0)
+    service_info = bytes_to_service_info(PAYLOADS[data_format])
+    benchmark(device.update, service_info)
+
+
+@pytest.mark.parametrize("data_format", CORPUS)
+def test_update_corpus(benchmark, data_format):
+    """Full updates for a corpus of 1000 varying advertisements, with caching."""
+    device = RuuvitagBluetoothDeviceData()
+    service_infos = [bytes_to_service_info(p) for p in CORPUS[data_format]]
+    benchmark(lambda: [device.update(service_info) for service_info in service_infos])
+
+
+@pytest.mark.parametrize("metrics", [False, True], ids=["plain", "metrics"])
+def test_update_metrics_overhead(benchmark, metrics):
+    """Cost of a cached DF5 update with and without decode metrics."""
+    device = RuuvitagBluetoothDeviceData(metrics=metrics)
+    service_info = bytes_to_service_info(V5_OUTDOOR_SENSOR_DATA)
+    benchmark(device.update, service_info)
@@ -0,0 +1,32 @@
+import pytest
+
+from ruuvitag_ble.core import decoder_classes
+from ruuvitag_ble.peek import peek
+from tests.test_e1 import E1_VALID_DATA
+from tests.test_v5 import V5_OUTDOOR_SENSOR_DATA
+from tests.test_v6 import V6_BASELINE_SENSOR_DATA
+
+PAYLOADS = {
+    "df5": V5_OUTDOOR_SENSOR_DATA,
+    "df6": V6_BASELINE_SENSOR_DATA,
+    "e1": E1_VALID_DATA,
+}
+
+
+@pytest.mark.parametrize("data_format", PAYLOADS)
+def test_peek(benchmark, data_format):
+    """Reading the MAC and sequence number of a payload, in a memoryview."""
+    benchmark(peek, memoryview(PAYLOADS[data_format]))
+
+
+@pytest.mark.parametrize("data_format", PAYLOADS)
+def test_decode_for_header(benchmark, data_format):
+    """The same, by decoding the whole payload (the baseline for `test_peek`)."""
+    raw_data = PAYLOADS[data_format]
+    decoder_cls = decoder_classes[raw_data[0]]
+
+    def decode() -> tuple[str | None, int | None]:
+        decoded = decoder_cls(raw_data)
+        return decoded.mac, decoded.measurement_sequence_number  # type: ignore[union-attr]
+
+    benchmark(decode)
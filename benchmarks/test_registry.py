@@ -0,0 +1,16 @@
+from benchmarks.corpus import CORPUS
+from ruuvitag_ble.registry import FleetRegistry
+from tests.utils import bytes_to_service_info
+
+SERVICE_INFOS = [bytes_to_service_info(payload) for payload in CORPUS["df5"]]
+
+
+def test_registry_update(benchmark):
+    """Routing and decoding a mixed corpus of 64 tags through a registry."""
+    registry = FleetRegistry()
+
+    def run() -> None:
+        for service_info in SERVICE_INFOS:
+            registry.update(service_info)
+
+    benchmark(run)
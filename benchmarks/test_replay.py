@@ -0,0 +1,28 @@
+import os
+
+import pytest
+
+from ruuvitag_ble.replay import ReplayRecord, replay
+from tests.test_e1 import E1_VALID_DATA
+from tests.test_v5 import V5_OUTDOOR_SENSOR_DATA
+
+RECORDS = [
+    ReplayRecord(
+        float(i),
+        f"AA:BB:CC:DD:{i % 50:02X}:00",
+        E1_VALID_DATA if i % 2 else V5_OUTDOOR_SENSOR_DATA,
+    )
+    for i in range(100_000)
+]
+
+
+@pytest.mark.parametrize("workers", sorted({1, 2, os.cpu_count() or 1}))
+def test_replay(benchmark, workers):
+    """Throughput of a sharded replay; should scale with the number of workers."""
+    result = benchmark.pedantic(
+        replay,
+        (RECORDS,),
+        {"workers": workers},
+        rounds=3,
+    )
+    assert len(result["timestamp"]) == len(RECORDS)
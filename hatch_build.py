@@ -0,0 +1,46 @@
+"""
+Build hook compiling the decoders, IAQS and the parser with mypyc.
+
+The modules to compile are listed in `pyproject.toml`.  Wheels get them as
+extension modules, with the Python sources alongside; the sdist (and wheels
+built with `RUUVITAG_BLE_NO_MYPYC=1`) stay pure Python.  If compiling fails,
+e.g. without a C compiler, a pure Python wheel is built instead, unless
+`RUUVITAG_BLE_REQUIRE_MYPYC=1` is set (as on CI, so that it can't go
+unnoticed).
+
+mypyc builds the extension modules next to the sources; they are removed
+once the wheel is built, so they can't shadow later changes to the sources
+when running from a checkout.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Any
+
+import hatch_mypyc.plugin
+
+
+class OptionalMypycBuildHook(hatch_mypyc.plugin.MypycBuildHook):  # type: ignore[misc]
+    def initialize(self, version: str, build_data: dict[str, Any]) -> None:
+        if version == "editable":
+            return  # Editable installs run the sources
+        if os.environ.get("RUUVITAG_BLE_NO_MYPYC"):
+            self.app.display_info("RUUVITAG_BLE_NO_MYPYC is set, not compiling")
+            return
+        try:
+            super().initialize(version, build_data)
+        except Exception as err:
+            if os.environ.get("RUUVITAG_BLE_REQUIRE_MYPYC"):
+                raise
+            self.clean([version])
+            self.app.display_warning(f"Building pure Python wheel: {err}")
+
+    def finalize(
+        self,
+        version: str,
+        build_data: dict[str, Any],
+        artifact_path: str,
+    ) -> None:
+        if not build_data["pure_python"]:
+            self.clean([version])
@@ -1,7 +1,23 @@
-from .parser import RuuvitagBluetoothDeviceData
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .parser import RuuvitagBluetoothDeviceData
 
 __version__ = "0.4.0"
 
 __all__ = [
     "RuuvitagBluetoothDeviceData",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    # The parser (and the Home Assistant libraries it is built on) is only
+    # imported when first used, so that `ruuvitag_ble.core` imports fast.
+    if name == "RuuvitagBluetoothDeviceData":
+        from .parser import RuuvitagBluetoothDeviceData
+
+        globals()[name] = RuuvitagBluetoothDeviceData
+        return RuuvitagBluetoothDeviceData
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
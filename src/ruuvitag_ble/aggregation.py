@@ -0,0 +1,302 @@
+"""
+Streaming windowed aggregation of sensor readings, per tag and sensor.
+
+A `WindowAggregator` keeps running min/max/mean/last aggregates of windows of
+`size` seconds, either tumbling (the default) or sliding by `slide` seconds,
+for each (tag, sensor key) it is fed, and returns each window's aggregate as
+soon as the window closes.  Sensor keys are those of the parser's sensor
+updates (e.g. "temperature", "co2", "iaqs"), so aggregates map onto the same
+entities.
+
+Windows are made of panes of `slide` seconds.  A reading only updates the
+running aggregate of its pane, which is O(1); a window's aggregate combines
+its `size / slide` panes once, when it closes.  Windows are in event time
+(the timestamps of the readings): a window closes once a series has a
+reading `allowed_lateness` seconds past its end, or on `flush`.  Readings for
+windows that already closed are dropped as late, and readings of
+advertisements with an already seen measurement sequence number are dropped
+as duplicates.  A sequence number further back than the remembered ones is
+taken as a counter reset (the tag rebooted), not as a duplicate.
+"""
+
+from __future__ import annotations
+
+import math
+from collections import deque
+from collections.abc import Collection, Iterable
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+from ruuvitag_ble.sequence import SEQUENCE_BITS, sequence_delta
+
+if TYPE_CHECKING:
+    from sensor_state_data import SensorUpdate
+
+    from ruuvitag_ble.parser import DecodedAdvertisement
+
+# Number of most recent sequence numbers remembered per tag and data format
+# for spotting duplicates among reordered advertisements.  Jumps back further
+# than this are counter resets.
+SEQUENCE_WINDOW = 64
+
+
+class WindowAggregate(NamedTuple):
+    tag: str
+    key: str  # Sensor key, as in the parser's sensor updates
+    start: float  # Window start timestamp (inclusive)
+    end: float  # Window end timestamp (exclusive)
+    samples: int  # Number of readings in the window
+    minimum: float
+    maximum: float
+    mean: float
+    last: float  # Value of the latest reading in the window
+
+
+class _Pane:
+    __slots__ = ("count", "last", "last_timestamp", "maximum", "minimum", "total")
+
+    def __init__(self, timestamp: float, value: float) -> None:
+        self.count = 1
+        self.total = value
+        self.minimum = value
+        self.maximum = value
+        self.last = value
+        self.last_timestamp = timestamp
+
+    def add(self, timestamp: float, value: float) -> None:
+        self.count += 1
+        self.total += value
+        if value < self.minimum:
+            self.minimum = value
+        if value > self.maximum:
+            self.maximum = value
+        if timestamp >= self.last_timestamp:
+            self.last = value
+            self.last_timestamp = timestamp
+
+
+class _Series:
+    __slots__ = ("closed", "next_pane", "open", "started", "watermark")
+
+    def __init__(self, panes_per_window: int, pane: int) -> None:
+        # The latest closed panes (None for panes without readings)
+        self.closed: deque[_Pane | None] = deque(maxlen=panes_per_window)
+        self.open: dict[int, _Pane] = {}
+        self.next_pane = pane  # First pane not closed yet
+        self.started = False  # Whether any pane has been closed
+        self.watermark = -math.inf  # Latest timestamp seen
+
+
+class WindowAggregator:
+    """Aggregate readings in windows of `size` seconds, per tag and sensor.
+
+    Windows are tumbling, or sliding by `slide` seconds (which must divide
+    `size`), and aligned to multiples of `slide` since the Unix epoch.
+    With `keys`, only those sensors are aggregated.  `late` and `duplicates`
+    count the readings dropped, and `resets` the sequence counter resets
+    (e.g. on reboot) seen.
+    """
+
+    def __init__(
+        self,
+        size: float,
+        *,
+        slide: float | None = None,
+        allowed_lateness: float = 0.0,
+        keys: Collection[str] | None = None,
+    ) -> None:
+        if slide is None:
+            slide = size
+        if size <= 0 or slide <= 0:
+            raise ValueError(f"size and slide must be positive, got {size}, {slide}")
+        panes_per_window = round(size / slide)
+        if not math.isclose(panes_per_window * slide, size):
+            raise ValueError(f"slide ({slide}) must divide size ({size})")
+        self.size = size
+        self.slide = slide
+        self.allowed_lateness = allowed_lateness
+        self.keys = frozenset(keys) if keys is not None else None
+        self.late = 0
+        self.duplicates = 0
+        self.resets = 0
+        self._panes_per_window = panes_per_window
+        self._series: dict[tuple[str, str], _Series] = {}
+        # (tag, data format) -> (highest sequence number, bitmask of those
+        # seen before it); Ruuvi Air counts Data Formats 6 and E1 separately.
+        self._sequences: dict[tuple[str, int], tuple[int, int]] = {}
+
+    def add(
+        self,
+        tag: str,
+        key: str,
+        timestamp: float,
+        value: float,
+    ) -> list[WindowAggregate]:
+        """Add a reading, returning the aggregates of the windows it closed."""
+        if self.keys is not None and key not in self.keys:
+            return []
+        pane = math.floor(timestamp / self.slide)
+        series = self._series.get((tag, key))
+        if series is None:
+            series = self._series[tag, key] = _Series(self._panes_per_window, pane)
+        if pane < series.next_pane:
+            if series.started:
+                self.late += 1
+                return []
+            series.next_pane = pane
+        if (open_pane := series.open.get(pane)) is not None:
+            open_pane.add(timestamp, value)
+        else:
+            series.open[pane] = _Pane(timestamp, value)
+        if timestamp <= series.watermark:
+            return []
+        series.watermark = timestamp
+        limit = math.floor((timestamp - self.allowed_lateness) / self.slide) - 1
+        return self._close(tag, key, series, limit)
+
+    def add_readings(
+        self,
+        tag: str,
+        readings: Iterable[tuple[str, Any]],
+        timestamp: float,
+    ) -> list[WindowAggregate]:
+        """Add the (sensor key, value) pairs of `readings`, skipping non-numbers."""
+        closed = []
+        for key, value in readings:
+            if isinstance(value, int | float):
+                closed += self.add(tag, key, timestamp, value)
+        return closed
+
+    def add_advertisement(
+        self,
+        tag: str,
+        decoded: DecodedAdvertisement,
+        timestamp: float,
+    ) -> list[WindowAggregate]:
+        """Add the sensor values of a decoded advertisement.
+
+        Advertisements repeating one of the last `SEQUENCE_WINDOW` measurement
+        sequence numbers of the tag are dropped.  Older sequence numbers are
+        counted in `resets` and start the tag's sequence over.
+        """
+        sequence = decoded.measurement_sequence_number
+        if sequence is not None and self._is_duplicate(
+            tag,
+            decoded.data_format,
+            sequence,
+        ):
+            self.duplicates += 1
+            return []
+        return self.add_readings(
+            tag,
+            ((key, value) for key, _, _, value in decoded.sensors),
+            timestamp,
+        )
+
+    def add_update(
+        self,
+        tag: str,
+        update: SensorUpdate,
+        timestamp: float,
+    ) -> list[WindowAggregate]:
+        """Add the sensor values of a parser update.
+
+        Updates carry no sequence numbers; deduplicate them in the parser.
+        """
+        return self.add_readings(
+            tag,
+            (
+                (device_key.key, sensor_value.native_value)
+                for device_key, sensor_value in update.entity_values.items()
+            ),
+            timestamp,
+        )
+
+    def flush(self, now: float | None = None) -> list[WindowAggregate]:
+        """Close windows of all series, returning their aggregates.
+
+        With `now`, close the windows that ended `allowed_lateness` seconds
+        before it (e.g. for tags that went silent); otherwise close all
+        windows with readings.
+        """
+        closed = []
+        for (tag, key), series in self._series.items():
+            if now is not None:
+                limit = math.floor((now - self.allowed_lateness) / self.slide) - 1
+            elif series.open:
+                limit = max(series.open) + self._panes_per_window - 1
+            else:
+                limit = series.next_pane + self._panes_per_window - 2
+            closed += self._close(tag, key, series, limit)
+        return closed
+
+    def _close(
+        self,
+        tag: str,
+        key: str,
+        series: _Series,
+        limit: int,
+    ) -> list[WindowAggregate]:
+        """Close the panes of `series` up to `limit`, and the windows ending with them."""
+        closed: list[WindowAggregate] = []
+        recent = series.closed
+        open_panes = series.open
+        pane = series.next_pane
+        while pane <= limit:
+            recent.append(open_panes.pop(pane, None))
+            series.started = True
+            panes = [p for p in recent if p is not None]
+            if panes:
+                closed.append(self._aggregate(tag, key, pane, panes))
+                pane += 1
+            else:
+                # No readings in a whole window: skip to the next open pane.
+                pane = min(min(open_panes, default=limit + 1), limit + 1)
+        series.next_pane = pane
+        return closed
+
+    def _aggregate(
+        self,
+        tag: str,
+        key: str,
+        last_pane: int,
+        panes: list[_Pane],
+    ) -> WindowAggregate:
+        count = sum(p.count for p in panes)
+        latest = max(panes, key=lambda p: p.last_timestamp)
+        return WindowAggregate(
+            tag=tag,
+            key=key,
+            start=(last_pane + 1 - self._panes_per_window) * self.slide,
+            end=(last_pane + 1) * self.slide,
+            samples=count,
+            minimum=min(p.minimum for p in panes),
+            maximum=max(p.maximum for p in panes),
+            mean=sum(p.total for p in panes) / count,
+            last=latest.last,
+        )
+
+    def _is_duplicate(self, tag: str, data_format: int, sequence: int) -> bool:
+        key = (tag, data_format)
+        state = self._sequences.get(key)
+        if state is None:
+            self._sequences[key] = (sequence, 0)
+            return False
+        highest, seen = state
+        delta = sequence_delta(sequence, highest, SEQUENCE_BITS[data_format])
+        if delta > 0:
+            # Bit i of `seen` is set if `highest - i - 1` was seen.
+            seen = ((seen << 1 | 1) << (delta - 1)) & ((1 << SEQUENCE_WINDOW) - 1)
+            self._sequences[key] = (sequence, seen)
+            return False
+        if delta == 0:
+            return True
+        if -delta > SEQUENCE_WINDOW:
+            # The counter was reset: start over from this sequence number.
+            self.resets += 1
+            self._sequences[key] = (sequence, 0)
+            return False
+        bit = 1 << (-delta - 1)
+        if seen & bit:
+            return True
+        self._sequences[key] = (highest, seen | bit)
+        return False
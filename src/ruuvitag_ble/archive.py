@@ -0,0 +1,343 @@
+"""
+Append-only binary archive of raw advertisements.
+
+An archive file is a header followed by chunks of fixed-width records, each
+record holding the timestamp, advertiser MAC address, RSSI and manufacturer
+data (whose first byte is the data format) of one advertisement:
+
+    record: timestamp (float64), MAC (6 bytes), RSSI (int8, 127 if not
+            available), payload length (uint8), payload (zero-padded to the
+            widest payload of the chunk)
+
+Records are 16 bytes plus the payload (40 bytes for a Data Format 5
+advertisement), where a JSON line of the same in hex takes about 100.
+
+Each chunk starts with a header that doubles as a sparse index: the record
+count and width, the range of timestamps in the chunk and a 256-bit filter
+of the MAC addresses in it.  Opening an archive only reads these headers,
+and scans skip the chunks outside the requested time range or without the
+requested tag.  The file is memory-mapped, and the payloads of the records
+scanned are `memoryview`s into it, which the decoders read in place.
+
+Writers only ever append whole chunks, so a crash loses at most the records
+not flushed yet: a truncated trailing chunk is ignored by readers, and cut
+off by the next writer before it appends.
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import zlib
+from collections.abc import Iterator
+from types import TracebackType
+from typing import BinaryIO, NamedTuple
+
+from ruuvitag_ble.core import Decoder, Payload, decode
+
+MAGIC = b"RUUVIARC"
+VERSION = 1
+
+_FILE_HEADER = struct.Struct("<8sH6x")
+# Record count, record width, first and last timestamp, MAC filter
+_CHUNK_HEADER = struct.Struct("<IH2xdd32s")
+# Timestamp, MAC, RSSI, payload length
+_RECORD_HEADER = struct.Struct("<d6sbB")
+_RSSI_NOT_AVAILABLE = 127
+_MAX_PAYLOAD_SIZE = 255
+
+
+class ArchiveRecord(NamedTuple):
+    timestamp: float  # Seconds since the Unix epoch
+    address: str  # Advertiser address, e.g. "C7:1F:D4:FE:63:82"
+    rssi: int | None
+    raw_data: memoryview  # Manufacturer data for 0x0499, into the archive
+
+
+class ArchiveChunk(NamedTuple):
+    offset: int  # File offset of the first record
+    records: int
+    width: int  # Bytes per record
+    first_timestamp: float
+    last_timestamp: float
+    mac_filter: int  # 256-bit filter of the MAC addresses in the chunk
+
+
+def _mac_bytes(address: str) -> bytes:
+    mac = bytes.fromhex(address.replace(":", ""))
+    if len(mac) != 6:
+        raise ValueError(f"Invalid MAC address: {address!r}")
+    return mac
+
+
+def _mac_bits(mac: bytes) -> int:
+    """Return the two bits a MAC address sets in a chunk's MAC filter."""
+    digest = zlib.crc32(mac)
+    return 1 << (digest & 0xFF) | 1 << (digest >> 8 & 0xFF)
+
+
+class ArchiveWriter:
+    """Append advertisements to an archive, in chunks of `chunk_size` records.
+
+    Records are buffered until a chunk is full, or until `flush` or `close`.
+    Appending to an existing archive keeps its complete chunks, and drops a
+    truncated trailing chunk left by a crash.
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike[str],
+        *,
+        chunk_size: int = 4096,
+    ) -> None:
+        if not 1 <= chunk_size <= 0xFFFFFFFF:
+            raise ValueError(
+                f"chunk_size must be between 1 and {0xFFFFFFFF}, got {chunk_size}",
+            )
+        self.chunk_size = chunk_size
+        self._file: BinaryIO = open(path, "ab+")
+        try:
+            self._open(path)
+        except BaseException:
+            self._file.close()
+            raise
+        # (timestamp, MAC, RSSI, payload) of the records not written yet
+        self._pending: list[tuple[float, bytes, int, bytes]] = []
+
+    def __enter__(self) -> ArchiveWriter:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def append(
+        self,
+        timestamp: float,
+        address: str,
+        rssi: int | None,
+        raw_data: Payload,
+    ) -> None:
+        """Append an advertisement."""
+        if len(raw_data) > _MAX_PAYLOAD_SIZE:
+            raise ValueError(f"Payload too long to archive: {len(raw_data)} bytes")
+        self._pending.append(
+            (
+                timestamp,
+                _mac_bytes(address),
+                _RSSI_NOT_AVAILABLE if rssi is None else rssi,
+                bytes(raw_data),
+            ),
+        )
+        if len(self._pending) >= self.chunk_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write the buffered records as a chunk."""
+        pending = self._pending
+        if not pending:
+            return
+        payload_width = max(len(payload) for _, _, _, payload in pending)
+        width = _RECORD_HEADER.size + payload_width
+        chunk = bytearray(_CHUNK_HEADER.size + width * len(pending))
+        mac_filter = 0
+        pack_record = _RECORD_HEADER.pack_into
+        position = _CHUNK_HEADER.size
+        for timestamp, mac, rssi, payload in pending:
+            pack_record(chunk, position, timestamp, mac, rssi, len(payload))
+            start = position + _RECORD_HEADER.size
+            chunk[start : start + len(payload)] = payload
+            mac_filter |= _mac_bits(mac)
+            position += width
+        timestamps = [timestamp for timestamp, _, _, _ in pending]
+        _CHUNK_HEADER.pack_into(
+            chunk,
+            0,
+            len(pending),
+            width,
+            min(timestamps),
+            max(timestamps),
+            mac_filter.to_bytes(32, "little"),
+        )
+        self._file.write(chunk)
+        self._file.flush()
+        pending.clear()
+
+    def close(self) -> None:
+        """Flush the buffered records and close the file."""
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def _open(self, path: str | os.PathLike[str]) -> None:
+        """Write the file header of a new archive, or check that of an
+        existing one and cut off a truncated trailing chunk."""
+        file = self._file
+        size = file.seek(0, os.SEEK_END)
+        file_header = _FILE_HEADER.pack(MAGIC, VERSION)
+        if size < _FILE_HEADER.size:
+            # New, or a crash cut the file header short
+            file.seek(0)
+            if not file_header.startswith(file.read()):
+                raise ValueError(f"Not an advertisement archive: {path}")
+            file.truncate(0)
+            file.write(file_header)
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            _check_file_header(buffer, path)
+            chunks = _read_index(buffer)
+        end = (
+            chunks[-1].offset + chunks[-1].records * chunks[-1].width
+            if chunks
+            else _FILE_HEADER.size
+        )
+        if end < size:
+            file.truncate(end)
+
+
+class ArchiveReader:
+    """Read an archive through a memory map.
+
+    The payloads of the records yielded are views into the map.  Views still
+    referenced at `close` stay valid, and the map is only unmapped once the
+    last of them is gone.
+    """
+
+    def __init__(self, path: str | os.PathLike[str]) -> None:
+        with open(path, "rb") as file:
+            if os.fstat(file.fileno()).st_size < _FILE_HEADER.size:
+                raise ValueError(f"Not an advertisement archive: {path}")
+            self._buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            _check_file_header(self._buffer, path)
+        except ValueError:
+            self._buffer.close()
+            raise
+        self._view = memoryview(self._buffer)
+        self.chunks = _read_index(self._buffer)
+
+    def __enter__(self) -> ArchiveReader:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return sum(chunk.records for chunk in self.chunks)
+
+    def scan(
+        self,
+        start: float | None = None,
+        end: float | None = None,
+        address: str | None = None,
+    ) -> Iterator[ArchiveRecord]:
+        """Yield the records timestamped in [start, end), of `address` if given.
+
+        Records come in the order they were appended.
+        """
+        mac = _mac_bytes(address) if address is not None else None
+        mac_bits = _mac_bits(mac) if mac is not None else 0
+        low = -float("inf") if start is None else start
+        high = float("inf") if end is None else end
+        buffer = self._buffer
+        view = self._view
+        unpack_record = _RECORD_HEADER.unpack_from
+        header_size = _RECORD_HEADER.size
+        for chunk in self.chunks:
+            if (
+                chunk.last_timestamp < low
+                or chunk.first_timestamp >= high
+                or chunk.mac_filter & mac_bits != mac_bits
+            ):
+                continue
+            # Chunks entirely in the time range need no per-record check.
+            check_time = chunk.first_timestamp < low or chunk.last_timestamp >= high
+            width = chunk.width
+            for position in range(
+                chunk.offset,
+                chunk.offset + chunk.records * width,
+                width,
+            ):
+                if mac is not None and buffer[position + 8 : position + 14] != mac:
+                    continue
+                timestamp, record_mac, rssi, length = unpack_record(buffer, position)
+                if check_time and not low <= timestamp < high:
+                    continue
+                payload_start = position + header_size
+                yield ArchiveRecord(
+                    timestamp,
+                    record_mac.hex(":").upper(),
+                    None if rssi == _RSSI_NOT_AVAILABLE else rssi,
+                    view[payload_start : payload_start + length],
+                )
+
+    def decode(
+        self,
+        start: float | None = None,
+        end: float | None = None,
+        address: str | None = None,
+    ) -> Iterator[tuple[ArchiveRecord, Decoder]]:
+        """Yield the scanned records with their decoded payloads.
+
+        Records of unsupported data formats, or that fail to decode, are
+        skipped.
+        """
+        for record in self.scan(start, end, address):
+            decoded = decode(record.raw_data)
+            if decoded is not None:
+                yield record, decoded
+
+    def close(self) -> None:
+        """Unmap the archive, once no payload views into it are left."""
+        self._view.release()
+        try:
+            self._buffer.close()
+        except BufferError:
+            # Payload views are still referenced; the map is unmapped when
+            # the last of them is released or garbage collected.
+            pass
+
+
+def _check_file_header(buffer: mmap.mmap, path: str | os.PathLike[str]) -> None:
+    magic, version = _FILE_HEADER.unpack_from(buffer)
+    if magic != MAGIC:
+        raise ValueError(f"Not an advertisement archive: {path}")
+    if version != VERSION:
+        raise ValueError(f"Unsupported archive version: {version}")
+
+
+def _read_index(buffer: mmap.mmap) -> list[ArchiveChunk]:
+    """Read the headers of the complete chunks of an archive."""
+    size = len(buffer)
+    chunks = []
+    position = _FILE_HEADER.size
+    while position + _CHUNK_HEADER.size <= size:
+        records, width, first, last, mac_filter = _CHUNK_HEADER.unpack_from(
+            buffer,
+            position,
+        )
+        offset = position + _CHUNK_HEADER.size
+        position = offset + records * width
+        if position > size:
+            break
+        chunks.append(
+            ArchiveChunk(
+                offset,
+                records,
+                width,
+                first,
+                last,
+                int.from_bytes(mac_filter, "little"),
+            ),
+        )
+    return chunks
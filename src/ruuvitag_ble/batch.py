@@ -0,0 +1,71 @@
+"""
+Columnar batch decoding of many raw Ruuvi payloads at once.
+
+Meant for backfills and other offline processing, where building a decoder
+object (and calling its properties) per advertisement is needlessly slow.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from collections.abc import Iterable
+from typing import Any
+
+from ruuvitag_ble.df3_decoder import DataFormat3Decoder
+from ruuvitag_ble.df5_decoder import DataFormat5Decoder
+from ruuvitag_ble.df6_decoder import DataFormat6Decoder
+from ruuvitag_ble.dfe1_decoder import DataFormatE1Decoder
+from ruuvitag_ble.schema import CompiledFormat
+
+FORMATS: dict[int, CompiledFormat] = {
+    decoder_cls.format.data_format: decoder_cls.format
+    for decoder_cls in (
+        DataFormat3Decoder,
+        DataFormat5Decoder,
+        DataFormat6Decoder,
+        DataFormatE1Decoder,
+    )
+}
+
+COLUMNS: tuple[str, ...] = (
+    "data_format",
+    *dict.fromkeys(name for fmt in FORMATS.values() for name in fmt.names),
+)
+
+
+def decode_batch(payloads: Iterable[bytes]) -> dict[str, list[Any]]:
+    """Decode many raw Ruuvi payloads (manufacturer data for 0x0499) at once.
+
+    Payloads are grouped by their data format byte and each group is unpacked
+    in one pass.  The result maps each name in `COLUMNS` (the field names used
+    by the per-format decoders, plus `data_format`) to a list with one entry
+    per payload, in input order.
+
+    Fields not carried by a payload's data format are `None`, as are all fields
+    of payloads that are of an unsupported data format or too short to decode.
+    """
+    payloads = list(payloads)
+    count = len(payloads)
+    columns: dict[str, list[Any]] = {name: [None] * count for name in COLUMNS}
+
+    groups: defaultdict[int, list[int]] = defaultdict(list)
+    for index, raw_data in enumerate(payloads):
+        if raw_data:
+            groups[raw_data[0]].append(index)
+
+    format_column = columns["data_format"]
+    for data_format, indices in groups.items():
+        for index in indices:
+            format_column[index] = data_format
+        fmt = FORMATS.get(data_format)
+        if fmt is None:
+            continue
+        size = fmt.size
+        indices = [i for i in indices if len(payloads[i]) >= size]
+        buffer = b"".join([payloads[i][:size] for i in indices])
+        field_columns = [columns[name] for name in fmt.names]
+        convert = fmt.convert
+        for index, row in zip(indices, fmt.struct.iter_unpack(buffer)):
+            for column, value in zip(field_columns, convert(row)):
+                column[index] = value
+    return columns
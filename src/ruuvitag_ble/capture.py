@@ -0,0 +1,214 @@
+"""
+Streaming decoding of Ruuvi advertisements from Bluetooth capture files.
+
+Supports btsnoop files (as written by Android's "Bluetooth HCI snoop log"
+and `btmon -w`) with HCI H1 or H4 framing, and pcap files with the
+`LINKTYPE_BLUETOOTH_HCI_H4`, `LINKTYPE_BLUETOOTH_HCI_H4_WITH_PHDR`,
+`LINKTYPE_BLUETOOTH_LE_LL` and `LINKTYPE_BLUETOOTH_LE_LL_WITH_PHDR` link
+types (pcapng is not supported).
+
+The file is memory-mapped and its records are walked in place, so even
+captures of several gigabytes are read in constant memory; only the Ruuvi
+manufacturer data of each advertisement found is copied out for decoding.
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+from collections.abc import Iterator
+from typing import NamedTuple
+
+from ruuvitag_ble.core import Decoder, decode
+from ruuvitag_ble.hci import (
+    H4_EVENT,
+    address_at,
+    manufacturer_data_span,
+    ruuvi_advertisements,
+)
+
+
+class CaptureReading(NamedTuple):
+    timestamp: float  # Seconds since the Unix epoch
+    address: str  # Advertiser address, e.g. "C7:1F:D4:FE:63:82"
+    rssi: int | None  # Not available in plain link layer captures
+    raw_data: bytes  # Manufacturer data for 0x0499
+    decoded: Decoder
+
+
+_BTSNOOP_MAGIC = b"btsnoop\0"
+_BTSNOOP_HEADER = struct.Struct(">8sII")
+_BTSNOOP_RECORD = struct.Struct(">IIIIq")
+# btsnoop timestamps are microseconds since midnight, January 1st, 0 AD.
+_BTSNOOP_EPOCH_DELTA_US = 0x00DCDDB30F2F8000
+_BTSNOOP_H1 = 1001
+_BTSNOOP_H4 = 1002
+# Flags of packets received from the controller that are commands or events.
+_BTSNOOP_FLAGS_EVENT = 0x03
+
+_PCAP_MAGICS = {
+    b"\xa1\xb2\xc3\xd4": (">", 1e-6),
+    b"\xd4\xc3\xb2\xa1": ("<", 1e-6),
+    b"\xa1\xb2\x3c\x4d": (">", 1e-9),
+    b"\x4d\x3c\xb2\xa1": ("<", 1e-9),
+}
+_PCAP_HEADER_SIZE = 24
+_LINKTYPE_BLUETOOTH_HCI_H4 = 187
+_LINKTYPE_BLUETOOTH_HCI_H4_WITH_PHDR = 201
+_LINKTYPE_BLUETOOTH_LE_LL = 251
+_LINKTYPE_BLUETOOTH_LE_LL_WITH_PHDR = 256
+
+_LL_ADVERTISING_ACCESS_ADDRESS = b"\xd6\xbe\x89\x8e"
+# ADV_IND, ADV_NONCONN_IND, SCAN_RSP and ADV_SCAN_IND carry AdvA + AdvData.
+_LL_PDUS_WITH_ADV_DATA = frozenset((0x0, 0x2, 0x4, 0x6))
+_LL_PHDR_SIZE = 10
+_LL_PHDR_SIGNAL_POWER_VALID = 0x0002
+
+# (address, RSSI, manufacturer data) of one advertisement.
+_Advertisement = tuple[str, int | None, bytes]
+
+
+def read_capture(path: str | os.PathLike[str]) -> Iterator[CaptureReading]:
+    """Yield the Ruuvi advertisements in a btsnoop or pcap capture file.
+
+    Advertisements of unsupported data formats, or that fail to decode,
+    are skipped.  Truncated trailing records are ignored.
+    """
+    with open(path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            if hasattr(mmap, "MADV_SEQUENTIAL"):
+                buffer.madvise(mmap.MADV_SEQUENTIAL)
+            if buffer[:8] == _BTSNOOP_MAGIC:
+                packets = _btsnoop_advertisements(buffer)
+            elif buffer[:4] in _PCAP_MAGICS:
+                packets = _pcap_advertisements(buffer)
+            else:
+                raise ValueError(f"Not a btsnoop or pcap file: {path}")
+            for timestamp, (address, rssi, raw_data) in packets:
+                decoded = decode(raw_data)
+                if decoded is not None:
+                    yield CaptureReading(timestamp, address, rssi, raw_data, decoded)
+
+
+def _btsnoop_advertisements(
+    buffer: mmap.mmap,
+) -> Iterator[tuple[float, _Advertisement]]:
+    _, _, datalink = _BTSNOOP_HEADER.unpack_from(buffer)
+    if datalink not in (_BTSNOOP_H1, _BTSNOOP_H4):
+        raise ValueError(f"Unsupported btsnoop datalink type: {datalink}")
+    h4 = datalink == _BTSNOOP_H4
+    unpack_record = _BTSNOOP_RECORD.unpack_from
+    record_size = _BTSNOOP_RECORD.size
+    size = len(buffer)
+    position = _BTSNOOP_HEADER.size
+    while position + record_size <= size:
+        _, length, flags, _, timestamp_us = unpack_record(buffer, position)
+        start = position + record_size
+        end = start + length
+        if end > size:
+            break
+        position = end
+        if h4:
+            if length < 1 or buffer[start] != H4_EVENT:
+                continue
+            start += 1
+        elif flags & _BTSNOOP_FLAGS_EVENT != _BTSNOOP_FLAGS_EVENT:
+            continue
+        timestamp = (timestamp_us - _BTSNOOP_EPOCH_DELTA_US) / 1e6
+        for advertisement in _hci_event_advertisements(buffer, start, end):
+            yield timestamp, advertisement
+
+
+def _pcap_advertisements(
+    buffer: mmap.mmap,
+) -> Iterator[tuple[float, _Advertisement]]:
+    byte_order, resolution = _PCAP_MAGICS[buffer[:4]]
+    (linktype,) = struct.unpack_from(f"{byte_order}I", buffer, 20)
+    linktype &= 0x0FFFFFFF  # The upper bits may hold FCS information
+    if linktype == _LINKTYPE_BLUETOOTH_HCI_H4:
+        walk, header_size = _h4_advertisements, 0
+    elif linktype == _LINKTYPE_BLUETOOTH_HCI_H4_WITH_PHDR:
+        walk, header_size = _h4_advertisements, 4
+    elif linktype == _LINKTYPE_BLUETOOTH_LE_LL:
+        walk, header_size = _ll_advertisements, 0
+    elif linktype == _LINKTYPE_BLUETOOTH_LE_LL_WITH_PHDR:
+        walk, header_size = _ll_phdr_advertisements, 0
+    else:
+        raise ValueError(f"Unsupported pcap link type: {linktype}")
+    record = struct.Struct(f"{byte_order}IIII")
+    unpack_record = record.unpack_from
+    record_size = record.size
+    size = len(buffer)
+    position = _PCAP_HEADER_SIZE
+    while position + record_size <= size:
+        seconds, fraction, length, _ = unpack_record(buffer, position)
+        start = position + record_size
+        end = start + length
+        if end > size:
+            break
+        position = end
+        timestamp = seconds + fraction * resolution
+        for advertisement in walk(buffer, start + header_size, end):
+            yield timestamp, advertisement
+
+
+def _h4_advertisements(
+    buffer: mmap.mmap,
+    start: int,
+    end: int,
+) -> Iterator[_Advertisement]:
+    if start < end and buffer[start] == H4_EVENT:
+        yield from _hci_event_advertisements(buffer, start + 1, end)
+
+
+def _hci_event_advertisements(
+    buffer: mmap.mmap,
+    start: int,
+    end: int,
+) -> Iterator[_Advertisement]:
+    for address, rssi, data_start, data_end in ruuvi_advertisements(
+        buffer,
+        start,
+        end,
+    ):
+        yield address, rssi, buffer[data_start:data_end]
+
+
+def _ll_phdr_advertisements(
+    buffer: mmap.mmap,
+    start: int,
+    end: int,
+) -> Iterator[_Advertisement]:
+    if end - start < _LL_PHDR_SIZE:
+        return
+    (flags,) = struct.unpack_from("<H", buffer, start + 8)
+    rssi = _signed(buffer[start + 1]) if flags & _LL_PHDR_SIGNAL_POWER_VALID else None
+    for address, _, raw_data in _ll_advertisements(buffer, start + _LL_PHDR_SIZE, end):
+        yield address, rssi, raw_data
+
+
+def _ll_advertisements(
+    buffer: mmap.mmap,
+    start: int,
+    end: int,
+) -> Iterator[_Advertisement]:
+    """Walk a link layer packet (access address, PDU, CRC) for legacy adverts."""
+    if (
+        end - start < 12
+        or buffer[start : start + 4] != _LL_ADVERTISING_ACCESS_ADDRESS
+        or buffer[start + 4] & 0x0F not in _LL_PDUS_WITH_ADV_DATA
+    ):
+        return
+    payload_end = start + 6 + buffer[start + 5]
+    if payload_end > end or payload_end < start + 12:
+        return
+    span = manufacturer_data_span(buffer, start + 12, payload_end)
+    if span is not None:
+        yield address_at(buffer, start + 6), None, buffer[span[0] : span[1]]
+
+
+def _signed(value: int) -> int:
+    return value - 256 if value > 127 else value
@@ -0,0 +1,389 @@
+"""
+Compressed storage of per-tag series of readings.
+
+A series is a sequence of (timestamp, payload) readings of one tag, all of
+the same data format.  Rather than the decoded floats, the codec stores the
+raw integer fields of each payload, as unpacked by the data format's struct
+layout: these are the values at the format's native resolution (e.g. 1/200
+°C for Data Format 5 temperatures, 0.0025 %RH for E1 humidity), so nothing
+is lost and decoding reproduces the decoded values exactly.  Reserved bytes
+are not kept.
+
+Readings are encoded column by column, in blocks of `block_size` readings:
+
+* timestamps (quantized to `timestamp_resolution`) and measurement sequence
+  numbers as deltas of deltas, which are zero for regular intervals;
+* other fields as deltas from the previous reading (quantized deltas: the
+  raw values are the quantized ones), which are zero or small for slowly
+  changing measurements;
+* MAC addresses as runs of the same value.
+
+Deltas are zigzag-encoded varints, and runs of zero deltas are collapsed
+into a single varint, so a constant field costs next to nothing.  Data
+Format 5 readings with jittered timestamps and every value drifting take
+about 10 bytes each (against 24 for the payload and 8 for a timestamp);
+a day of regular readings of a tag at rest takes a few hundred bytes.
+
+Each block is self-contained and starts with a small header (data format,
+number of readings, time range), so blocks are streamed out as they fill up
+and `SeriesReader` can decode any block (or time range) on its own.  Readings
+may be appended out of order: they are kept in the order they came in, and
+the time range of a block is that of its earliest and latest readings.
+"""
+
+from __future__ import annotations
+
+import itertools
+import re
+import struct
+from collections.abc import Iterator
+from typing import NamedTuple
+
+from ruuvitag_ble.core import Decoder, Payload, decoder_classes
+from ruuvitag_ble.schema import CompiledFormat
+
+_TIMESTAMP_RESOLUTION = 0.001
+
+
+class SeriesBlock(NamedTuple):
+    offset: int  # Offset of the block in the encoded series
+    data_format: int
+    readings: int
+    first_timestamp: float  # Earliest timestamp in the block
+    last_timestamp: float  # Latest timestamp in the block
+
+
+class _Layout:
+    """The columns of the struct layout of a data format."""
+
+    def __init__(self, compiled: CompiledFormat) -> None:
+        self.struct = compiled.struct
+        # (width of bytes values, or 0 for integers, and whether the column
+        # is stored as deltas of deltas) per column, in struct order
+        self.columns: list[tuple[int, bool]] = []
+        fields = {f.name: f for f in compiled.spec.fields}
+        sequence = fields.get("measurement_sequence_number")
+        offset = 0
+        for count, code in re.findall(r"(\d*)([a-zA-Z])", self.struct.format[1:]):
+            width = int(count or 1) if code in "xs" else struct.calcsize(f">{code}")
+            if code != "x":
+                is_sequence = (
+                    sequence is not None
+                    and sequence.offset <= offset < sequence.offset + sequence.width
+                )
+                self.columns.append((width if code == "s" else 0, is_sequence))
+            offset += width
+
+
+_LAYOUTS = {
+    data_format: _Layout(decoder_cls.format)
+    for data_format, decoder_cls in decoder_classes.items()
+}
+
+
+class SeriesEncoder:
+    """Encode a series of readings of one tag, block by block.
+
+    `append` returns each block as soon as it is full (and `flush` the last
+    one); the encoded series is the concatenation of the blocks.
+    """
+
+    def __init__(
+        self,
+        data_format: int,
+        *,
+        block_size: int = 1024,
+        timestamp_resolution: float = _TIMESTAMP_RESOLUTION,
+    ) -> None:
+        if data_format not in _LAYOUTS:
+            raise ValueError(f"Unsupported data format: {data_format:#04x}")
+        if block_size < 1:
+            raise ValueError(f"block_size must be at least 1, got {block_size}")
+        ticks = round(1 / timestamp_resolution)
+        if ticks < 1 or abs(ticks * timestamp_resolution - 1) > 1e-9:
+            raise ValueError(
+                "timestamp_resolution must be a whole fraction of a second, "
+                f"got {timestamp_resolution}",
+            )
+        self.data_format = data_format
+        self.block_size = block_size
+        self.timestamp_resolution = timestamp_resolution
+        self._ticks = ticks
+        self._layout = _LAYOUTS[data_format]
+        self._timestamps: list[int] = []
+        self._rows: list[tuple[int | bytes, ...]] = []
+
+    def append(self, timestamp: float, raw_data: Payload) -> bytes | None:
+        """Add a reading, returning the encoded block if this filled it up."""
+        if not raw_data or raw_data[0] != self.data_format:
+            raise ValueError(
+                f"Expected data format {self.data_format:#04x}, "
+                f"got {bytes(raw_data[:1]).hex() or 'nothing'}",
+            )
+        size = self._layout.struct.size
+        if len(raw_data) < size:
+            raise ValueError(
+                f"Expected at least {size} bytes of data format "
+                f"{self.data_format:#04x}, got {len(raw_data)}",
+            )
+        self._rows.append(self._layout.struct.unpack_from(raw_data))
+        self._timestamps.append(round(timestamp * self._ticks))
+        if len(self._rows) >= self.block_size:
+            return self.flush()
+        return None
+
+    def flush(self) -> bytes:
+        """Encode the readings added since the last block."""
+        if not self._rows:
+            return b""
+        body = bytearray()
+        timestamps = self._timestamps
+        body.append(self.data_format)
+        _write_varint(body, len(timestamps))
+        earliest = min(timestamps)
+        _write_varint(body, _zigzag(earliest))
+        _write_varint(body, _zigzag(max(timestamps) - earliest))
+        _write_varint(body, self._ticks)
+        _write_deltas(body, timestamps, delta_of_delta=True)
+        for index, (width, delta_of_delta) in enumerate(self._layout.columns):
+            column = [row[index] for row in self._rows]
+            if width:
+                _write_runs(body, column)  # type: ignore[arg-type]
+            else:
+                _write_deltas(body, column, delta_of_delta)  # type: ignore[arg-type]
+        block = bytearray()
+        _write_varint(block, len(body))
+        block += body
+        self._timestamps = []
+        self._rows = []
+        return bytes(block)
+
+
+class SeriesReader:
+    """Decode an encoded series, as a whole or block by block.
+
+    `blocks` indexes the blocks (read from their headers only), so any of
+    them can be decoded without decoding the ones before it.
+    """
+
+    def __init__(self, data: Payload) -> None:
+        self._data = data
+        self.blocks = list(_walk_blocks(data))
+
+    def __len__(self) -> int:
+        return sum(block.readings for block in self.blocks)
+
+    def __iter__(self) -> Iterator[tuple[float, Decoder]]:
+        for index in range(len(self.blocks)):
+            yield from self.block(index)
+
+    def block(self, index: int) -> list[tuple[float, Decoder]]:
+        """Decode the readings of a block."""
+        block = self.blocks[index]
+        decoder_cls = decoder_classes[block.data_format]
+        return [
+            (timestamp, decoder_cls(payload))
+            for timestamp, payload in _decode_block(self._data, block.offset)
+        ]
+
+    def range(
+        self,
+        start: float | None = None,
+        end: float | None = None,
+    ) -> Iterator[tuple[float, Decoder]]:
+        """Yield the readings timestamped in [start, end).
+
+        Only the blocks overlapping the range are decoded.
+        """
+        low = -float("inf") if start is None else start
+        high = float("inf") if end is None else end
+        for index, block in enumerate(self.blocks):
+            if block.last_timestamp < low or block.first_timestamp >= high:
+                continue
+            for timestamp, decoded in self.block(index):
+                if low <= timestamp < high:
+                    yield timestamp, decoded
+
+
+def decode_series(data: Payload) -> Iterator[tuple[float, bytes]]:
+    """Yield the (timestamp, payload) readings of an encoded series.
+
+    Payloads are rebuilt from the stored fields, with zeroes in reserved
+    bytes.
+    """
+    for block in _walk_blocks(data):
+        yield from _decode_block(data, block.offset)
+
+
+def _walk_blocks(data: Payload) -> Iterator[SeriesBlock]:
+    """Read the block headers of an encoded series."""
+    position = 0
+    size = len(data)
+    while position < size:
+        length, body = _read_varint(data, position)
+        header = _read_header(data, body)
+        data_format, readings, first, last, ticks, _ = header
+        yield SeriesBlock(position, data_format, readings, first / ticks, last / ticks)
+        position = body + length
+        if position > size:
+            raise ValueError("Truncated block at the end of the series")
+
+
+def _read_header(
+    data: Payload,
+    position: int,
+) -> tuple[int, int, int, int, int, int]:
+    """Read a block header: data format, readings, earliest and latest
+    timestamp and timestamp units per second, and the position after the
+    header."""
+    data_format = data[position]
+    if data_format not in _LAYOUTS:
+        raise ValueError(f"Unsupported data format: {data_format:#04x}")
+    readings, position = _read_varint(data, position + 1)
+    first, position = _read_varint(data, position)
+    span, position = _read_varint(data, position)
+    ticks, position = _read_varint(data, position)
+    first = _unzigzag(first)
+    return (
+        data_format,
+        readings,
+        first,
+        first + _unzigzag(span),
+        ticks,
+        position,
+    )
+
+
+def _decode_block(data: Payload, offset: int) -> list[tuple[float, bytes]]:
+    _, body = _read_varint(data, offset)
+    data_format, readings, _, _, ticks, position = _read_header(data, body)
+    layout = _LAYOUTS[data_format]
+    timestamps, position = _read_deltas(data, position, readings, True)
+    columns: list[list[int] | list[bytes]] = []
+    for width, delta_of_delta in layout.columns:
+        if width:
+            runs, position = _read_runs(data, position, readings, width)
+            columns.append(runs)
+        else:
+            deltas, position = _read_deltas(data, position, readings, delta_of_delta)
+            columns.append(deltas)
+    pack = layout.struct.pack
+    return [
+        (timestamp / ticks, pack(*row))
+        for timestamp, row in zip(timestamps, zip(*columns, strict=True), strict=True)
+    ]
+
+
+def _zigzag(value: int) -> int:
+    return value << 1 if value >= 0 else (-value << 1) - 1
+
+
+def _unzigzag(value: int) -> int:
+    return value >> 1 if not value & 1 else -((value + 1) >> 1)
+
+
+def _write_varint(out: bytearray, value: int) -> None:
+    while value > 0x7F:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data: Payload, position: int) -> tuple[int, int]:
+    value = 0
+    shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, position
+        shift += 7
+
+
+def _write_deltas(out: bytearray, values: list[int], delta_of_delta: bool) -> None:
+    """Write the first value, then a token per delta (or delta of deltas).
+
+    A token is a zigzag-encoded difference shifted left by one, or, with the
+    lowest bit set, the length of a run of zero differences.
+    """
+    _write_varint(out, _zigzag(values[0]))
+    previous = values[0]
+    previous_delta = 0
+    zeros = 0
+    for value in values[1:]:
+        delta = value - previous
+        difference = delta - previous_delta if delta_of_delta else delta
+        previous = value
+        if delta_of_delta:
+            previous_delta = delta
+        if difference == 0:
+            zeros += 1
+            continue
+        if zeros:
+            _write_varint(out, zeros << 1 | 1)
+            zeros = 0
+        _write_varint(out, _zigzag(difference) << 1)
+    if zeros:
+        _write_varint(out, zeros << 1 | 1)
+
+
+def _read_deltas(
+    data: Payload,
+    position: int,
+    count: int,
+    delta_of_delta: bool,
+) -> tuple[list[int], int]:
+    first, position = _read_varint(data, position)
+    value = _unzigzag(first)
+    values = [value]
+    delta = 0
+    while len(values) < count:
+        token, position = _read_varint(data, position)
+        if token & 1:
+            repeat = token >> 1
+            difference = 0
+        else:
+            repeat = 1
+            difference = _unzigzag(token >> 1)
+        for _ in range(repeat):
+            if delta_of_delta:
+                delta += difference
+            else:
+                delta = difference
+            value += delta
+            values.append(value)
+    if len(values) != count:
+        raise ValueError("Malformed block: too many values in a column")
+    return values, position
+
+
+def _write_runs(out: bytearray, values: list[bytes]) -> None:
+    """Write (run length, value) pairs for a column of fixed-width bytes."""
+    run = 1
+    for previous, value in itertools.pairwise(values):
+        if value == previous:
+            run += 1
+            continue
+        _write_varint(out, run)
+        out += previous
+        run = 1
+    _write_varint(out, run)
+    out += values[-1]
+
+
+def _read_runs(
+    data: Payload,
+    position: int,
+    count: int,
+    width: int,
+) -> tuple[list[bytes], int]:
+    values: list[bytes] = []
+    while len(values) < count:
+        run, position = _read_varint(data, position)
+        value = bytes(data[position : position + width])
+        position += width
+        values += [value] * run
+    if len(values) != count:
+        raise ValueError("Malformed block: too many values in a column")
+    return values, position
@@ -0,0 +1,64 @@
+"""
+Dependency-free core: the decoders, data format dispatch and IAQS.
+
+Importing this module (or any of the decoder modules) pulls in nothing but
+the standard library, so short-lived workers that only decode bytes skip
+the Home Assistant and Bluetooth libraries the parser is built on.  The
+package itself imports the parser lazily, on first access to
+`ruuvitag_ble.RuuvitagBluetoothDeviceData`.
+
+`decode` picks the decoder for the data format in the first byte of Ruuvi
+manufacturer data; `decoder_classes` maps data formats to decoders.
+"""
+
+from __future__ import annotations
+
+import logging
+
+from ruuvitag_ble.df3_decoder import DataFormat3Decoder
+from ruuvitag_ble.df5_decoder import DataFormat5Decoder
+from ruuvitag_ble.df6_decoder import DataFormat6Decoder
+from ruuvitag_ble.dfe1_decoder import DataFormatE1Decoder
+from ruuvitag_ble.iaqs import calculate_iaqs
+from ruuvitag_ble.schema import Payload
+
+__all__ = [
+    "DataFormat3Decoder",
+    "DataFormat5Decoder",
+    "DataFormat6Decoder",
+    "DataFormatE1Decoder",
+    "Decoder",
+    "Payload",
+    "calculate_iaqs",
+    "decode",
+    "decoder_classes",
+]
+
+_LOGGER = logging.getLogger(__name__)
+
+Decoder = (
+    DataFormat3Decoder | DataFormat5Decoder | DataFormat6Decoder | DataFormatE1Decoder
+)
+
+decoder_classes: dict[int, type[Decoder]] = {
+    0x03: DataFormat3Decoder,
+    0x05: DataFormat5Decoder,
+    0x06: DataFormat6Decoder,
+    0xE1: DataFormatE1Decoder,
+}
+
+
+def decode(raw_data: Payload) -> Decoder | None:
+    """Decode Ruuvi manufacturer data, or return None if it can't be decoded."""
+    if not raw_data:
+        return None
+    try:
+        decoder_cls = decoder_classes[raw_data[0]]
+    except KeyError:
+        _LOGGER.debug("Data format not supported: %s", bytes(raw_data))
+        return None
+    try:
+        return decoder_cls(raw_data)
+    except ValueError as err:
+        _LOGGER.debug("Failed to decode %s: %s", bytes(raw_data), err)
+        return None
@@ -0,0 +1,176 @@
+"""
+Per-tag packet loss and coverage statistics from measurement sequence numbers.
+
+Tags count their measurements in the measurement sequence number of Data
+Formats 5, 6 and E1, so the gaps between the sequence numbers received say
+how many measurements a scanner missed.  A `CoverageTracker` follows each
+tag's counter incrementally: measurements received against those expected
+(the span of sequence numbers seen), a histogram of the gaps, duplicates
+(the same measurement received again, e.g. by several scanners), late
+arrivals that fill an earlier gap, counter wraparounds, and resets (a jump
+back beyond the reordering window, as when a tag reboots and its counter
+restarts), after which counting starts over from the new sequence number.
+
+State is a few integers per tag and data format (Ruuvi Air advertises Data
+Formats 6 and E1 with separate counters), so memory is O(1) per tag and
+observing an advertisement costs a few integer operations.  `snapshot()`
+returns the statistics per tag as plain dicts, for export.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from typing import TYPE_CHECKING, Any
+
+from ruuvitag_ble.sequence import SEQUENCE_BITS, sequence_delta
+
+if TYPE_CHECKING:
+    from ruuvitag_ble.parser import DecodedAdvertisement
+    from ruuvitag_ble.peek import PeekedAdvertisement
+
+# Upper bounds (inclusive) of the gap histogram buckets, in missed
+# measurements.  Longer gaps fall into an extra overflow bucket.
+GAP_BUCKETS: tuple[int, ...] = (1, 2, 5, 10, 50, 100, 1000)
+
+# Number of most recent sequence numbers remembered per counter for telling
+# duplicates from late arrivals.  Jumps back further than this are resets.
+SEQUENCE_WINDOW = 64
+
+_COUNTS = ("received", "expected", "duplicates", "late", "resets", "wraps")
+
+
+class _Counter:
+    __slots__ = (
+        "duplicates",
+        "expected",
+        "gaps",
+        "highest",
+        "late",
+        "received",
+        "resets",
+        "seen",
+        "wraps",
+    )
+
+    def __init__(self, sequence: int) -> None:
+        self.highest = sequence
+        self.seen = 0  # Bit i is set if `highest - i - 1` was received
+        self.received = 1
+        self.expected = 1
+        self.duplicates = 0
+        self.late = 0
+        self.resets = 0
+        self.wraps = 0
+        self.gaps = [0] * (len(GAP_BUCKETS) + 1)
+
+
+class CoverageTracker:
+    """Track received, missed and repeated measurements per tag.
+
+    With `max_gap`, forward jumps of more than `max_gap` measurements are
+    taken as counter resets rather than counted as missed (by default, any
+    forward jump is a gap, up to half the counter's range).
+    """
+
+    def __init__(self, *, max_gap: int | None = None) -> None:
+        if max_gap is not None and max_gap < 1:
+            raise ValueError(f"max_gap must be at least 1, got {max_gap}")
+        self.max_gap = max_gap
+        self._counters: dict[tuple[str, int], _Counter] = {}
+
+    def __len__(self) -> int:
+        return len({tag for tag, _ in self._counters})
+
+    def add(self, tag: str, data_format: int, sequence: int | None) -> None:
+        """Observe a measurement sequence number of a tag.
+
+        Advertisements without one (Data Format 3, or an E1 sequence number
+        that is not available) are ignored.
+        """
+        if sequence is None or data_format not in SEQUENCE_BITS:
+            return
+        counter = self._counters.get((tag, data_format))
+        if counter is None:
+            self._counters[tag, data_format] = _Counter(sequence)
+            return
+        delta = sequence_delta(sequence, counter.highest, SEQUENCE_BITS[data_format])
+        if delta > 0:
+            if self.max_gap is not None and delta - 1 > self.max_gap:
+                self._reset(counter, sequence)
+                return
+            if sequence < counter.highest:
+                counter.wraps += 1
+            counter.highest = sequence
+            counter.seen = ((counter.seen << 1 | 1) << (delta - 1)) & (
+                (1 << SEQUENCE_WINDOW) - 1
+            )
+            counter.received += 1
+            counter.expected += delta
+            if delta > 1:
+                counter.gaps[bisect_left(GAP_BUCKETS, delta - 1)] += 1
+        elif delta == 0:
+            counter.duplicates += 1
+        elif -delta > SEQUENCE_WINDOW:
+            self._reset(counter, sequence)
+        elif counter.seen & (bit := 1 << (-delta - 1)):
+            counter.duplicates += 1
+        else:
+            counter.seen |= bit
+            counter.received += 1
+            counter.late += 1
+
+    def add_advertisement(
+        self,
+        tag: str,
+        advertisement: DecodedAdvertisement | PeekedAdvertisement,
+    ) -> None:
+        """Observe the sequence number of a decoded (or peeked) advertisement."""
+        self.add(
+            tag,
+            advertisement.data_format,
+            advertisement.measurement_sequence_number,
+        )
+
+    def snapshot(self, tag: str | None = None) -> dict[str, dict[str, Any]]:
+        """Return the statistics of `tag`, or of all tags, as plain dicts.
+
+        `lost` is `expected - received`, `loss_rate` its share of `expected`
+        and `duplicate_rate` the share of duplicates among all
+        advertisements with a sequence number.
+        """
+        stats: dict[str, dict[str, Any]] = {}
+        for (counter_tag, _), counter in self._counters.items():
+            if tag is not None and counter_tag != tag:
+                continue
+            totals = stats.get(counter_tag)
+            if totals is None:
+                totals = stats[counter_tag] = dict.fromkeys(_COUNTS, 0)
+                totals["gaps"] = {
+                    "buckets": list(GAP_BUCKETS),
+                    "counts": [0] * len(counter.gaps),
+                }
+            for name in _COUNTS:
+                totals[name] += getattr(counter, name)
+            gap_counts = totals["gaps"]["counts"]
+            for index, count in enumerate(counter.gaps):
+                gap_counts[index] += count
+        for totals in stats.values():
+            received, expected = totals["received"], totals["expected"]
+            totals["lost"] = expected - received
+            totals["loss_rate"] = (expected - received) / expected
+            totals["duplicate_rate"] = totals["duplicates"] / (
+                received + totals["duplicates"]
+            )
+        return stats
+
+    def remove(self, tag: str) -> None:
+        """Forget the counters of a tag."""
+        for key in [key for key in self._counters if key[0] == tag]:
+            del self._counters[key]
+
+    def _reset(self, counter: _Counter, sequence: int) -> None:
+        counter.highest = sequence
+        counter.seen = 0
+        counter.received += 1
+        counter.expected += 1
+        counter.resets += 1
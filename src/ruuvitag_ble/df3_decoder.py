@@ -9,58 +9,95 @@ from __future__ import annotations
 import math
 import struct
 
+from ruuvitag_ble.schema import (
+    CompiledFormat,
+    Computed,
+    Field,
+    FormatSpec,
+    SchemaDecoder,
+)
 
-class DataFormat3Decoder:
-    def __init__(self, raw_data: bytes) -> None:
-        if len(raw_data) < 14:
-            raise ValueError("Data must be at least 14 bytes long for data format 3")
-        self.data: tuple[int, ...] = struct.unpack(">BBbBHhhhH", raw_data)
 
-    @property
-    def humidity_percentage(self) -> float | None:
-        if self.data[1] > 200:
-            return None
-        return round(self.data[1] / 2, 2)
+def _temperature(raw: int) -> float | None:
+    int_byte = raw >> 8
+    frac_byte = raw & 0xFF
+    if frac_byte >= 100:  # pragma: no cover
+        # Faulty reading; fractional part can't be >= 100
+        return None
+    # Handle MSB sign bit
+    value = ((int_byte & 0x7F) + frac_byte / 100.0) * (-1 if int_byte & 0x80 else 1)
+    return round(value, 2)
 
-    @property
-    def temperature_celsius(self) -> float | None:
-        frac_byte = self.data[3]
-        if frac_byte >= 100:  # pragma: no cover
-            # Faulty reading; fractional part can't be >= 100
-            return None
-        int_byte = self.data[2]
-        # Handle MSB sign bit
-        value = ((int_byte & 0x7F) + frac_byte / 100.0) * (-1 if int_byte & 0x80 else 1)
-        return round(value, 2)
 
-    @property
-    def pressure_hpa(self) -> float | None:
-        if self.data[3] == 0xFFFF:
-            return None
+def _encode_temperature(value: float | None) -> int:
+    if value is None:
+        return 0x00FF  # An invalid fractional part
+    magnitude = abs(value)
+    int_part = int(magnitude)
+    frac_part = round((magnitude - int_part) * 100)
+    if frac_part == 100:
+        int_part, frac_part = int_part + 1, 0
+    if int_part > 0x7F:
+        raise ValueError(f"Value of temperature_celsius out of range: {value}")
+    sign = 0x80 if math.copysign(1, value) < 0 else 0
+    return (sign | int_part) << 8 | frac_part
 
-        return round((self.data[4] + 50000) / 100, 2)
 
-    @property
-    def acceleration_vector_mg(self) -> tuple[int, int, int] | tuple[None, None, None]:
-        ax = self.data[5]
-        ay = self.data[6]
-        az = self.data[7]
-        if ax == -32768 or ay == -32768 or az == -32768:
-            return (None, None, None)
+def acceleration_total(vector: tuple[int | None, ...]) -> float | None:
+    ax, ay, az = vector
+    if ax is None or ay is None or az is None:
+        return None
+    return math.hypot(ax, ay, az)
 
-        return (ax, ay, az)
 
-    @property
-    def acceleration_total_mg(self) -> float | None:
-        ax, ay, az = self.acceleration_vector_mg
-        if ax is None or ay is None or az is None:
-            return None
-        return math.hypot(ax, ay, az)
+DF3_SPEC = FormatSpec(
+    data_format=0x03,
+    name="3",
+    fields=(
+        Field(name="humidity_percentage", offset=1, maximum=200, divisor=2, digits=2),
+        Field(
+            name="temperature_celsius",
+            offset=2,
+            width=2,
+            convert=_temperature,
+            encode=_encode_temperature,
+        ),
+        Field(
+            name="pressure_hpa",
+            offset=4,
+            width=2,
+            bias=50000,
+            divisor=100,
+            digits=2,
+        ),
+        Field(
+            name="acceleration_vector_mg",
+            offset=6,
+            width=2,
+            signed=True,
+            count=3,
+            sentinel=-32768,
+        ),
+        Field(name="battery_voltage_mv", offset=12, width=2),
+    ),
+    computed=(
+        Computed(
+            "acceleration_total_mg",
+            acceleration_total,
+            ("acceleration_vector_mg",),
+        ),
+    ),
+)
 
-    @property
-    def battery_voltage_mv(self) -> int | None:
-        return self.data[8]
 
-    @property
-    def mac(self) -> str | None:
-        return None  # Not supported by this decoder
+class DataFormat3Decoder(SchemaDecoder):
+    format = CompiledFormat(DF3_SPEC)
+    data_struct = struct.Struct(">BBbBHhhhH")
+
+    humidity_percentage: float | None
+    temperature_celsius: float | None
+    pressure_hpa: float | None
+    acceleration_vector_mg: tuple[int, int, int] | tuple[None, None, None]
+    acceleration_total_mg: float | None
+    battery_voltage_mv: int | None
+    mac: str | None = None  # Not supported by this data format
@@ -7,76 +7,98 @@ Ruuvi Sensor Protocols: https://github.com/ruuvi/ruuvi-sensor-protocols/blob/mas
 
 from __future__ import annotations
 
-import math
 import struct
 
-
-class DataFormat5Decoder:
-    def __init__(self, raw_data: bytes) -> None:
-        if len(raw_data) < 24:
-            raise ValueError("Data must be at least 24 bytes long for data format 5")
-        self.data: tuple[int, ...] = struct.unpack(">BhHHhhhHBH6B", raw_data)
-
-    @property
-    def temperature_celsius(self) -> float | None:
-        if self.data[1] == -32768:
-            return None
-        return round(self.data[1] / 200.0, 2)
-
-    @property
-    def humidity_percentage(self) -> float | None:
-        if self.data[2] == 65535:
-            return None
-        return round(self.data[2] / 400, 2)
-
-    @property
-    def pressure_hpa(self) -> float | None:
-        if self.data[3] == 0xFFFF:
-            return None
-
-        return round((self.data[3] + 50000) / 100, 2)
-
-    @property
-    def acceleration_vector_mg(self) -> tuple[int, int, int] | tuple[None, None, None]:
-        ax = self.data[4]
-        ay = self.data[5]
-        az = self.data[6]
-        if ax == -32768 or ay == -32768 or az == -32768:
-            return (None, None, None)
-
-        return (ax, ay, az)
-
-    @property
-    def acceleration_total_mg(self) -> float | None:
-        ax, ay, az = self.acceleration_vector_mg
-        if ax is None or ay is None or az is None:
-            return None
-        return math.hypot(ax, ay, az)
-
-    @property
-    def battery_voltage_mv(self) -> int | None:
-        voltage = self.data[7] >> 5
-        if voltage == 0b11111111111:
-            return None
-
-        return voltage + 1600
-
-    @property
-    def tx_power_dbm(self) -> int | None:
-        tx_power = self.data[7] & 0x001F
-        if tx_power == 0b11111:
-            return None
-
-        return -40 + (tx_power * 2)
-
-    @property
-    def movement_counter(self) -> int:
-        return self.data[8]
-
-    @property
-    def measurement_sequence_number(self) -> int:
-        return self.data[9]
-
-    @property
-    def mac(self) -> str:
-        return ":".join(f"{x:02X}" for x in self.data[10:])
+from ruuvitag_ble.df3_decoder import acceleration_total
+from ruuvitag_ble.schema import (
+    CompiledFormat,
+    Computed,
+    Field,
+    FormatSpec,
+    SchemaDecoder,
+)
+
+DF5_SPEC = FormatSpec(
+    data_format=0x05,
+    name="5",
+    fields=(
+        Field(
+            name="temperature_celsius",
+            offset=1,
+            width=2,
+            signed=True,
+            sentinel=-32768,
+            divisor=200.0,
+            digits=2,
+        ),
+        Field(
+            name="humidity_percentage",
+            offset=3,
+            width=2,
+            sentinel=65535,
+            divisor=400,
+            digits=2,
+        ),
+        Field(
+            name="pressure_hpa",
+            offset=5,
+            width=2,
+            sentinel=0xFFFF,
+            bias=50000,
+            divisor=100,
+            digits=2,
+        ),
+        Field(
+            name="acceleration_vector_mg",
+            offset=7,
+            width=2,
+            signed=True,
+            count=3,
+            sentinel=-32768,
+        ),
+        # Power info: 11 bits of battery voltage, 5 bits of TX power
+        Field(
+            name="battery_voltage_mv",
+            offset=13,
+            width=2,
+            shift=5,
+            sentinel=0b11111111111,
+            base=1600,
+        ),
+        Field(
+            name="tx_power_dbm",
+            offset=13,
+            width=2,
+            bits=5,
+            sentinel=0b11111,
+            scale=2,
+            base=-40,
+        ),
+        Field(name="movement_counter", offset=15),
+        Field(name="measurement_sequence_number", offset=16, width=2),
+        Field(name="mac", offset=18, width=6, kind="mac"),
+    ),
+    computed=(
+        Computed(
+            "acceleration_total_mg",
+            acceleration_total,
+            ("acceleration_vector_mg",),
+        ),
+    ),
+)
+
+
+class DataFormat5Decoder(SchemaDecoder):
+    format = CompiledFormat(DF5_SPEC)
+    data_struct = struct.Struct(">BhHHhhhHBH6B")
+
+    temperature_celsius: float | None
+    humidity_percentage: float | None
+    pressure_hpa: float | None
+    acceleration_vector_mg: tuple[int, int, int] | tuple[None, None, None]
+    acceleration_total_mg: float | None
+    battery_voltage_mv: int | None
+    tx_power_dbm: int | None
+    movement_counter: int
+    measurement_sequence_number: int
+    mac: str
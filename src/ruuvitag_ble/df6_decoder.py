@@ -10,91 +10,106 @@ from __future__ import annotations
 import math
 import struct
 
+from ruuvitag_ble.schema import CompiledFormat, Field, FormatSpec, SchemaDecoder
+
 # See https://github.com/ruuvi/ruuvi.endpoints.c/blob/f16619cc2/src/ruuvi_endpoint_6.h#L58
 LUX_LOG_SCALE = math.log(65536) / 254.0
 
 
-class DataFormat6Decoder:
-    def __init__(self, raw_data: bytes) -> None:
-        if (data_len := len(raw_data)) < 20:
-            raise ValueError(
-                f"Data must be at least 20 bytes long for data format 6, got {data_len} bytes",
-            )
-        # Format: header(B), temp(h), humidity(H), pressure(H), pm25(H), co2(H), voc(B), nox(B), lumi(B), sound(B), seq(B), flags(B), mac(3B)
-        # Cutting to 20 bytes since the advertisement may contain more data, and `struct.unpack` expects a fixed size.
-        self.data: tuple[int, ...] = struct.unpack(">BhHHHHBBBBBB3B", raw_data[:20])
-        if self.data[0] != 0x06:
-            raise ValueError(f"Invalid data format: {self.data[0]} (expected 0x06)")
-
-    @property
-    def temperature_celsius(self) -> float | None:
-        if self.data[1] == -32768:
-            return None
-        return round(self.data[1] / 200.0, 2)
-
-    @property
-    def humidity_percentage(self) -> float | None:
-        if self.data[2] == 65535:
-            return None
-        return round(self.data[2] / 400.0, 2)
-
-    @property
-    def pressure_hpa(self) -> float | None:
-        if self.data[3] == 0xFFFF:
-            return None
-        return round((self.data[3] + 50000) / 100, 2)
-
-    @property
-    def pm25_ug_m3(self) -> float | None:
-        if self.data[4] == 0xFFFF:
-            return None
-        return round(self.data[4] / 10.0, 2)
-
-    @property
-    def co2_ppm(self) -> int | None:
-        if self.data[5] == 0xFFFF:
-            return None
-        return self.data[5]
-
-    @property
-    def voc_index(self) -> int | None:
-        val = self.data[6] << 1
-        if self.data[11] & 64:  # (1 << 6)
-            val |= 1
-        if val == 0x1FF:
-            return None
-        return int(val)
-
-    @property
-    def nox_index(self) -> int | None:
-        val = self.data[7] << 1
-        if self.data[11] & 128:  # (1 << 7)
-            val |= 1
-        if val == 0x1FF:
-            return None
-        return int(val)
-
-    @property
-    def luminosity_lux(self) -> int | None:
-        if self.data[8] == 0xFF:
-            return None
-        if self.data[8] == 0:
-            return 0
-        return int(round(math.exp(self.data[8] * LUX_LOG_SCALE) - 1))
-
-    @property
-    def sound_avg_dba(self) -> float | None:
-        val = self.data[9] << 1
-        if self.data[11] & 16:  # (1 << 4)
-            val |= 1
-        if val == 0x1FF:
-            return None
-        return round(val / 5 + 18, 2)
-
-    @property
-    def measurement_sequence_number(self) -> int:
-        return self.data[10]
-
-    @property
-    def mac(self) -> str:
-        return ":".join(f"{x:02X}" for x in self.data[12:15])
+def _luminosity(raw: int) -> int:
+    if raw == 0:
+        return 0
+    return int(round(math.exp(raw * LUX_LOG_SCALE) - 1))
+
+
+def _encode_luminosity(value: int | None) -> int:
+    # Low raw values decode to the same lux (e.g. 0 and 1 are both 0 lux),
+    # so this picks the one that is closest on the logarithmic scale.
+    if value is None:
+        return 0xFF
+    if value < 0:
+        raise ValueError(f"Value of luminosity_lux out of range: {value}")
+    return min(round(math.log(value + 1) / LUX_LOG_SCALE), 254)
+
+
+# Format: header(B), temp(h), humidity(H), pressure(H), pm25(H), co2(H), voc(B), nox(B), lumi(B), sound(B), seq(B), flags(B), mac(3B)
+# The advertisement may contain more data after these 20 bytes.
+DF6_SPEC = FormatSpec(
+    data_format=0x06,
+    name="6",
+    fields=(
+        Field(
+            name="temperature_celsius",
+            offset=1,
+            width=2,
+            signed=True,
+            sentinel=-32768,
+            divisor=200.0,
+            digits=2,
+        ),
+        Field(
+            name="humidity_percentage",
+            offset=3,
+            width=2,
+            sentinel=65535,
+            divisor=400.0,
+            digits=2,
+        ),
+        Field(
+            name="pressure_hpa",
+            offset=5,
+            width=2,
+            sentinel=0xFFFF,
+            bias=50000,
+            divisor=100,
+            digits=2,
+        ),
+        Field(
+            name="pm25_ug_m3",
+            offset=7,
+            width=2,
+            sentinel=0xFFFF,
+            divisor=10.0,
+            digits=2,
+        ),
+        Field(name="co2_ppm", offset=9, width=2, sentinel=0xFFFF),
+        # VOC, NOx and sound are 9 bits, the LSBs of which are in the flags byte.
+        Field(name="voc_index", offset=11, lsb_flag=(16, 6), sentinel=0x1FF),
+        Field(name="nox_index", offset=12, lsb_flag=(16, 7), sentinel=0x1FF),
+        Field(
+            name="luminosity_lux",
+            offset=13,
+            sentinel=0xFF,
+            convert=_luminosity,
+            encode=_encode_luminosity,
+        ),
+        Field(
+            name="sound_avg_dba",
+            offset=14,
+            lsb_flag=(16, 4),
+            sentinel=0x1FF,
+            divisor=5,
+            base=18,
+            digits=2,
+        ),
+        Field(name="measurement_sequence_number", offset=15),
+        Field(name="mac", offset=17, width=3, kind="mac"),
+    ),
+)
+
+
+class DataFormat6Decoder(SchemaDecoder):
+    format = CompiledFormat(DF6_SPEC)
+    data_struct = struct.Struct(">BhHHHHBBBBBB3B")
+
+    temperature_celsius: float | None
+    humidity_percentage: float | None
+    pressure_hpa: float | None
+    pm25_ug_m3: float | None
+    co2_ppm: int | None
+    voc_index: int | None
+    nox_index: int | None
+    luminosity_lux: int | None
+    sound_avg_dba: float | None
+    measurement_sequence_number: int
+    mac: str
@@ -8,116 +8,123 @@ from __future__ import annotations
 
 import struct
 
-
-class DataFormatE1Decoder:
-    def __init__(self, raw_data: bytes) -> None:
-        if (data_len := len(raw_data)) < 40:
-            raise ValueError(
-                f"Data must be at least 40 bytes long for data format E1, got {data_len} bytes",
-            )
-        # Format breakdown (40 bytes total):
-        # 0: header(1B), 1-2: temp(2B), 3-4: humidity(2B), 5-6: pressure(2B),
-        # 7-8: pm1(2B), 9-10: pm25(2B), 11-12: pm4(2B), 13-14: pm10(2B),
-        # 15-16: co2(2B), 17: voc(1B), 18: nox(1B), 19-21: lumi(3B),
-        # 22-24: reserved(3B), 25-27: seq(3B), 28: flags(1B), 29-33: reserved(5B), 34-39: mac(6B)
-        self.data: tuple[int | bytes, ...] = struct.unpack(
-            ">BhHHHHHHHBB3s3s3sB5s6s",
-            raw_data[:40],
-        )
-        if self.data[0] != 0xE1:
-            raise ValueError(
-                f"Invalid data format: {int(self.data[0])} (expected 0xE1)",
-            )
-        self.flags = int(self.data[14])
-
-    @property
-    def temperature_celsius(self) -> float | None:
-        if self.data[1] == -32768:
-            return None
-        return round(int(self.data[1]) * 0.005, 3)
-
-    @property
-    def humidity_percentage(self) -> float | None:
-        if self.data[2] == 65535:
-            return None
-        return round(int(self.data[2]) * 0.0025, 3)
-
-    @property
-    def pressure_hpa(self) -> float | None:
-        if self.data[3] == 0xFFFF:
-            return None
-        return round((int(self.data[3]) + 50000) / 100, 2)
-
-    @property
-    def pm1_ug_m3(self) -> float | None:
-        if self.data[4] == 0xFFFF:
-            return None
-        return round(int(self.data[4]) * 0.1, 1)
-
-    @property
-    def pm25_ug_m3(self) -> float | None:
-        if self.data[5] == 0xFFFF:
-            return None
-        return round(int(self.data[5]) * 0.1, 1)
-
-    @property
-    def pm4_ug_m3(self) -> float | None:
-        if self.data[6] == 0xFFFF:
-            return None
-        return round(int(self.data[6]) * 0.1, 1)
-
-    @property
-    def pm10_ug_m3(self) -> float | None:
-        if self.data[7] == 0xFFFF:
-            return None
-        return round(int(self.data[7]) * 0.1, 1)
-
-    @property
-    def co2_ppm(self) -> int | None:
-        if self.data[8] == 0xFFFF:
-            return None
-        return int(self.data[8])
-
-    @property
-    def voc_index(self) -> int | None:
-        # VOC is 9 bits: 8 bits in data[9], LSB in bit 6 of flags
-        val = int(self.data[9]) << 1
-        if self.flags & 64:  # bit 6 of flags
-            val |= 1
-        if val == 0x1FF:
-            return None
-        return int(val)
-
-    @property
-    def nox_index(self) -> int | None:
-        # NOX is 9 bits: 8 bits in data[10], LSB in bit 7 of flags
-        val = int(self.data[10]) << 1
-        if self.flags & 128:  # bit 7 of flags
-            val |= 1
-        if val == 0x1FF:
-            return None
-        return int(val)
-
-    @property
-    def luminosity_lux(self) -> float | None:
-        lumi_bytes = bytes(self.data[11])
-        if lumi_bytes == b"\xff\xff\xff":
-            return None
-        lumi_val = int.from_bytes(lumi_bytes, byteorder="big")
-        return round(lumi_val * 0.01, 2)
-
-    @property
-    def measurement_sequence_number(self) -> int | None:
-        seq_bytes = bytes(self.data[13])
-        if seq_bytes == b"\xff\xff\xff":
-            return None
-        return int.from_bytes(seq_bytes, byteorder="big")
-
-    @property
-    def calibration_in_progress(self) -> bool:
+from ruuvitag_ble.schema import CompiledFormat, Field, FormatSpec, SchemaDecoder
+
+# Format breakdown (40 bytes total):
+# 0: header(1B), 1-2: temp(2B), 3-4: humidity(2B), 5-6: pressure(2B),
+# 7-8: pm1(2B), 9-10: pm25(2B), 11-12: pm4(2B), 13-14: pm10(2B),
+# 15-16: co2(2B), 17: voc(1B), 18: nox(1B), 19-21: lumi(3B),
+# 22-24: reserved(3B), 25-27: seq(3B), 28: flags(1B), 29-33: reserved(5B), 34-39: mac(6B)
+DFE1_SPEC = FormatSpec(
+    data_format=0xE1,
+    name="E1",
+    fields=(
+        Field(
+            name="temperature_celsius",
+            offset=1,
+            width=2,
+            signed=True,
+            sentinel=-32768,
+            scale=0.005,
+            digits=3,
+        ),
+        Field(
+            name="humidity_percentage",
+            offset=3,
+            width=2,
+            sentinel=65535,
+            scale=0.0025,
+            digits=3,
+        ),
+        Field(
+            name="pressure_hpa",
+            offset=5,
+            width=2,
+            sentinel=0xFFFF,
+            bias=50000,
+            divisor=100,
+            digits=2,
+        ),
+        Field(
+            name="pm1_ug_m3",
+            offset=7,
+            width=2,
+            sentinel=0xFFFF,
+            scale=0.1,
+            digits=1,
+        ),
+        Field(
+            name="pm25_ug_m3",
+            offset=9,
+            width=2,
+            sentinel=0xFFFF,
+            scale=0.1,
+            digits=1,
+        ),
+        Field(
+            name="pm4_ug_m3",
+            offset=11,
+            width=2,
+            sentinel=0xFFFF,
+            scale=0.1,
+            digits=1,
+        ),
+        Field(
+            name="pm10_ug_m3",
+            offset=13,
+            width=2,
+            sentinel=0xFFFF,
+            scale=0.1,
+            digits=1,
+        ),
+        Field(name="co2_ppm", offset=15, width=2, sentinel=0xFFFF),
+        # VOC and NOx are 9 bits, the LSBs of which are in bits 6 and 7 of flags.
+        Field(name="voc_index", offset=17, lsb_flag=(28, 6), sentinel=0x1FF),
+        Field(name="nox_index", offset=18, lsb_flag=(28, 7), sentinel=0x1FF),
+        Field(
+            name="luminosity_lux",
+            offset=19,
+            width=3,
+            sentinel=0xFFFFFF,
+            scale=0.01,
+            digits=2,
+        ),
+        Field(
+            name="measurement_sequence_number",
+            offset=25,
+            width=3,
+            sentinel=0xFFFFFF,
+        ),
+        Field(name="flags", offset=28),
         # Bit 0 of flags indicates calibration status
-        return bool(self.flags & 1)
-
-    @property
-    def mac(self) -> str:
-        return ":".join(f"{b:02X}" for b in bytes(self.data[16]))
+        Field(
+            name="calibration_in_progress",
+            offset=28,
+            bits=1,
+            convert=bool,
+            encode=bool,
+        ),
+        Field(name="mac", offset=34, width=6, kind="mac"),
+    ),
+)
+
+
+class DataFormatE1Decoder(SchemaDecoder):
+    format = CompiledFormat(DFE1_SPEC)
+    data_struct = struct.Struct(">BhHHHHHHHBB3s3s3sB5s6s")
+
+    temperature_celsius: float | None
+    humidity_percentage: float | None
+    pressure_hpa: float | None
+    pm1_ug_m3: float | None
+    pm25_ug_m3: float | None
+    pm4_ug_m3: float | None
+    pm10_ug_m3: float | None
+    co2_ppm: int | None
+    voc_index: int | None
+    nox_index: int | None
+    luminosity_lux: float | None
+    measurement_sequence_number: int | None
+    flags: int
+    calibration_in_progress: bool
+    mac: str
@@ -0,0 +1,69 @@
+"""
+Encoders for the supported data formats.
+
+The inverse of the decoders, generated from the same field tables: each
+`encode_*` function takes decoded values as keyword arguments (named as the
+attributes of the corresponding decoder) and returns the manufacturer data
+that decodes to them.  Useful for test fixtures, simulators and load tests.
+
+Values are rounded to the resolution of the data format; missing values are
+encoded as "not available" where the data format has a way to say so.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+from ruuvitag_ble.df3_decoder import DataFormat3Decoder
+from ruuvitag_ble.df5_decoder import DataFormat5Decoder
+from ruuvitag_ble.df6_decoder import DataFormat6Decoder
+from ruuvitag_ble.dfe1_decoder import DataFormatE1Decoder
+from ruuvitag_ble.schema import CompiledFormat
+
+ENCODERS = {
+    0x03: DataFormat3Decoder.format,
+    0x05: DataFormat5Decoder.format,
+    0x06: DataFormat6Decoder.format,
+    0xE1: DataFormatE1Decoder.format,
+}
+
+
+def encode(data_format: int, **values: Any) -> bytes:
+    """Encode `values` as manufacturer data of `data_format` (e.g. 0x05)."""
+    try:
+        fmt = ENCODERS[data_format]
+    except KeyError:
+        raise ValueError(f"Data format not supported: {data_format:#04x}") from None
+    return _encode(fmt, values)
+
+
+def encode_df3(**values: Any) -> bytes:
+    """Encode `values` as Data Format 3 manufacturer data."""
+    return _encode(DataFormat3Decoder.format, values)
+
+
+def encode_df5(**values: Any) -> bytes:
+    """Encode `values` as Data Format 5 manufacturer data."""
+    return _encode(DataFormat5Decoder.format, values)
+
+
+def encode_df6(**values: Any) -> bytes:
+    """Encode `values` as Data Format 6 manufacturer data."""
+    return _encode(DataFormat6Decoder.format, values)
+
+
+def encode_e1(**values: Any) -> bytes:
+    """Encode `values` as Data Format E1 manufacturer data."""
+    return _encode(DataFormatE1Decoder.format, values)
+
+
+def _encode(fmt: CompiledFormat, values: dict[str, Any]) -> bytes:
+    # Accept everything a decoder has (including computed values and the MAC
+    # of data format 3, which are ignored), but catch typos.
+    unknown = values.keys() - fmt.names - {"mac"}
+    if unknown:
+        raise TypeError(
+            f"Unknown values for data format {fmt.spec.name}: "
+            f"{', '.join(sorted(unknown))}",
+        )
+    return fmt.encode(values)
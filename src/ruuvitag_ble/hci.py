@@ -0,0 +1,146 @@
+"""
+Decoding of Ruuvi advertisements straight from raw HCI events.
+
+`decode_hci_event` takes the bytes of an HCI LE Advertising Report or
+LE Extended Advertising Report event (extended reports are needed for the
+40-byte Data Format E1) and walks its reports and their AD structures in
+place, decoding the Ruuvi manufacturer data of each report without building
+a `BluetoothServiceInfo` or copying the payload.
+"""
+
+from __future__ import annotations
+
+import mmap
+from collections.abc import Iterator
+from typing import NamedTuple
+
+from ruuvitag_ble.core import Decoder, decode
+
+RUUVI_COMPANY_ID = 0x0499
+
+Buffer = bytes | bytearray | memoryview | mmap.mmap
+
+H4_EVENT = 0x04
+HCI_LE_META_EVENT = 0x3E
+HCI_LE_ADVERTISING_REPORT = 0x02
+HCI_LE_EXTENDED_ADVERTISING_REPORT = 0x0D
+
+_AD_MANUFACTURER_SPECIFIC_DATA = 0xFF
+
+
+class HciReading(NamedTuple):
+    address: str  # Advertiser address, e.g. "C7:1F:D4:FE:63:82"
+    rssi: int | None
+    decoded: Decoder
+
+
+def decode_hci_event(event: Buffer, start: int = 0) -> list[HciReading]:
+    """Decode the Ruuvi advertisements in an HCI LE advertising report event.
+
+    `event` holds the event starting at `start` with its event code
+    (i.e. without the H4 packet type byte).  Other events, and reports
+    without decodable Ruuvi manufacturer data, yield no readings.
+    """
+    view = memoryview(event) if isinstance(event, bytes | bytearray) else event
+    readings = []
+    for address, rssi, data_start, data_end in ruuvi_advertisements(view, start):
+        decoded = decode(view[data_start:data_end])
+        if decoded is not None:
+            readings.append(HciReading(address, rssi, decoded))
+    return readings
+
+
+def ruuvi_advertisements(
+    buffer: Buffer,
+    start: int = 0,
+    end: int | None = None,
+) -> Iterator[tuple[str, int | None, int, int]]:
+    """Walk an HCI LE (Extended) Advertising Report event in `buffer[start:end]`.
+
+    Yields the address, RSSI and the start and end offsets in `buffer` of the
+    Ruuvi manufacturer data (without the company ID) of each report that has
+    it.  Malformed trailing reports are ignored.
+    """
+    if end is None:
+        end = len(buffer)
+    if end - start < 4 or buffer[start] != HCI_LE_META_EVENT:
+        return
+    end = min(end, start + 2 + buffer[start + 1])
+    subevent = buffer[start + 2]
+    count = buffer[start + 3]
+    position = start + 4
+    if subevent == HCI_LE_ADVERTISING_REPORT:
+        # Event type, address type, address, data length, data, RSSI
+        for _ in range(count):
+            data_start = position + 9
+            if data_start > end:
+                return
+            data_end = data_start + buffer[position + 8]
+            if data_end + 1 > end:
+                return
+            span = manufacturer_data_span(buffer, data_start, data_end)
+            if span is not None:
+                yield (
+                    address_at(buffer, position + 2),
+                    _rssi(buffer[data_end]),
+                    *span,
+                )
+            position = data_end + 1
+    elif subevent == HCI_LE_EXTENDED_ADVERTISING_REPORT:
+        # Event type (2), address type, address, primary PHY, secondary PHY,
+        # advertising SID, TX power, RSSI, periodic advertising interval (2),
+        # direct address type, direct address, data length, data
+        for _ in range(count):
+            data_start = position + 24
+            if data_start > end:
+                return
+            data_end = data_start + buffer[position + 23]
+            if data_end > end:
+                return
+            span = manufacturer_data_span(buffer, data_start, data_end)
+            if span is not None:
+                yield (
+                    address_at(buffer, position + 3),
+                    _rssi(buffer[position + 13]),
+                    *span,
+                )
+            position = data_end
+
+
+def manufacturer_data_span(
+    buffer: Buffer,
+    start: int,
+    end: int,
+    company_id: int = RUUVI_COMPANY_ID,
+) -> tuple[int, int] | None:
+    """Find the manufacturer data of `company_id` in AD structures.
+
+    Returns the start and end offsets in `buffer` of the data following the
+    company ID, or None if the AD structures in `buffer[start:end]` have none.
+    """
+    position = start
+    while position < end:
+        length = buffer[position]
+        if length == 0:
+            return None
+        element_end = position + 1 + length
+        if element_end > end:
+            return None
+        if (
+            length >= 3
+            and buffer[position + 1] == _AD_MANUFACTURER_SPECIFIC_DATA
+            and buffer[position + 2] | buffer[position + 3] << 8 == company_id
+        ):
+            return position + 4, element_end
+        position = element_end
+    return None
+
+
+def address_at(buffer: Buffer, offset: int) -> str:
+    """Format the little-endian Bluetooth device address at `offset`."""
+    return bytes(buffer[offset : offset + 6])[::-1].hex(":").upper()
+
+
+def _rssi(value: int) -> int | None:
+    """Decode an HCI RSSI, where 127 means "not available"."""
+    return None if value == 127 else value - 256 if value > 127 else value
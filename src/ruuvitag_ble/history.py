@@ -0,0 +1,314 @@
+"""
+Compact in-memory history of recent readings, per tag and sensor.
+
+A `HistoryStore` keeps one bounded ring buffer per (tag, sensor key),
+backed by `array` storage: values as 32-bit floats (`array('f')`) and
+timestamps as 32-bit unsigned offsets from the store's epoch, in units of
+`resolution` seconds (`array('I')`).  That is 8 bytes per reading, where a
+(timestamp, value) tuple of Python floats in a list takes over 100.  The
+storage of a buffer doubles as it fills up, to its capacity, so series of
+rarely reported sensors (or of tags seen only briefly) stay small.
+
+Appending is O(1) (amortized, with downsampling), and iterating over a time
+range finds its start with a binary search and walks the buffer in place,
+without copying.  When a buffer is full, its oldest reading is evicted; with
+a `downsample` function, its oldest `downsample_interval` worth of readings
+is instead reduced to a single reading in a second, coarser ring buffer, so
+older history is kept at lower resolution rather than dropped.
+"""
+
+from __future__ import annotations
+
+from array import array
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from sensor_state_data import SensorUpdate
+
+    from ruuvitag_ble.parser import DecodedAdvertisement
+
+# Reduces the values of one downsampling interval to a single value,
+# e.g. `statistics.fmean`, `min` or `max`.
+Downsample = Callable[[Sequence[float]], float]
+
+_MAX_OFFSET = 0xFFFFFFFF
+
+
+class RingBuffer:
+    """Bounded ring buffer of (offset, value) pairs.
+
+    Offsets are unsigned 32-bit integers, expected in non-decreasing order;
+    values are stored as 32-bit floats.  Storage is allocated as entries are
+    appended, doubling up to `capacity`; appending to a buffer of `capacity`
+    entries evicts its oldest entry.
+    """
+
+    __slots__ = ("_offsets", "_size", "_start", "_values", "capacity")
+
+    def __init__(self, capacity: int) -> None:
+        if capacity < 1:
+            raise ValueError(f"capacity must be at least 1, got {capacity}")
+        self.capacity = capacity
+        self._offsets = array("I")
+        self._values = array("f")
+        self._start = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the storage allocated for the buffer, in bytes."""
+        return (self._offsets.itemsize + self._values.itemsize) * len(self._offsets)
+
+    @property
+    def first_offset(self) -> int | None:
+        """Offset of the oldest entry, or None if the buffer is empty."""
+        return self._offsets[self._start] if self._size else None
+
+    @property
+    def last_offset(self) -> int | None:
+        """Offset of the newest entry, or None if the buffer is empty."""
+        if not self._size:
+            return None
+        return self._offsets[(self._start + self._size - 1) % len(self._offsets)]
+
+    def append(self, offset: int, value: float) -> None:
+        """Append an entry."""
+        allocated = len(self._offsets)
+        if self._size == allocated < self.capacity:
+            allocated = self._grow()
+        if self._size < allocated:
+            index = (self._start + self._size) % allocated
+            self._size += 1
+        else:
+            index = self._start
+            self._start = (index + 1) % allocated
+        self._offsets[index] = offset
+        self._values[index] = value
+
+    def pop_before(self, offset: int) -> list[float]:
+        """Remove the entries with offsets before `offset`, returning their values."""
+        count = self._bisect(offset)
+        values = self._values
+        allocated = len(values)
+        first = self._start
+        popped = [values[(first + i) % allocated] for i in range(count)]
+        if count:
+            self._start = (first + count) % allocated
+            self._size -= count
+        return popped
+
+    def range(
+        self,
+        start: int = 0,
+        end: int = _MAX_OFFSET + 1,
+    ) -> Iterator[tuple[int, float]]:
+        """Yield the entries with offsets in [start, end), oldest first."""
+        offsets = self._offsets
+        values = self._values
+        allocated = len(offsets)
+        first = self._start
+        for i in range(self._bisect(start), self._size):
+            index = (first + i) % allocated
+            offset = offsets[index]
+            if offset >= end:
+                return
+            yield offset, values[index]
+
+    def _bisect(self, offset: int) -> int:
+        """Return the position (from the oldest) of the first entry at `offset` or later."""
+        offsets = self._offsets
+        allocated = len(offsets)
+        first = self._start
+        low, high = 0, self._size
+        while low < high:
+            middle = (low + high) // 2
+            if offsets[(first + middle) % allocated] < offset:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _grow(self) -> int:
+        """Double the storage (up to `capacity`), oldest entry first."""
+        start = self._start
+        size = min(max(2 * self._size, 8), self.capacity)
+        padding = size - self._size
+        self._offsets = (
+            self._offsets[start:] + self._offsets[:start] + array("I", [0]) * padding
+        )
+        self._values = (
+            self._values[start:] + self._values[:start] + array("f", [0.0]) * padding
+        )
+        self._start = 0
+        return size
+
+
+class _Series:
+    __slots__ = ("coarse", "recent")
+
+    def __init__(self, capacity: int, coarse_capacity: int | None) -> None:
+        self.recent = RingBuffer(capacity)
+        self.coarse = RingBuffer(coarse_capacity) if coarse_capacity else None
+
+
+class HistoryStore:
+    """Recent readings of a fleet of tags, in compact ring buffers.
+
+    Each (tag, sensor key) series keeps the last `capacity` readings (by
+    default, a day of readings every 10 seconds), allocating storage for
+    them as they come in.  With `downsample`, a full
+    series makes room by reducing its oldest `downsample_interval` seconds of
+    readings to one, stored in a second buffer of `coarse_capacity` readings
+    (by default, a week of 5 minute intervals); `capacity` should then span
+    several intervals.
+
+    Timestamps are stored as offsets from `epoch` (by default, the first
+    timestamp added) in units of `resolution` seconds, so they can span
+    2**32 * `resolution` seconds (about 13.6 years by default).  Readings
+    before the epoch or older than the newest reading of their series are
+    ignored, and so are readings without a numeric value.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 8640,
+        *,
+        downsample: Downsample | None = None,
+        downsample_interval: float = 300.0,
+        coarse_capacity: int = 2016,
+        resolution: float = 0.1,
+        epoch: float | None = None,
+    ) -> None:
+        if capacity < 1:
+            raise ValueError(f"capacity must be at least 1, got {capacity}")
+        if downsample is not None and downsample_interval < resolution:
+            raise ValueError(
+                f"downsample_interval must be at least resolution ({resolution}), "
+                f"got {downsample_interval}",
+            )
+        self.capacity = capacity
+        self.downsample = downsample
+        self.coarse_capacity = coarse_capacity if downsample is not None else None
+        self.resolution = resolution
+        self.epoch = epoch
+        self._bucket_size = round(downsample_interval / resolution)
+        self._series: dict[tuple[str, str], _Series] = {}
+
+    def add(self, tag: str, key: str, timestamp: float, value: float) -> bool:
+        """Add a reading, returning whether it was stored."""
+        epoch = self.epoch
+        if epoch is None:
+            epoch = self.epoch = timestamp
+        offset = int((timestamp - epoch) / self.resolution)
+        if offset < 0:
+            return False
+        if offset > _MAX_OFFSET:
+            raise OverflowError(f"Timestamp too far past the epoch: {timestamp}")
+        series = self._series.get((tag, key))
+        if series is None:
+            series = self._series[tag, key] = _Series(
+                self.capacity,
+                self.coarse_capacity,
+            )
+        recent = series.recent
+        last_offset = recent.last_offset
+        if last_offset is not None and offset < last_offset:
+            return False
+        if series.coarse is not None and len(recent) == recent.capacity:
+            self._downsample_oldest(series)
+        recent.append(offset, value)
+        return True
+
+    def add_readings(
+        self,
+        tag: str,
+        readings: Iterable[tuple[str, Any]],
+        timestamp: float,
+    ) -> None:
+        """Add the (sensor key, value) pairs of `readings`, skipping non-numbers."""
+        for key, value in readings:
+            if isinstance(value, int | float):
+                self.add(tag, key, timestamp, value)
+
+    def add_advertisement(
+        self,
+        tag: str,
+        decoded: DecodedAdvertisement,
+        timestamp: float,
+    ) -> None:
+        """Add the sensor values of a decoded advertisement."""
+        self.add_readings(
+            tag,
+            ((key, value) for key, _, _, value in decoded.sensors),
+            timestamp,
+        )
+
+    def add_update(self, tag: str, update: SensorUpdate, timestamp: float) -> None:
+        """Add the sensor values of a parser update."""
+        self.add_readings(
+            tag,
+            (
+                (device_key.key, sensor_value.native_value)
+                for device_key, sensor_value in update.entity_values.items()
+            ),
+            timestamp,
+        )
+
+    def tags(self) -> set[str]:
+        """Return the tags with history."""
+        return {tag for tag, _ in self._series}
+
+    def keys(self, tag: str) -> list[str]:
+        """Return the sensor keys with history for `tag`."""
+        return [key for series_tag, key in self._series if series_tag == tag]
+
+    def readings(
+        self,
+        tag: str,
+        key: str,
+        start: float | None = None,
+        end: float | None = None,
+    ) -> Iterator[tuple[float, float]]:
+        """Yield the (timestamp, value) readings of a series in [start, end).
+
+        Downsampled readings (timestamped with the start of their interval)
+        come first, then the recent ones, all oldest first.
+        """
+        series = self._series.get((tag, key))
+        if series is None or self.epoch is None:
+            return
+        epoch = self.epoch
+        resolution = self.resolution
+        low = 0 if start is None else max(int((start - epoch) / resolution), 0)
+        if end is None:
+            high = _MAX_OFFSET + 1
+        else:
+            high = max(int((end - epoch) / resolution), 0)
+        if series.coarse is not None:
+            for offset, value in series.coarse.range(low, high):
+                yield epoch + offset * resolution, value
+        for offset, value in series.recent.range(low, high):
+            yield epoch + offset * resolution, value
+
+    def memory_usage(self, tag: str | None = None) -> int:
+        """Return the bytes of buffer storage allocated, for `tag` or overall."""
+        total = 0
+        for (series_tag, _), series in self._series.items():
+            if tag is None or series_tag == tag:
+                total += series.recent.nbytes
+                if series.coarse is not None:
+                    total += series.coarse.nbytes
+        return total
+
+    def _downsample_oldest(self, series: _Series) -> None:
+        assert self.downsample is not None
+        assert series.coarse is not None
+        oldest = series.recent.first_offset
+        assert oldest is not None
+        bucket = oldest - oldest % self._bucket_size
+        values = series.recent.pop_before(bucket + self._bucket_size)
+        series.coarse.append(bucket, self.downsample(values))
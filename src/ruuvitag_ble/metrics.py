@@ -0,0 +1,78 @@
+"""
+Decode metrics for the parser.
+
+`DecodeMetrics` counts the advertisements a parser processed, by outcome
+(decoded, per data format; no Ruuvi manufacturer data; unsupported data
+format; malformed payload; other decoder error), and keeps a histogram of
+the time each update (decoding plus sensor updates) took, in fixed buckets
+so recording a sample costs a single bisection.  `snapshot()` returns all
+of it as a plain dict, for export to a metrics system.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from typing import Any
+
+# Upper bounds (inclusive) of the latency buckets, in microseconds.
+# Updates slower than the last bound fall into an extra overflow bucket.
+LATENCY_BUCKETS_US: tuple[int, ...] = (
+    5,
+    10,
+    20,
+    50,
+    100,
+    200,
+    500,
+    1000,
+    2000,
+    5000,
+)
+_BUCKETS_NS = tuple(bound * 1000 for bound in LATENCY_BUCKETS_US)
+
+
+class DecodeMetrics:
+    """Counters and a latency histogram of the updates of a parser.
+
+    `decoded` maps data format bytes to the number of advertisements of that
+    format decoded (including ones served from the cache, and duplicates
+    that didn't update sensors).  `missing` counts advertisements without
+    Ruuvi manufacturer data, `unsupported` ones of unknown data formats,
+    `malformed` ones that failed to decode (e.g. too short) and `errors`
+    unexpected exceptions raised while processing them.
+    """
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        """Zero all counters and the histogram."""
+        self.decoded: dict[int, int] = {}
+        self.missing = 0
+        self.unsupported = 0
+        self.malformed = 0
+        self.errors = 0
+        self.latency_counts = [0] * (len(LATENCY_BUCKETS_US) + 1)
+        self.latency_total_ns = 0
+
+    def observe_latency(self, elapsed_ns: int) -> None:
+        """Record an update that took `elapsed_ns` nanoseconds."""
+        self.latency_counts[bisect_left(_BUCKETS_NS, elapsed_ns)] += 1
+        self.latency_total_ns += elapsed_ns
+
+    def snapshot(self) -> dict[str, Any]:
+        """Return the current values as a dict of plain values."""
+        count = sum(self.latency_counts)
+        return {
+            "decoded": dict(self.decoded),
+            "missing": self.missing,
+            "unsupported": self.unsupported,
+            "malformed": self.malformed,
+            "errors": self.errors,
+            "latency": {
+                "buckets_us": list(LATENCY_BUCKETS_US),
+                "counts": list(self.latency_counts),
+                "count": count,
+                "mean_us": self.latency_total_ns / count / 1000 if count else None,
+            },
+        }
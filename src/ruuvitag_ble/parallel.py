@@ -0,0 +1,147 @@
+"""
+Decoding in a pool of threads, with tags partitioned across workers.
+
+The concurrency model of the package is:
+
+* Decoding is stateless.  The decoder classes, `core.decode`, `peek`,
+  `parser.decode_advertisement`, `batch.decode_batch` and the IAQS functions
+  only read tables built at import time (or, for the IAQS lookup table,
+  swapped in as a whole), so any thread may call them at any time, with or
+  without the GIL.
+* Everything that keeps state between advertisements is not synchronized,
+  and must be used by one thread at a time: `RuuvitagBluetoothDeviceData`
+  (its decode cache, deduplication and delta state, and the update being
+  built), `FleetRegistry`, `CoverageTracker`, `WindowAggregator`, the
+  history and the archive and series readers and writers.
+
+`ThreadPoolIngestor` builds on that: advertisements are partitioned by tag,
+each partition has a `FleetRegistry` of its own, and a partition's
+advertisements are processed by one thread at a time, in order.  Per-tag
+state is thus never shared between threads, and the only locks taken are
+one per partition and batch.  With the GIL, threads only help while others
+wait (e.g. on I/O); on free-threaded builds of CPython (3.13t and later),
+the partitions are decoded in parallel, one per core.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import zlib
+from collections.abc import Callable, Iterable
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+
+from home_assistant_bluetooth import BluetoothServiceInfo
+from sensor_state_data import SensorUpdate
+
+from ruuvitag_ble.parser import RuuvitagBluetoothDeviceData, copy_update
+from ruuvitag_ble.registry import FleetRegistry
+
+
+class ThreadPoolIngestor:
+    """Update per-tag parsers from batches of advertisements, in threads.
+
+    Tags are spread over `partitions` partitions (by default, four per
+    worker, to even out load) by the key `FleetRegistry` identifies them
+    by, and each partition's share of a batch is processed in `executor`,
+    or in a pool of `workers` threads (by default, one per CPU).  The
+    `factory`, `max_tags` and `ttl` options are those of each partition's
+    registry, except that `max_tags` is shared out evenly between them.
+
+    Batches may be submitted from several threads at once.  The updates of a
+    tag are applied in the order of each batch, and batches submitted by
+    one thread in the order they were submitted.
+    """
+
+    def __init__(
+        self,
+        *,
+        executor: Executor | None = None,
+        workers: int | None = None,
+        partitions: int | None = None,
+        factory: Callable[[], RuuvitagBluetoothDeviceData] | None = None,
+        max_tags: int | None = 10000,
+        ttl: float | None = 3600.0,
+    ) -> None:
+        if partitions is None:
+            partitions = 4 * (workers or os.cpu_count() or 1)
+        if partitions < 1:
+            raise ValueError(f"partitions must be at least 1, got {partitions}")
+        if max_tags is not None and max_tags < 1:
+            raise ValueError(f"max_tags must be at least 1, got {max_tags}")
+        self._own_executor = executor is None
+        self.executor = ThreadPoolExecutor(workers) if executor is None else executor
+        self.registries = [
+            FleetRegistry(
+                factory=factory,
+                max_tags=-(-max_tags // partitions) if max_tags is not None else None,
+                ttl=ttl,
+            )
+            for _ in range(partitions)
+        ]
+        self._locks = [threading.Lock() for _ in range(partitions)]
+
+    def __len__(self) -> int:
+        return sum(len(registry) for registry in self.registries)
+
+    def __enter__(self) -> ThreadPoolIngestor:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def partition(self, service_info: BluetoothServiceInfo) -> int:
+        """Return the index of the partition an advertisement belongs to."""
+        key = self.registries[0].key(service_info) or service_info.address
+        return zlib.crc32(key.encode()) % len(self.registries)
+
+    def update_many(
+        self,
+        service_infos: Iterable[BluetoothServiceInfo],
+    ) -> list[SensorUpdate | None]:
+        """Update the parsers of the advertising tags, returning the updates.
+
+        Updates are returned in input order, with None for advertisements
+        without decodable Ruuvi data; each is a copy, unaffected by later
+        updates of its tag.
+        """
+        service_infos = list(service_infos)
+        shares: list[list[int]] = [[] for _ in self.registries]
+        for index, service_info in enumerate(service_infos):
+            shares[self.partition(service_info)].append(index)
+        futures: list[tuple[list[int], Future[list[SensorUpdate | None]]]] = [
+            (
+                indices,
+                self.executor.submit(
+                    self._update_partition,
+                    partition,
+                    [service_infos[index] for index in indices],
+                ),
+            )
+            for partition, indices in enumerate(shares)
+            if indices
+        ]
+        updates: list[SensorUpdate | None] = [None] * len(service_infos)
+        for indices, future in futures:
+            for index, update in zip(indices, future.result()):
+                updates[index] = update
+        return updates
+
+    def close(self) -> None:
+        """Shut down the thread pool, if the ingestor created it."""
+        if self._own_executor:
+            self.executor.shutdown()
+
+    def _update_partition(
+        self,
+        partition: int,
+        service_infos: list[BluetoothServiceInfo],
+    ) -> list[SensorUpdate | None]:
+        update = self.registries[partition].update
+        with self._locks[partition]:
+            # Copied, as the next update of a tag would change its last one
+            updates: list[SensorUpdate | None] = []
+            for service_info in service_infos:
+                result = update(service_info)
+                updates.append(None if result is None else copy_update(result))
+            return updates
@@ -1,212 +1,496 @@
 from __future__ import annotations
 
+import dataclasses
 import logging
 import math
+from collections import OrderedDict
+from collections.abc import Callable, Mapping
+from operator import attrgetter
+from time import monotonic, perf_counter_ns
+from typing import Any, NamedTuple
 
 from bluetooth_data_tools import short_address
 from bluetooth_sensor_state_data import BluetoothData
 from home_assistant_bluetooth import BluetoothServiceInfo
-from sensor_state_data import DeviceClass, Units
+from sensor_state_data import (
+    DeviceClass,
+    DeviceKey,
+    SensorDescription,
+    SensorUpdate,
+    SensorValue,
+    Units,
+)
 
-from ruuvitag_ble.df3_decoder import DataFormat3Decoder
-from ruuvitag_ble.df5_decoder import DataFormat5Decoder
-from ruuvitag_ble.df6_decoder import DataFormat6Decoder
-from ruuvitag_ble.dfe1_decoder import DataFormatE1Decoder
-from ruuvitag_ble.iaqs import calculate_iaqs
+from ruuvitag_ble.core import (
+    DataFormat3Decoder,
+    DataFormat5Decoder,
+    DataFormat6Decoder,
+    DataFormatE1Decoder,
+    Payload,
+    calculate_iaqs,
+    decoder_classes,
+)
+from ruuvitag_ble.metrics import DecodeMetrics
+from ruuvitag_ble.sequence import SEQUENCE_BITS, sequence_delta
 
 _LOGGER = logging.getLogger(__name__)
 
-decoder_classes: dict[
-    int,
-    type[
-        DataFormat3Decoder
-        | DataFormat5Decoder
-        | DataFormat6Decoder
-        | DataFormatE1Decoder
-    ],
-] = {
-    0x03: DataFormat3Decoder,
-    0x05: DataFormat5Decoder,
-    0x06: DataFormat6Decoder,
-    0xE1: DataFormatE1Decoder,
-}
+# (key, device class, unit, value) for a single `update_sensor` call.
+SensorReading = tuple[str, DeviceClass, Units | None, float | int | None]
+UpdatePlanEntry = tuple[str, DeviceClass, Units | None, Callable[[Any], Any]]
+
+
+class DecodedAdvertisement(NamedTuple):
+    data_format: int
+    mac: str | None
+    measurement_sequence_number: int | None
+    sensors: tuple[SensorReading, ...]
 
 
 class RuuvitagBluetoothDeviceData(BluetoothData):
     """Data for Ruuvitag BLE sensors."""
 
+    def __init__(
+        self,
+        *,
+        cache_size: int = 16,
+        deduplicate: bool = False,
+        dedup_window: float = 5.0,
+        prefer_strongest_rssi: bool = False,
+        delta_updates: bool = False,
+        deadbands: Mapping[str, float] | None = None,
+        max_silence: float | None = 300.0,
+        metrics: bool = False,
+    ) -> None:
+        """Initialize the parser.
+
+        `cache_size` bounds the number of decoded advertisements kept around,
+        keyed by their raw manufacturer data, so repeated advertisements
+        (tags repeat each measurement several times, and several scanners may
+        hear the same advertisement) need not be decoded again.
+        Set it to 0 to disable caching.
+
+        With `deduplicate`, advertisements repeating the last seen measurement
+        sequence number of a tag don't update sensors again, and neither do
+        ones older than it (if within `dedup_window` seconds of it, since older
+        sequence numbers after that likely mean the tag was reset).
+        With `prefer_strongest_rssi`, a repeat is still processed if it was
+        received with a stronger signal within `dedup_window` seconds, so the
+        signal strength reported is that of the strongest copy.
+
+        With `delta_updates`, each update only carries the sensors whose value
+        changed since it was last emitted: by more than `deadbands[key]` (e.g.
+        `{"temperature": 0.05, "pressure": 0.1}`) for numeric values, or at all
+        for sensors without a deadband.  Sensors silent for `max_silence`
+        seconds are emitted again even if unchanged (None disables this).
+
+        With `metrics`, `metrics` is a `DecodeMetrics` counting the
+        advertisements processed by outcome and timing each update.  Without
+        it, `metrics` is None and updates aren't instrumented at all.
+        """
+        super().__init__()
+        self.cache_size = cache_size
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._cache: OrderedDict[bytes, DecodedAdvertisement] = OrderedDict()
+        self.deduplicate = deduplicate
+        self.dedup_window = dedup_window
+        self.prefer_strongest_rssi = prefer_strongest_rssi
+        # Tag MAC/address -> (sequence number, monotonic time, RSSI)
+        self._last_measurements: dict[str, tuple[int, float, int]] = {}
+        self._skip_signal_strength = False
+        self._device_metadata_key: tuple[str, str | None] | None = None
+        self.delta_updates = delta_updates
+        self.deadbands: dict[str, float] = dict(deadbands or {})
+        self.max_silence = max_silence
+        # Sensor -> (last emitted value, monotonic time it was emitted)
+        self._last_emitted: dict[DeviceKey, tuple[Any, float]] = {}
+        self.metrics = DecodeMetrics() if metrics else None
+        if metrics:
+            # Shadow `update` on this instance only, so parsers without
+            # metrics run the plain method.
+            self.update = self._measured_update  # type: ignore[method-assign]
+
+    def _measured_update(self, data: BluetoothServiceInfo) -> SensorUpdate:
+        metrics = self.metrics
+        assert metrics is not None
+        start = perf_counter_ns()
+        try:
+            update = super().update(data)
+        except (ValueError, IndexError):
+            metrics.malformed += 1
+            raise
+        except Exception:
+            metrics.errors += 1
+            raise
+        finally:
+            metrics.observe_latency(perf_counter_ns() - start)
+        raw_data = data.manufacturer_data.get(0x0499)
+        if raw_data is None:
+            metrics.missing += 1
+        elif (data_format := raw_data[0]) in decoder_classes:
+            decoded = metrics.decoded
+            decoded[data_format] = decoded.get(data_format, 0) + 1
+        else:
+            metrics.unsupported += 1
+        return update
+
     def _start_update(self, service_info: BluetoothServiceInfo) -> None:
+        self._skip_signal_strength = False
         try:
             raw_data = service_info.manufacturer_data[0x0499]
         except (KeyError, IndexError):
             _LOGGER.debug("Manufacturer ID 0x0499 not found in data")
             return None
 
-        data_format = raw_data[0]
-        try:
-            decoder_cls = decoder_classes[data_format]
-        except KeyError:
-            _LOGGER.debug("Data format not supported: %s", raw_data)
+        decoded = self._decode_cached(raw_data)
+        if decoded is None:
             return
-        decoder = decoder_cls(raw_data)
-
-        # Compute short identifier from MAC address
-        # (preferring the MAC address the tag broadcasts).
-        identifier = short_address(decoder.mac or service_info.address)
-        dev_type = "Ruuvi Air" if "Air" in str(service_info.name) else "RuuviTag"
-        self.set_device_type(dev_type)
-        self.set_device_manufacturer("Ruuvi Innovations Ltd.")
-        self.set_device_name(f"{dev_type} {identifier}")
-
-        self.update_sensor(
-            key=DeviceClass.TEMPERATURE,
-            device_class=DeviceClass.TEMPERATURE,
-            native_unit_of_measurement=Units.TEMP_CELSIUS,
-            native_value=decoder.temperature_celsius,
-        )
-        self.update_sensor(
-            key=DeviceClass.HUMIDITY,
-            device_class=DeviceClass.HUMIDITY,
-            native_unit_of_measurement=Units.PERCENTAGE,
-            native_value=decoder.humidity_percentage,
-        )
-        self.update_sensor(
-            key=DeviceClass.PRESSURE,
-            device_class=DeviceClass.PRESSURE,
-            native_unit_of_measurement=Units.PRESSURE_HPA,
-            native_value=decoder.pressure_hpa,
-        )
-        if hasattr(decoder, "battery_voltage_mv"):
-            self.update_sensor(
-                key=DeviceClass.VOLTAGE,
-                device_class=DeviceClass.VOLTAGE,
-                native_unit_of_measurement=Units.ELECTRIC_POTENTIAL_MILLIVOLT,
-                native_value=decoder.battery_voltage_mv,
-            )
 
-        if hasattr(decoder, "movement_counter"):
-            self.update_sensor(
-                key="movement_counter",
-                device_class=DeviceClass.COUNT,
-                native_unit_of_measurement=None,
-                native_value=decoder.movement_counter,
-            )
+        address = decoded.mac or service_info.address
+        if self.deduplicate and self._is_duplicate(
+            address,
+            decoded,
+            service_info.rssi,
+        ):
+            return
 
-        if hasattr(decoder, "pm1_ug_m3"):
-            self.update_sensor(
-                key=DeviceClass.PM1,
-                device_class=DeviceClass.PM1,
-                native_unit_of_measurement=Units.CONCENTRATION_MICROGRAMS_PER_CUBIC_METER,
-                native_value=decoder.pm1_ug_m3,
-            )
+        device_metadata_key = (address, service_info.name)
+        if device_metadata_key != self._device_metadata_key:
+            # Compute short identifier from MAC address
+            # (preferring the MAC address the tag broadcasts).
+            identifier = short_address(address)
+            dev_type = "Ruuvi Air" if "Air" in str(service_info.name) else "RuuviTag"
+            self.set_device_type(dev_type)
+            self.set_device_manufacturer("Ruuvi Innovations Ltd.")
+            self.set_device_name(f"{dev_type} {identifier}")
+            self._device_metadata_key = device_metadata_key
 
-        if hasattr(decoder, "pm25_ug_m3"):
-            self.update_sensor(
-                key=DeviceClass.PM25,
-                device_class=DeviceClass.PM25,
-                native_unit_of_measurement=Units.CONCENTRATION_MICROGRAMS_PER_CUBIC_METER,
-                native_value=decoder.pm25_ug_m3,
-            )
+        update_sensor = self.update_sensor
+        for key, device_class, unit, value in decoded.sensors:
+            update_sensor(key, unit, value, device_class)
 
-        if hasattr(decoder, "pm4_ug_m3"):
-            self.update_sensor(
-                key=DeviceClass.PM4,
-                device_class=DeviceClass.PM4,
-                native_unit_of_measurement=Units.CONCENTRATION_MICROGRAMS_PER_CUBIC_METER,
-                native_value=decoder.pm4_ug_m3,
-            )
+    def _decode_cached(self, raw_data: bytes) -> DecodedAdvertisement | None:
+        cache = self._cache
+        decoded = cache.get(raw_data)
+        if decoded is not None:
+            self.cache_hits += 1
+            cache.move_to_end(raw_data)
+            return decoded
+        decoded = decode_advertisement(raw_data)
+        if decoded is not None and self.cache_size > 0:
+            self.cache_misses += 1
+            cache[raw_data] = decoded
+            if len(cache) > self.cache_size:
+                cache.popitem(last=False)
+        return decoded
 
-        if hasattr(decoder, "pm10_ug_m3"):
-            self.update_sensor(
-                key=DeviceClass.PM10,
-                device_class=DeviceClass.PM10,
-                native_unit_of_measurement=Units.CONCENTRATION_MICROGRAMS_PER_CUBIC_METER,
-                native_value=decoder.pm10_ug_m3,
+    def _is_duplicate(
+        self,
+        address: str,
+        decoded: DecodedAdvertisement,
+        rssi: int,
+    ) -> bool:
+        sequence = decoded.measurement_sequence_number
+        if sequence is None:
+            return False
+        now = monotonic()
+        last = self._last_measurements.get(address)
+        if last is not None:
+            last_sequence, last_time, last_rssi = last
+            delta = sequence_delta(
+                sequence,
+                last_sequence,
+                SEQUENCE_BITS[decoded.data_format],
             )
+            within_window = now - last_time < self.dedup_window
+            if delta == 0:
+                if not (
+                    self.prefer_strongest_rssi and within_window and rssi > last_rssi
+                ):
+                    self._skip_signal_strength = self.prefer_strongest_rssi
+                    return True
+                now = last_time  # Keep the window anchored to the first copy
+            elif delta < 0 and within_window:
+                self._skip_signal_strength = self.prefer_strongest_rssi
+                return True
+        self._last_measurements[address] = (sequence, now, rssi)
+        return False
 
-        if hasattr(decoder, "co2_ppm"):
-            self.update_sensor(
-                key=DeviceClass.CO2,
-                device_class=DeviceClass.CO2,
-                native_unit_of_measurement=Units.CONCENTRATION_PARTS_PER_MILLION,
-                native_value=decoder.co2_ppm,
-            )
+    def update_signal_strength(self, native_value: float) -> None:
+        if self._skip_signal_strength:
+            # This was a weaker copy of an already-processed measurement.
+            return
+        super().update_signal_strength(native_value)
 
-        if hasattr(decoder, "voc_index"):
-            self.update_sensor(
-                key="voc_index",
-                device_class=DeviceClass.VOLATILE_ORGANIC_COMPOUNDS,
-                native_unit_of_measurement=None,
-                native_value=decoder.voc_index,
-            )
+    def _finish_update(self) -> SensorUpdate:
+        if not self.delta_updates:
+            return super()._finish_update()
+        values: dict[DeviceKey, SensorValue] = {}
+        descriptions: dict[DeviceKey, SensorDescription] = {}
+        now = monotonic()
+        last_emitted = self._last_emitted
+        deadbands = self.deadbands
+        max_silence = self.max_silence
+        pending_descriptions = self._sensor_descriptions_updates
+        for device_key, sensor_value in self._sensor_values_updates.items():
+            value = sensor_value.native_value
+            last = last_emitted.get(device_key)
+            if last is not None:
+                last_value, last_time = last
+                if max_silence is None or now - last_time < max_silence:
+                    if isinstance(value, int | float) and isinstance(
+                        last_value,
+                        int | float,
+                    ):
+                        deadband = deadbands.get(device_key.key, 0)
+                        changed = abs(value - last_value) > deadband
+                    else:
+                        changed = value != last_value
+                    if not changed:
+                        continue
+            last_emitted[device_key] = (value, now)
+            values[device_key] = sensor_value
+            if (description := pending_descriptions.get(device_key)) is not None:
+                descriptions[device_key] = description
+        # The returned update refers to these dicts, so replace them rather
+        # than clearing them, and start each update afresh.
+        self._sensor_values_updates = values
+        self._sensor_descriptions_updates = descriptions
+        update = super()._finish_update()
+        self._sensor_values_updates = {}
+        self._sensor_descriptions_updates = {}
+        return update
 
-        if hasattr(decoder, "nox_index"):
-            self.update_sensor(
-                key="nox_index",
-                device_class=DeviceClass.NITROGEN_MONOXIDE,
-                native_unit_of_measurement=None,
-                native_value=decoder.nox_index,
-            )
+    def clear_cache(self) -> None:
+        """Forget all cached decoded advertisements."""
+        self._cache.clear()
 
-        if hasattr(decoder, "luminosity_lux"):
-            self.update_sensor(
-                key=DeviceClass.ILLUMINANCE,
-                device_class=DeviceClass.ILLUMINANCE,
-                native_unit_of_measurement=Units.LIGHT_LUX,
-                native_value=decoder.luminosity_lux,
-            )
 
-        if hasattr(decoder, "acceleration_vector_mg"):
-            self._update_acceleration(decoder)  # type: ignore[arg-type]
+def copy_update(update: SensorUpdate) -> SensorUpdate:
+    """Return a copy of a parser update that later updates leave unchanged.
 
-        if hasattr(decoder, "co2_ppm") and hasattr(decoder, "pm25_ug_m3"):
-            self.update_sensor(
-                key="iaqs",
-                device_class=DeviceClass.AQI,
-                native_unit_of_measurement=None,
-                native_value=calculate_iaqs(decoder.co2_ppm, decoder.pm25_ug_m3),
-            )
+    Without `delta_updates`, the update returned by the parser holds the
+    parser's own dicts of pending values, which the next update refills.
+    """
+    return dataclasses.replace(
+        update,
+        devices=dict(update.devices),
+        entity_descriptions=dict(update.entity_descriptions),
+        entity_values=dict(update.entity_values),
+        binary_entity_descriptions=dict(update.binary_entity_descriptions),
+        binary_entity_values=dict(update.binary_entity_values),
+        events=dict(update.events),
+    )
 
-    def _update_acceleration(
-        self,
-        decoder: DataFormat3Decoder | DataFormat5Decoder,
-    ) -> None:
-        try:
-            acc_x_mg, acc_y_mg, acc_z_mg = decoder.acceleration_vector_mg
-            # Typing ignores are used here, as the arising TypeErrors
-            # will be caught at runtime (IOW, we don't waste runtime doing
-            # unlikely type checks).
-            acc_x_mss = round(acc_x_mg * 0.00980665, 2)  # type: ignore
-            acc_y_mss = round(acc_y_mg * 0.00980665, 2)  # type: ignore
-            acc_z_mss = round(acc_z_mg * 0.00980665, 2)  # type: ignore
-            acc_total_mss = round(
-                math.hypot(acc_x_mss, acc_y_mss, acc_z_mss),
-                2,
-            )
-        except TypeError:  # When any of the acceleration values are None (unlikely)
-            acc_total_mss = acc_x_mss = acc_y_mss = acc_z_mss = None  # type: ignore
-
-        self.update_sensor(
-            key="acceleration_x",
-            device_class=DeviceClass.ACCELERATION,
-            native_unit_of_measurement=Units.ACCELERATION_METERS_PER_SQUARE_SECOND,
-            native_value=acc_x_mss,
-        )
-        self.update_sensor(
-            key="acceleration_y",
-            device_class=DeviceClass.ACCELERATION,
-            native_unit_of_measurement=Units.ACCELERATION_METERS_PER_SQUARE_SECOND,
-            native_value=acc_y_mss,
-        )
-        self.update_sensor(
-            key="acceleration_z",
-            device_class=DeviceClass.ACCELERATION,
-            native_unit_of_measurement=Units.ACCELERATION_METERS_PER_SQUARE_SECOND,
-            native_value=acc_z_mss,
-        )
-        self.update_sensor(
-            key="acceleration_total",
-            device_class=DeviceClass.ACCELERATION,
-            native_unit_of_measurement=Units.ACCELERATION_METERS_PER_SQUARE_SECOND,
-            native_value=acc_total_mss,
-        )
+
+def decode_advertisement(raw_data: Payload) -> DecodedAdvertisement | None:
+    """Decode Ruuvi manufacturer data into the sensor values to update.
+
+    Returns None for unsupported data formats.
+    """
+    data_format = raw_data[0]
+    try:
+        decoder_cls = decoder_classes[data_format]
+    except KeyError:
+        _LOGGER.debug("Data format not supported: %s", raw_data)
+        return None
+    decoder = decoder_cls(raw_data)
+    return DecodedAdvertisement(
+        data_format=data_format,
+        mac=decoder.mac,
+        measurement_sequence_number=getattr(
+            decoder,
+            "measurement_sequence_number",
+            None,
+        ),
+        sensors=tuple(
+            [
+                (key, device_class, unit, getter(decoder))
+                for key, device_class, unit, getter in update_plans[decoder_cls]
+            ],
+        ),
+    )
+
+
+def _acceleration_mss(axis: int) -> Callable[[Any], float | None]:
+    def getter(decoder: DataFormat3Decoder | DataFormat5Decoder) -> float | None:
+        acc_mg = decoder.acceleration_vector_mg[axis]
+        if acc_mg is None:  # All components are None if any of them are invalid
+            return None
+        return round(acc_mg * 0.00980665, 2)
+
+    return getter
+
+
+_acceleration_x_mss = _acceleration_mss(0)
+_acceleration_y_mss = _acceleration_mss(1)
+_acceleration_z_mss = _acceleration_mss(2)
+
+
+def _acceleration_total_mss(
+    decoder: DataFormat3Decoder | DataFormat5Decoder,
+) -> float | None:
+    acc_x_mss = _acceleration_x_mss(decoder)
+    if acc_x_mss is None:
+        return None
+    return round(
+        math.hypot(
+            acc_x_mss,
+            _acceleration_y_mss(decoder),  # type: ignore[arg-type]
+            _acceleration_z_mss(decoder),  # type: ignore[arg-type]
+        ),
+        2,
+    )
+
+
+def _iaqs(decoder: DataFormat6Decoder | DataFormatE1Decoder) -> int | None:
+    return calculate_iaqs(decoder.co2_ppm, decoder.pm25_ug_m3)
+
+
+# Sensors updated for decoders that have all of the listed attributes,
+# as (attributes, key, device class, unit, value getter).
+_SENSORS: tuple[
+    tuple[tuple[str, ...], str, DeviceClass, Units | None, Callable[[Any], Any]],
+    ...,
+] = (
+    (
+        ("temperature_celsius",),
+        DeviceClass.TEMPERATURE,
+        DeviceClass.TEMPERATURE,
+        Units.TEMP_CELSIUS,
+        attrgetter("temperature_celsius"),
+    ),
+    (
+        ("humidity_percentage",),
+        DeviceClass.HUMIDITY,
+        DeviceClass.HUMIDITY,
+        Units.PERCENTAGE,
+        attrgetter("humidity_percentage"),
+    ),
+    (
+        ("pressure_hpa",),
+        DeviceClass.PRESSURE,
+        DeviceClass.PRESSURE,
+        Units.PRESSURE_HPA,
+        attrgetter("pressure_hpa"),
+    ),
+    (
+        ("battery_voltage_mv",),
+        DeviceClass.VOLTAGE,
+        DeviceClass.VOLTAGE,
+        Units.ELECTRIC_POTENTIAL_MILLIVOLT,
+        attrgetter("battery_voltage_mv"),
+    ),
+    (
+        ("movement_counter",),
+        "movement_counter",
+        DeviceClass.COUNT,
+        None,
+        attrgetter("movement_counter"),
+    ),
+    (
+        ("pm1_ug_m3",),
+        DeviceClass.PM1,
+        DeviceClass.PM1,
+        Units.CONCENTRATION_MICROGRAMS_PER_CUBIC_METER,
+        attrgetter("pm1_ug_m3"),
+    ),
+    (
+        ("pm25_ug_m3",),
+        DeviceClass.PM25,
+        DeviceClass.PM25,
+        Units.CONCENTRATION_MICROGRAMS_PER_CUBIC_METER,
+        attrgetter("pm25_ug_m3"),
+    ),
+    (
+        ("pm4_ug_m3",),
+        DeviceClass.PM4,
+        DeviceClass.PM4,
+        Units.CONCENTRATION_MICROGRAMS_PER_CUBIC_METER,
+        attrgetter("pm4_ug_m3"),
+    ),
+    (
+        ("pm10_ug_m3",),
+        DeviceClass.PM10,
+        DeviceClass.PM10,
+        Units.CONCENTRATION_MICROGRAMS_PER_CUBIC_METER,
+        attrgetter("pm10_ug_m3"),
+    ),
+    (
+        ("co2_ppm",),
+        DeviceClass.CO2,
+        DeviceClass.CO2,
+        Units.CONCENTRATION_PARTS_PER_MILLION,
+        attrgetter("co2_ppm"),
+    ),
+    (
+        ("voc_index",),
+        "voc_index",
+        DeviceClass.VOLATILE_ORGANIC_COMPOUNDS,
+        None,
+        attrgetter("voc_index"),
+    ),
+    (
+        ("nox_index",),
+        "nox_index",
+        DeviceClass.NITROGEN_MONOXIDE,
+        None,
+        attrgetter("nox_index"),
+    ),
+    (
+        ("luminosity_lux",),
+        DeviceClass.ILLUMINANCE,
+        DeviceClass.ILLUMINANCE,
+        Units.LIGHT_LUX,
+        attrgetter("luminosity_lux"),
+    ),
+    (
+        ("acceleration_vector_mg",),
+        "acceleration_x",
+        DeviceClass.ACCELERATION,
+        Units.ACCELERATION_METERS_PER_SQUARE_SECOND,
+        _acceleration_x_mss,
+    ),
+    (
+        ("acceleration_vector_mg",),
+        "acceleration_y",
+        DeviceClass.ACCELERATION,
+        Units.ACCELERATION_METERS_PER_SQUARE_SECOND,
+        _acceleration_y_mss,
+    ),
+    (
+        ("acceleration_vector_mg",),
+        "acceleration_z",
+        DeviceClass.ACCELERATION,
+        Units.ACCELERATION_METERS_PER_SQUARE_SECOND,
+        _acceleration_z_mss,
+    ),
+    (
+        ("acceleration_vector_mg",),
+        "acceleration_total",
+        DeviceClass.ACCELERATION,
+        Units.ACCELERATION_METERS_PER_SQUARE_SECOND,
+        _acceleration_total_mss,
+    ),
+    (
+        ("co2_ppm", "pm25_ug_m3"),
+        "iaqs",
+        DeviceClass.AQI,
+        None,
+        _iaqs,
+    ),
+)
+
+# The (key, device class, unit, value getter) of the sensors to update
+# for each decoder class, precomputed so updates need not probe decoders.
+update_plans: dict[type, tuple[UpdatePlanEntry, ...]] = {
+    decoder_cls: tuple(
+        [
+            (key, device_class, unit, getter)
+            for attributes, key, device_class, unit, getter in _SENSORS
+            if set(attributes) <= set(decoder_cls.format.names)
+        ],
+    )
+    for decoder_cls in decoder_classes.values()
+}
@@ -0,0 +1,79 @@
+"""
+Header-only reading of Ruuvi manufacturer data.
+
+`peek` reads just the data format, MAC address and measurement sequence
+number of an advertisement at their fixed offsets (e.g. bytes 18-23 for the
+MAC of Data Format 5, 17-19 for the MAC suffix of Data Format 6 and 34-39
+for Data Format E1), without unpacking the rest or building a decoder.
+That is all a router needs to tell which tag an advertisement is from and
+whether it is new; `PeekedAdvertisement.decode()` decodes the whole payload
+later, if the values turn out to be needed.
+"""
+
+from __future__ import annotations
+
+from typing import NamedTuple
+
+from ruuvitag_ble.core import Decoder, Payload, decoder_classes
+
+
+class PeekedAdvertisement(NamedTuple):
+    data_format: int
+    mac: str | None  # None for data format 3
+    measurement_sequence_number: int | None
+    raw_data: Payload
+
+    def decode(self) -> Decoder:
+        """Decode the whole payload."""
+        return decoder_classes[self.data_format](self.raw_data)
+
+
+# (payload size, MAC span, sequence number span, sequence number sentinel)
+_Header = tuple[int, tuple[int, int] | None, tuple[int, int] | None, int | None]
+
+
+def _header(decoder_cls: type[Decoder]) -> _Header:
+    """Find the header fields in the field table of a decoder."""
+    fields = {f.name: f for f in decoder_cls.format.spec.fields}
+    mac = fields.get("mac")
+    sequence = fields.get("measurement_sequence_number")
+    return (
+        decoder_cls.format.size,
+        (mac.offset, mac.offset + mac.width) if mac is not None else None,
+        (sequence.offset, sequence.offset + sequence.width)
+        if sequence is not None
+        else None,
+        sequence.sentinel if sequence is not None else None,
+    )
+
+
+_HEADERS: dict[int, _Header] = {
+    data_format: _header(decoder_cls)
+    for data_format, decoder_cls in decoder_classes.items()
+}
+
+
+def peek(raw_data: Payload) -> PeekedAdvertisement | None:
+    """Read the header fields of Ruuvi manufacturer data.
+
+    Returns None for unsupported data formats and payloads too short to
+    decode.  With a `memoryview`, nothing but the MAC address is copied.
+    """
+    if not raw_data:
+        return None
+    data_format = raw_data[0]
+    header = _HEADERS.get(data_format)
+    if header is None:
+        return None
+    size, mac_span, sequence_span, sentinel = header
+    if len(raw_data) < size:
+        return None
+    mac = None
+    if mac_span is not None:
+        mac = bytes(raw_data[mac_span[0] : mac_span[1]]).hex(":").upper()
+    sequence = None
+    if sequence_span is not None:
+        sequence = int.from_bytes(raw_data[sequence_span[0] : sequence_span[1]], "big")
+        if sequence == sentinel:
+            sequence = None
+    return PeekedAdvertisement(data_format, mac, sequence, raw_data)
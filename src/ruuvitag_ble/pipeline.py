@@ -0,0 +1,164 @@
+"""
+asyncio ingestion of advertisements through a bounded queue.
+
+An `IngestionPipeline` consumes an async iterable of advertisements in a
+background task, decodes them and hands the results to the caller through a
+bounded `asyncio.Queue`.  When the caller falls behind and the queue is full,
+the configured overflow policy either drops the oldest queued result, drops
+the newest one, or blocks consumption of the source until there is room.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import AsyncIterable, AsyncIterator
+from typing import Literal
+
+from home_assistant_bluetooth import BluetoothServiceInfo
+from sensor_state_data import SensorUpdate
+
+from ruuvitag_ble.core import Payload
+from ruuvitag_ble.parser import (
+    DecodedAdvertisement,
+    RuuvitagBluetoothDeviceData,
+    copy_update,
+    decode_advertisement,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+OverflowPolicy = Literal["drop_oldest", "drop_newest", "block"]
+# A service info is decoded into a sensor update by the pipeline's parser,
+# raw 0x0499 manufacturer data into a decoded advertisement.
+Advertisement = BluetoothServiceInfo | Payload
+Reading = SensorUpdate | DecodedAdvertisement
+
+
+class _EndOfStream:
+    def __init__(self, error: BaseException | None = None) -> None:
+        self.error = error
+
+
+class IngestionPipeline:
+    """Decode advertisements from `source` in the background.
+
+    Iterate over the pipeline (with `async for`) to get the decoded readings,
+    in the order the advertisements were received.  Iteration ends when the
+    source is exhausted, and raises the exception the source raised, if any.
+
+    `queue_size` bounds the number of decoded readings waiting to be consumed;
+    `overflow` says what to do when that many are waiting:
+
+    * "drop_oldest": discard the oldest waiting reading, so consumers see
+      the most recent data (the default);
+    * "drop_newest": discard the reading just decoded;
+    * "block": stop reading from the source until there is room.
+
+    `received`, `dropped` and `errors` count advertisements read from the
+    source, readings dropped on overflow and advertisements that failed to
+    decode; `depth` is the number of readings waiting and `max_depth` the
+    highest that has been.
+    """
+
+    def __init__(
+        self,
+        source: AsyncIterable[Advertisement],
+        *,
+        parser: RuuvitagBluetoothDeviceData | None = None,
+        queue_size: int = 256,
+        overflow: OverflowPolicy = "drop_oldest",
+    ) -> None:
+        if queue_size < 1:
+            raise ValueError(f"queue_size must be at least 1, got {queue_size}")
+        if overflow not in ("drop_oldest", "drop_newest", "block"):
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        self.source = source
+        self.parser = parser if parser is not None else RuuvitagBluetoothDeviceData()
+        self.overflow = overflow
+        self.received = 0
+        self.dropped = 0
+        self.errors = 0
+        self.max_depth = 0
+        self._queue: asyncio.Queue[Reading | _EndOfStream] = asyncio.Queue(
+            queue_size,
+        )
+        self._task: asyncio.Task[None] | None = None
+        self._finished = False
+
+    @property
+    def depth(self) -> int:
+        """Number of decoded readings waiting to be consumed."""
+        return self._queue.qsize()
+
+    def start(self) -> None:
+        """Start consuming the source (done on first iteration otherwise)."""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._consume())
+
+    async def aclose(self) -> None:
+        """Stop consuming the source."""
+        self._finished = True
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def __aenter__(self) -> IngestionPipeline:
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.aclose()
+
+    def __aiter__(self) -> AsyncIterator[Reading]:
+        return self
+
+    async def __anext__(self) -> Reading:
+        if self._finished:
+            raise StopAsyncIteration
+        self.start()
+        item = await self._queue.get()
+        if isinstance(item, _EndOfStream):
+            self._finished = True
+            if item.error is not None:
+                raise item.error
+            raise StopAsyncIteration
+        return item
+
+    async def _consume(self) -> None:
+        queue = self._queue
+        end = _EndOfStream()
+        try:
+            async for advertisement in self.source:
+                self.received += 1
+                reading = self._decode(advertisement)
+                if reading is None:
+                    continue
+                if queue.full() and self.overflow != "block":
+                    self.dropped += 1
+                    if self.overflow == "drop_newest":
+                        continue
+                    queue.get_nowait()
+                if isinstance(reading, SensorUpdate):
+                    # The parser refills the dicts of its last update
+                    reading = copy_update(reading)
+                await queue.put(reading)
+                if (depth := queue.qsize()) > self.max_depth:
+                    self.max_depth = depth
+        except Exception as err:
+            end = _EndOfStream(err)
+        # Always deliver the end of the stream, waiting for room if need be.
+        await queue.put(end)
+
+    def _decode(self, advertisement: Advertisement) -> Reading | None:
+        try:
+            if isinstance(advertisement, bytes | bytearray | memoryview):
+                return decode_advertisement(advertisement)
+            return self.parser.update(advertisement)
+        except (ValueError, IndexError) as err:
+            self.errors += 1
+            _LOGGER.debug("Failed to decode %s: %s", advertisement, err)
+            return None
@@ -0,0 +1,202 @@
+"""
+Registry of per-tag parser state for a fleet of tags.
+
+A `FleetRegistry` routes each advertisement to the parser of the tag it is
+from, creating the parser on the tag's first advertisement.  Tags are keyed
+by the part of their MAC address all data formats broadcast, read with
+`peek` so routing needs no decoding: a Ruuvi Air broadcasts only the last
+three bytes of its MAC address in Data Format 6, but all six in E1, and
+both must reach the same parser.  Idle tags are evicted: the least recently seen ones
+beyond `max_tags`, and those not seen for `ttl` seconds, so the memory of a
+long-running collector stays flat however many tags pass by.
+"""
+
+from __future__ import annotations
+
+import enum
+import sys
+import types
+from collections import OrderedDict
+from collections.abc import Callable, Iterator
+from time import monotonic
+from typing import Any
+
+from home_assistant_bluetooth import BluetoothServiceInfo
+from sensor_state_data import SensorUpdate
+
+from ruuvitag_ble.parser import RuuvitagBluetoothDeviceData
+from ruuvitag_ble.peek import peek
+
+
+class _Tag:
+    __slots__ = ("last_seen", "parser")
+
+    def __init__(self, parser: RuuvitagBluetoothDeviceData, last_seen: float) -> None:
+        self.parser = parser
+        self.last_seen = last_seen
+
+
+class FleetRegistry:
+    """Per-tag parsers, created on demand and evicted when idle.
+
+    `factory` creates the parser of a new tag (by default, one with a small
+    decode cache, since each parser only sees the advertisements of its tag).
+    At most `max_tags` tags are kept (None for no limit), and tags not seen
+    for `ttl` seconds (None to keep them) are evicted on the next update or
+    `evict_idle` call.  `created` and `evicted` count the tags that came and
+    went, and `rejected` the advertisements without decodable Ruuvi data.
+    """
+
+    def __init__(
+        self,
+        *,
+        factory: Callable[[], RuuvitagBluetoothDeviceData] | None = None,
+        max_tags: int | None = 10000,
+        ttl: float | None = 3600.0,
+    ) -> None:
+        if max_tags is not None and max_tags < 1:
+            raise ValueError(f"max_tags must be at least 1, got {max_tags}")
+        self.factory = factory or _default_factory
+        self.max_tags = max_tags
+        self.ttl = ttl
+        self.created = 0
+        self.evicted = 0
+        self.rejected = 0
+        # Least recently seen first
+        self._tags: OrderedDict[str, _Tag] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._tags)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._tags
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._tags)
+
+    def get(self, key: str) -> RuuvitagBluetoothDeviceData | None:
+        """Return the parser of a tag, if it is registered."""
+        tag = self._tags.get(key)
+        return tag.parser if tag is not None else None
+
+    def key(self, service_info: BluetoothServiceInfo) -> str | None:
+        """Return the key of the tag an advertisement is from.
+
+        That is the advertiser's address if the broadcast MAC address ends
+        like it (or none is broadcast, as in Data Format 3), and else the
+        last three bytes of the broadcast MAC address, e.g. "4C:88:4F".
+        Returns None for advertisements without decodable Ruuvi data.
+        """
+        raw_data = service_info.manufacturer_data.get(0x0499)
+        if raw_data is None:
+            return None
+        header = peek(raw_data)
+        if header is None:
+            return None
+        address = service_info.address
+        if header.mac is None:
+            return address
+        suffix = header.mac[-8:]
+        return address if address.upper().endswith(suffix) else suffix
+
+    def update(self, service_info: BluetoothServiceInfo) -> SensorUpdate | None:
+        """Update the parser of the advertising tag, returning its update.
+
+        Returns None (and creates no state) for advertisements without
+        decodable Ruuvi data.
+        """
+        key = self.key(service_info)
+        if key is None:
+            self.rejected += 1
+            return None
+        now = monotonic()
+        tags = self._tags
+        tag = tags.get(key)
+        if tag is None:
+            tag = tags[key] = _Tag(self.factory(), now)
+            self.created += 1
+            if self.max_tags is not None and len(tags) > self.max_tags:
+                tags.popitem(last=False)
+                self.evicted += 1
+        else:
+            tag.last_seen = now
+            tags.move_to_end(key)
+        if self.ttl is not None:
+            self._evict_before(now - self.ttl)
+        return tag.parser.update(service_info)
+
+    def evict_idle(self, now: float | None = None) -> int:
+        """Evict the tags not seen for `ttl` seconds, returning how many."""
+        if self.ttl is None:
+            return 0
+        if now is None:
+            now = monotonic()
+        return self._evict_before(now - self.ttl)
+
+    def remove(self, key: str) -> None:
+        """Forget a tag."""
+        del self._tags[key]
+
+    def memory_usage(self, key: str | None = None) -> int:
+        """Estimate the bytes of state kept for a tag, or for all of them.
+
+        Counts the objects reachable from the tag's parser, except classes,
+        functions, modules and enum members.  Other objects shared between
+        parsers (such as sensor key strings) are counted for each of them,
+        so this is an upper bound.
+        """
+        if key is not None:
+            return _deep_sizeof(self._tags[key])
+        return sum(_deep_sizeof(tag) for tag in self._tags.values())
+
+    def _evict_before(self, deadline: float) -> int:
+        tags = self._tags
+        evicted = 0
+        # Tags are ordered by last_seen, so the idle ones are at the front.
+        while tags:
+            tag = next(iter(tags.values()))
+            if tag.last_seen >= deadline:
+                break
+            tags.popitem(last=False)
+            evicted += 1
+        self.evicted += evicted
+        return evicted
+
+
+def _default_factory() -> RuuvitagBluetoothDeviceData:
+    return RuuvitagBluetoothDeviceData(cache_size=2)
+
+
+_SHARED_TYPES = (
+    type,
+    types.ModuleType,
+    types.FunctionType,
+    types.BuiltinFunctionType,
+    types.MethodType,
+    enum.Enum,
+)
+
+
+def _deep_sizeof(root: object) -> int:
+    seen: set[int] = set()
+    stack: list[Any] = [root]
+    total = 0
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, _SHARED_TYPES):
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, list | tuple | set | frozenset):
+            stack.extend(obj)
+        else:
+            if hasattr(obj, "__dict__"):
+                stack.append(vars(obj))
+            for cls in type(obj).__mro__:
+                for name in getattr(cls, "__slots__", ()):
+                    if hasattr(obj, name):
+                        stack.append(getattr(obj, name))
+    return total
@@ -0,0 +1,208 @@
+"""
+Parallel replay of recorded advertisements, sharded by tag.
+
+Meant for backfills of large archives of raw advertisements: records are
+spread over a number of shards by tag address, and each shard is decoded
+chunk by chunk in a process pool (with `decode_batch`, so results travel
+back as compact columns).  All records of a tag are in the same shard, and
+a shard has at most one chunk in flight at a time, so per-tag order and
+state (the last measurement sequence number, for deduplication) carry over
+from chunk to chunk exactly as in a sequential replay.
+"""
+
+from __future__ import annotations
+
+import heapq
+import os
+import zlib
+from collections.abc import Iterable, Iterator
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    wait,
+)
+from operator import itemgetter
+from typing import Any, NamedTuple
+
+from ruuvitag_ble.batch import COLUMNS as BATCH_COLUMNS
+from ruuvitag_ble.batch import FORMATS, decode_batch
+from ruuvitag_ble.iaqs import calculate_iaqs_batch
+from ruuvitag_ble.sequence import SEQUENCE_BITS, sequence_delta
+
+
+class ReplayRecord(NamedTuple):
+    timestamp: float
+    address: str  # Tag MAC address, used for sharding and deduplication
+    raw_data: bytes  # Manufacturer data for 0x0499
+
+
+COLUMNS: tuple[str, ...] = ("timestamp", "address", *BATCH_COLUMNS, "iaqs")
+
+Columns = dict[str, list[Any]]
+# (tag address, data format) -> (sequence number, timestamp) of its last
+# measurement; Ruuvi Air counts Data Formats 6 and E1 separately.
+ShardState = dict[tuple[str, int], tuple[int, float]]
+
+
+def replay_chunks(
+    records: Iterable[ReplayRecord],
+    *,
+    executor: Executor | None = None,
+    workers: int | None = None,
+    shards: int | None = None,
+    chunk_size: int = 5000,
+    deduplicate: bool = False,
+    dedup_window: float = 5.0,
+) -> Iterator[Columns]:
+    """Decode `records` in parallel, yielding results in chunks as they complete.
+
+    Each chunk holds the decoded records of one shard as columns (see
+    `COLUMNS`), in input order.  Chunks of different shards may complete in
+    any order.  Records that can't be decoded are left out, and so are, with
+    `deduplicate`, records repeating a tag's last measurement sequence number
+    or carrying an older one within `dedup_window` seconds of it.
+
+    Work is done in `executor`, or in a process pool of `workers` processes
+    (by default, one per CPU), split over `shards` shards (by default, four
+    per worker, to even out load).
+    """
+    if shards is None:
+        shards = 4 * (workers or os.cpu_count() or 1)
+    own_executor = executor is None
+    pool = ProcessPoolExecutor(workers) if executor is None else executor
+    buffers: list[list[ReplayRecord]] = [[] for _ in range(shards)]
+    states: list[ShardState] = [{} for _ in range(shards)]
+    in_flight: dict[Future[tuple[Columns, ShardState]], int] = {}
+    busy = [False] * shards
+
+    def submit(shard: int) -> None:
+        future = pool.submit(
+            _replay_chunk,
+            buffers[shard],
+            states[shard],
+            deduplicate,
+            dedup_window,
+        )
+        in_flight[future] = shard
+        buffers[shard] = []
+        busy[shard] = True
+
+    def collect() -> Iterator[Columns]:
+        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+        for future in done:
+            shard = in_flight.pop(future)
+            columns, states[shard] = future.result()
+            busy[shard] = False
+            if columns["timestamp"]:
+                yield columns
+
+    try:
+        for record in records:
+            shard = zlib.crc32(record[1].encode()) % shards
+            buffer = buffers[shard]
+            buffer.append(record)
+            if len(buffer) >= chunk_size:
+                while busy[shard]:
+                    yield from collect()
+                submit(shard)
+        while True:
+            for shard, buffer in enumerate(buffers):
+                if buffer and not busy[shard]:
+                    submit(shard)
+            if not in_flight:
+                break
+            yield from collect()
+    finally:
+        if own_executor:
+            pool.shutdown(cancel_futures=True)
+
+
+def replay(
+    records: Iterable[ReplayRecord],
+    *,
+    executor: Executor | None = None,
+    workers: int | None = None,
+    shards: int | None = None,
+    chunk_size: int = 5000,
+    deduplicate: bool = False,
+    dedup_window: float = 5.0,
+) -> Columns:
+    """Decode `records` in parallel, returning the merged results as columns.
+
+    Takes the same options as `replay_chunks`.  The per-shard outputs are
+    merged by timestamp, so for records in timestamp order, the result is
+    in that order too.
+    """
+    chunks = replay_chunks(
+        records,
+        executor=executor,
+        workers=workers,
+        shards=shards,
+        chunk_size=chunk_size,
+        deduplicate=deduplicate,
+        dedup_window=dedup_window,
+    )
+    rows = heapq.merge(
+        *(zip(*(chunk[name] for name in COLUMNS)) for chunk in chunks),
+        key=itemgetter(0),
+    )
+    columns = list(zip(*rows)) or [()] * len(COLUMNS)
+    return {name: list(column) for name, column in zip(COLUMNS, columns)}
+
+
+def _replay_chunk(
+    records: list[ReplayRecord],
+    state: ShardState,
+    deduplicate: bool,
+    dedup_window: float,
+) -> tuple[Columns, ShardState]:
+    records = [
+        record
+        for record in records
+        if (raw_data := record[2])
+        and (fmt := FORMATS.get(raw_data[0])) is not None
+        and len(raw_data) >= fmt.size
+    ]
+    columns = decode_batch([record[2] for record in records])
+    columns["timestamp"] = [record[0] for record in records]
+    columns["address"] = [record[1] for record in records]
+    if deduplicate:
+        keep = [
+            _is_new(state, address, data_format, sequence, timestamp, dedup_window)
+            for address, data_format, sequence, timestamp in zip(
+                columns["address"],
+                columns["data_format"],
+                columns["measurement_sequence_number"],
+                columns["timestamp"],
+            )
+        ]
+        if not all(keep):
+            columns = {
+                name: [value for value, kept in zip(column, keep) if kept]
+                for name, column in columns.items()
+            }
+    columns["iaqs"] = calculate_iaqs_batch(columns["co2_ppm"], columns["pm25_ug_m3"])
+    return {name: columns[name] for name in COLUMNS}, state
+
+
+def _is_new(
+    state: ShardState,
+    address: str,
+    data_format: int,
+    sequence: int | None,
+    timestamp: float,
+    dedup_window: float,
+) -> bool:
+    if sequence is None:
+        return True
+    key = (address, data_format)
+    last = state.get(key)
+    if last is not None:
+        last_sequence, last_timestamp = last
+        delta = sequence_delta(sequence, last_sequence, SEQUENCE_BITS[data_format])
+        if delta == 0 or (delta < 0 and timestamp - last_timestamp < dedup_window):
+            return False
+    state[key] = (sequence, timestamp)
+    return True
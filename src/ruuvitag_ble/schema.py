@@ -0,0 +1,398 @@
+"""
+Declarative description of Ruuvi data formats, and generation of decoders from it.
+
+Each data format is described by a `FormatSpec`: a table of `Field`s saying
+where in the payload each value lives (byte offset, width, signedness, bit
+field, extra flag bits), which raw value means "not available", and how to
+scale and round the raw value.
+
+`CompiledFormat` turns a spec into straight-line decoding (and encoding) code,
+generated once at import time with the struct layout precompiled and all
+constants inlined, so every data format gets the same fast path.
+"""
+
+from __future__ import annotations
+
+import struct
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass
+from typing import Any, ClassVar, Literal
+
+# Payloads may be given as any of these (e.g. a memoryview into a larger
+# buffer, to decode without copying).
+Payload = bytes | bytearray | memoryview
+
+_STRUCT_CODES = {
+    (1, False): "B",
+    (1, True): "b",
+    (2, False): "H",
+    (2, True): "h",
+    (3, False): "BH",  # Read as high byte + low word, combined in code
+}
+
+
+@dataclass(frozen=True, kw_only=True)
+class Field:
+    """A value decoded from a fixed position in the payload.
+
+    The raw value is read from `width` big-endian bytes at `offset`
+    (or `count` consecutive such values, for vectors), then
+
+    * shifted right by `shift` and masked to `bits` bits, if given;
+    * extended with a least significant bit taken from bit `lsb_flag[1]`
+      of the byte at offset `lsb_flag[0]`, if given;
+    * decoded as None if equal to `sentinel` or greater than `maximum`
+      (for vectors, all components are None if any of them is);
+    * passed to `convert`, if given, or otherwise computed as
+      `(raw + bias) * scale / divisor + base`, rounded to `digits`.
+
+    Fields of kind "mac" are `width` bytes formatted as a MAC address.
+
+    For encoding, `encode` is the inverse of `convert`; it is also given
+    None for values that are not available.
+    """
+
+    name: str
+    offset: int
+    width: int = 1
+    signed: bool = False
+    count: int = 1
+    kind: Literal["int", "mac"] = "int"
+    shift: int = 0
+    bits: int | None = None
+    lsb_flag: tuple[int, int] | None = None
+    sentinel: int | None = None
+    maximum: int | None = None
+    bias: int = 0
+    scale: float | None = None
+    divisor: float | None = None
+    base: float = 0
+    digits: int | None = None
+    convert: Callable[[int], Any] | None = None
+    encode: Callable[[Any], int] | None = None
+
+
+@dataclass(frozen=True)
+class Computed:
+    """A value computed from other, already decoded values."""
+
+    name: str
+    function: Callable[..., Any]
+    inputs: tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class FormatSpec:
+    data_format: int
+    name: str
+    fields: tuple[Field, ...]
+    computed: tuple[Computed, ...] = ()
+
+
+class CompiledFormat:
+    """Decoding functions generated from a `FormatSpec`.
+
+    * `struct` unpacks the fixed-size head (`size` bytes) of a payload
+      into a row of raw values;
+    * `convert(row)` turns such a row into a tuple of decoded values,
+      in the order of `names`;
+    * `decode_into(obj, raw_data)` validates and decodes a payload,
+      storing the decoded values as attributes of `obj`;
+    * `encode(values)` is the inverse of decoding: it builds a payload
+      from a mapping of field names to values.  Missing (or None) values
+      are encoded as "not available" where the field has a way to say so,
+      and as zero otherwise; MAC addresses are required.  Computed values
+      are ignored.
+    """
+
+    def __init__(self, spec: FormatSpec) -> None:
+        self.spec = spec
+        self.data_format = spec.data_format
+        self.names: tuple[str, ...] = (
+            *(f.name for f in spec.fields),
+            *(c.name for c in spec.computed),
+        )
+        reads = _plan_reads(spec)
+        codes = []
+        variables = []
+        mac_variables = {f"f{f.offset}" for f in spec.fields if f.kind == "mac"}
+        position = 0
+        for offset in sorted(reads):
+            width, code = reads[offset]
+            if offset < position:
+                raise ValueError(f"Overlapping fields at offset {offset}")
+            if offset > position:
+                codes.append(f"{offset - position}x")
+            codes.append(code)
+            if code == "BH":
+                variables += [f"f{offset}_hi", f"f{offset}_lo"]
+            else:
+                variables.append(f"f{offset}")
+            position = offset + width
+        self.struct = struct.Struct(">" + "".join(codes))
+        self.size = self.struct.size
+
+        namespace: dict[str, Any] = {
+            "_unpack_from": self.struct.unpack_from,
+            "_pack": self.struct.pack,
+            "_struct_error": struct.error,
+            "_mac_bytes": _mac_bytes,
+            "_out_of_range": _out_of_range,
+        }
+        body = "".join(
+            f"    {line}\n" for f in spec.fields for line in _field_code(f, namespace)
+        )
+        for c in spec.computed:
+            namespace[f"_{c.name}"] = c.function
+            body += f"    {c.name} = _{c.name}({', '.join(c.inputs)})\n"
+        unpacked = ", ".join(variables)
+        encode_body = "".join(
+            f"    {variable} = {spec.data_format if variable == 'f0' else 0}\n"
+            for variable in variables
+            if variable not in mac_variables
+        ) + "".join(
+            f"    {line}\n" for f in spec.fields for line in _encode_code(f, namespace)
+        )
+        self.source = (
+            f"def convert(row):\n"
+            f"    {unpacked}, = row\n"
+            f"{body}"
+            f"    return ({', '.join(self.names)},)\n"
+            f"\n"
+            f"def decode_into(self, raw_data):\n"
+            f"    if (data_len := len(raw_data)) < {self.size}:\n"
+            f"        raise ValueError(\n"
+            f'            "Data must be at least {self.size} bytes long '
+            f'for data format {spec.name}, "\n'
+            f'            f"got {{data_len}} bytes",\n'
+            f"        )\n"
+            f"    {unpacked}, = _unpack_from(raw_data)\n"
+            f"    if f0 != {spec.data_format}:\n"
+            f"        raise ValueError(\n"
+            f'            f"Invalid data format: {{f0}} (expected {spec.data_format:#04x})",\n'
+            f"        )\n"
+            f"{body}"
+            + "".join(f"    self.{name} = {name}\n" for name in self.names)
+            + f"\n"
+            f"def encode(values):\n"
+            f"    _get = values.get\n"
+            f"{encode_body}"
+            f"    try:\n"
+            f"        return _pack({unpacked})\n"
+            f"    except _struct_error as err:\n"
+            f"        raise ValueError(\n"
+            f'            f"Value out of range for data format {spec.name}: {{err}}",\n'
+            f"        ) from None\n"
+        )
+        compiled = compile(
+            self.source,
+            f"<ruuvitag_ble data format {spec.name}>",
+            "exec",
+        )
+        exec(compiled, namespace)  # noqa: S102
+        self.convert: Callable[[tuple[Any, ...]], tuple[Any, ...]] = namespace[
+            "convert"
+        ]
+        self.decode_into: Callable[[Any, Payload], None] = namespace["decode_into"]
+        self.encode: Callable[[Mapping[str, Any]], bytes] = namespace["encode"]
+
+
+def _plan_reads(spec: FormatSpec) -> dict[int, tuple[int, str]]:
+    """Map byte offsets to the (width, struct code) of raw values to read there."""
+    reads = {0: (1, "B")}  # The data format byte.
+
+    def add(offset: int, width: int, code: str) -> None:
+        if reads.setdefault(offset, (width, code)) != (width, code):
+            raise ValueError(f"Conflicting reads at offset {offset}")
+
+    for f in spec.fields:
+        if f.kind == "mac":
+            add(f.offset, f.width, f"{f.width}s")
+            continue
+        for i in range(f.count):
+            add(f.offset + i * f.width, f.width, _STRUCT_CODES[f.width, f.signed])
+        if f.lsb_flag:
+            add(f.lsb_flag[0], 1, "B")
+    return reads
+
+
+def _raw_expression(f: Field, offset: int) -> str:
+    if f.width == 3:
+        expr = f"(f{offset}_hi << 16 | f{offset}_lo)"
+    else:
+        expr = f"f{offset}"
+    if f.shift:
+        expr = f"({expr} >> {f.shift})"
+    if f.bits is not None:
+        expr = f"({expr} & {(1 << f.bits) - 1:#x})"
+    if f.lsb_flag:
+        flag_offset, flag_bit = f.lsb_flag
+        expr = f"({expr} << 1 | (f{flag_offset} >> {flag_bit}) & 1)"
+    return expr
+
+
+def _value_expression(f: Field, raw: str, namespace: dict[str, Any]) -> str:
+    if f.convert is not None:
+        namespace[f"_convert_{f.name}"] = f.convert
+        return f"_convert_{f.name}({raw})"
+    expr = raw
+    if f.bias:
+        expr = f"({expr} + {f.bias!r})"
+    if f.scale is not None:
+        expr = f"{expr} * {f.scale!r}"
+    if f.divisor is not None:
+        expr = f"{expr} / {f.divisor!r}"
+    if f.base:
+        expr = f"{expr} + {f.base!r}"
+    if f.digits is not None:
+        expr = f"round({expr}, {f.digits})"
+    return expr
+
+
+def _invalid_condition(f: Field, raw: str) -> str | None:
+    if f.sentinel is not None:
+        return f"{raw} == {f.sentinel!r}"
+    if f.maximum is not None:
+        return f"{raw} > {f.maximum!r}"
+    return None
+
+
+def _field_code(f: Field, namespace: dict[str, Any]) -> list[str]:
+    if f.kind == "mac":
+        return [f'{f.name} = f{f.offset}.hex(":").upper()']
+    if f.count > 1:
+        raws = [_raw_expression(f, f.offset + i * f.width) for i in range(f.count)]
+        values = ", ".join(_value_expression(f, raw, namespace) for raw in raws)
+        conditions = [_invalid_condition(f, raw) for raw in raws]
+        if conditions[0] is None:
+            return [f"{f.name} = ({values},)"]
+        nones = ", ".join(["None"] * f.count)
+        any_invalid = " or ".join(map(str, conditions))
+        return [f"{f.name} = ({nones},) if {any_invalid} else ({values},)"]
+    lines = []
+    raw = _raw_expression(f, f.offset)
+    if raw != f"f{f.offset}":
+        # Evaluate composite raw values only once.
+        lines.append(f"_raw = {raw}")
+        raw = "_raw"
+    value = _value_expression(f, raw, namespace)
+    condition = _invalid_condition(f, raw)
+    if condition is None:
+        lines.append(f"{f.name} = {value}")
+    else:
+        lines.append(f"{f.name} = None if {condition} else {value}")
+    return lines
+
+
+def _full_mask(f: Field) -> int:
+    """Return the raw value with all bits of `f` set."""
+    bits = f.bits if f.bits is not None else 8 * f.width - f.shift
+    if f.lsb_flag:
+        bits += 1
+    return (1 << bits) - 1
+
+
+def _raw_encode_expression(f: Field, value: str, namespace: dict[str, Any]) -> str:
+    if f.encode is not None:
+        namespace[f"_encode_{f.name}"] = f.encode
+        return f"_encode_{f.name}({value})"
+    expr = value
+    if f.base:
+        expr = f"({expr} - {f.base!r})"
+    if f.divisor is not None:
+        expr = f"{expr} * {f.divisor!r}"
+    if f.scale is not None:
+        expr = f"{expr} / {f.scale!r}"
+    if f.divisor is not None or f.scale is not None:
+        expr = f"round({expr})"
+    if f.bias:
+        expr = f"{expr} - {f.bias!r}"
+    if f.sentinel is not None:
+        unavailable = f.sentinel
+    elif f.maximum is not None:
+        unavailable = _full_mask(f)
+    else:
+        unavailable = 0
+    return f"{unavailable!r} if {value} is None else {expr}"
+
+
+def _encode_code(f: Field, namespace: dict[str, Any]) -> list[str]:
+    if f.kind == "mac":
+        return [f"f{f.offset} = _mac_bytes({f.name!r}, _get({f.name!r}), {f.width})"]
+    lines = [f"_value = _get({f.name!r})"]
+    if f.count > 1:
+        # Like decoding, treat the vector as unavailable if any component is.
+        nones = ", ".join(["None"] * f.count)
+        lines += [
+            "if _value is None or None in _value:",
+            f"    _value = ({nones},)",
+        ]
+        components = [f"_value[{i}]" for i in range(f.count)]
+    else:
+        components = ["_value"]
+    for i, component in enumerate(components):
+        offset = f.offset + i * f.width
+        lines.append(f"_raw = {_raw_encode_expression(f, component, namespace)}")
+        if f.signed:
+            lines.append(f"f{offset} = _raw")  # Range checked when packing
+            continue
+        lines.append(
+            f"if _raw >> {_full_mask(f).bit_length()}: _out_of_range({f.name!r}, _raw)",
+        )
+        raw = "_raw"
+        if f.lsb_flag:
+            flag_offset, flag_bit = f.lsb_flag
+            lines.append(f"f{flag_offset} |= (_raw & 1) << {flag_bit}")
+            raw = "(_raw >> 1)"
+        if f.shift:
+            raw = f"({raw} << {f.shift})"
+        if f.width == 3:
+            lines += [
+                f"f{offset}_hi |= {raw} >> 16",
+                f"f{offset}_lo |= {raw} & 0xffff",
+            ]
+        else:
+            lines.append(f"f{offset} |= {raw}")
+    return lines
+
+
+def _mac_bytes(name: str, mac: str | None, width: int) -> bytes:
+    if mac is None:
+        raise ValueError(f"{name} is required")
+    data = bytes.fromhex(mac.replace(":", ""))
+    if len(data) != width:
+        raise ValueError(f"{name} must be {width} bytes long, got {mac!r}")
+    return data
+
+
+def _out_of_range(name: str, raw: int) -> None:
+    raise ValueError(f"Value of {name} out of range (raw value {raw})")
+
+
+class SchemaDecoder:
+    """Base class for decoders generated from a `FormatSpec`.
+
+    Subclasses set `format`, and declare the types of the decoded attributes.
+    `data` holds the raw fields of the payload, unpacked with `data_struct`
+    (by default, the struct layout of the format); the built-in decoders set
+    it to the layout their hand-written predecessors exposed.
+    """
+
+    format: ClassVar[CompiledFormat]
+    data_struct: ClassVar[struct.Struct | None] = None
+
+    def __init__(self, raw_data: Payload) -> None:
+        self.format.decode_into(self, raw_data)
+        self._raw_data = raw_data
+
+    @property
+    def data(self) -> tuple[Any, ...]:
+        """The raw fields of the payload, unpacked on access."""
+        layout = self.data_struct or self.format.struct
+        return layout.unpack_from(self._raw_data)
+
+    def __repr__(self) -> str:
+        values = ", ".join(
+            f"{name}={getattr(self, name)!r}" for name in self.format.names
+        )
+        return f"{type(self).__name__}({values})"
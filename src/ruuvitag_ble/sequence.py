@@ -0,0 +1,27 @@
+"""
+Helpers for the wrapping measurement sequence counters in Ruuvi advertisements.
+"""
+
+from __future__ import annotations
+
+# Width of the measurement sequence counter, by data format.
+# Data format 3 has no sequence counter.
+SEQUENCE_BITS: dict[int, int] = {
+    0x05: 16,
+    0x06: 8,
+    0xE1: 24,
+}
+
+
+def sequence_delta(current: int, previous: int, bits: int) -> int:
+    """Return how far `current` is ahead of `previous` on a `bits`-bit counter.
+
+    Wraparound is accounted for, so the result is in the range
+    [-2**(bits - 1), 2**(bits - 1)); a negative result means `current`
+    is older than `previous`.
+    """
+    modulus = 1 << bits
+    delta = (current - previous) % modulus
+    if delta >= modulus >> 1:
+        delta -= modulus
+    return delta
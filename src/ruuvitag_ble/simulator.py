@@ -0,0 +1,218 @@
+"""
+Synthetic advertisement traffic of a fleet of tags.
+
+`FleetSimulator` simulates any number of tags of a data format, each
+advertising at a regular (jittered) interval so that the fleet as a whole
+sends `rate` advertisements per second.  Measurements drift as random walks
+within plausible bounds, sequence counters count up (and wrap around),
+movement counters advance now and then, and a share of the advertisements
+is received twice, as when several scanners or advertising channels pick up
+the same packet.  Payloads are built with `ruuvitag_ble.encoders`, so they
+are valid input for every decoder, the parser and the pipeline.
+
+Timestamps are simulated, starting at `start`; with `realtime`, iteration is
+paced to match them, for soak tests against the wall clock.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import random
+import time
+from collections.abc import AsyncIterator, Iterator
+from typing import Any, NamedTuple
+
+from ruuvitag_ble.encoders import ENCODERS
+from ruuvitag_ble.sequence import SEQUENCE_BITS
+
+
+class SimulatedAdvert(NamedTuple):
+    timestamp: float
+    address: str  # Tag MAC address
+    rssi: int
+    raw_data: bytes  # Manufacturer data for 0x0499
+
+
+# Value name -> (initial value, random walk step, minimum, maximum)
+_WALKS: dict[str, tuple[float, float, float, float]] = {
+    "temperature_celsius": (21.0, 0.05, -40.0, 85.0),
+    "humidity_percentage": (45.0, 0.2, 0.0, 100.0),
+    "pressure_hpa": (1013.0, 0.05, 500.0, 1155.0),
+    "battery_voltage_mv": (3000.0, 1.0, 1600.0, 3600.0),
+    "pm1_ug_m3": (3.0, 0.2, 0.0, 1000.0),
+    "pm25_ug_m3": (5.0, 0.3, 0.0, 1000.0),
+    "pm4_ug_m3": (6.0, 0.3, 0.0, 1000.0),
+    "pm10_ug_m3": (7.0, 0.4, 0.0, 1000.0),
+    "co2_ppm": (600.0, 5.0, 400.0, 5000.0),
+    "voc_index": (100.0, 2.0, 1.0, 500.0),
+    "nox_index": (1.0, 0.5, 1.0, 500.0),
+    "luminosity_lux": (200.0, 10.0, 0.0, 65535.0),
+    "sound_avg_dba": (40.0, 0.5, 18.0, 120.0),
+}
+_INTEGERS = frozenset(
+    ("battery_voltage_mv", "co2_ppm", "voc_index", "nox_index", "luminosity_lux"),
+)
+# Chance of a tag being moved between two advertisements
+_MOVE_PROBABILITY = 0.01
+# Duplicates arrive this long (at most) after the original, in seconds
+_DUPLICATE_DELAY = 0.05
+
+
+class _Tag:
+    __slots__ = ("address", "movements", "rssi", "sequence", "values")
+
+    def __init__(self, address: str, values: dict[str, Any], rssi: int) -> None:
+        self.address = address
+        self.values = values
+        self.rssi = rssi
+        self.sequence = 0
+        self.movements = 0
+
+
+class FleetSimulator:
+    """Simulate the advertisements of `tags` tags of `data_format`.
+
+    The fleet sends `rate` advertisements per second (not counting
+    duplicates), each tag one every `tags / rate` seconds give or take
+    10 %.  Each advertisement is repeated with `duplicate_probability`.
+    `seed` makes the traffic reproducible.
+    """
+
+    def __init__(
+        self,
+        tags: int,
+        *,
+        data_format: int = 0x05,
+        rate: float = 1000.0,
+        duplicate_probability: float = 0.0,
+        start: float = 0.0,
+        realtime: bool = False,
+        seed: int | None = None,
+    ) -> None:
+        if tags < 1:
+            raise ValueError(f"tags must be at least 1, got {tags}")
+        if rate <= 0:
+            raise ValueError(f"rate must be positive, got {rate}")
+        if data_format not in ENCODERS:
+            raise ValueError(f"Data format not supported: {data_format:#04x}")
+        self.data_format = data_format
+        self.rate = rate
+        self.duplicate_probability = duplicate_probability
+        self.start = start
+        self.realtime = realtime
+        self.interval = tags / rate
+        self._encode = ENCODERS[data_format].encode
+        self._names = ENCODERS[data_format].names
+        self._sequence_mask = (1 << SEQUENCE_BITS.get(data_format, 0)) - 1
+        self._random = random.Random(seed)
+        rng = self._random
+        self.tags = [
+            _Tag(
+                _address(rng.getrandbits(48) | 0xC00000000000),  # Random static
+                {
+                    name: value
+                    for name, (value, _, _, _) in _WALKS.items()
+                    if name in self._names
+                },
+                rng.randint(-95, -45),
+            )
+            for _ in range(tags)
+        ]
+        # (timestamp, tiebreaker, tag index, duplicated payload or None)
+        self._schedule: list[tuple[float, int, int, bytes | None]] = [
+            (start + rng.uniform(0, self.interval), i, i, None) for i in range(tags)
+        ]
+        self._tiebreaker = itertools.count(tags)
+        heapq.heapify(self._schedule)
+
+    def adverts(self, count: int | None = None) -> Iterator[SimulatedAdvert]:
+        """Yield the next `count` advertisements (forever if None)."""
+        wall_start = time.monotonic()
+        for advert in self._generate(count):
+            if self.realtime:
+                delay = advert.timestamp - self.start - (time.monotonic() - wall_start)
+                if delay > 0:
+                    time.sleep(delay)
+            yield advert
+
+    async def async_adverts(
+        self,
+        count: int | None = None,
+    ) -> AsyncIterator[SimulatedAdvert]:
+        """Like `adverts`, but pacing (with `realtime`) with `asyncio.sleep`."""
+        wall_start = time.monotonic()
+        for advert in self._generate(count):
+            if self.realtime:
+                delay = advert.timestamp - self.start - (time.monotonic() - wall_start)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            yield advert
+
+    def _generate(self, count: int | None) -> Iterator[SimulatedAdvert]:
+        schedule = self._schedule
+        rng = self._random
+        produced = 0
+        while count is None or produced < count:
+            timestamp, _, index, duplicate = heapq.heappop(schedule)
+            tag = self.tags[index]
+            rssi = tag.rssi + rng.randint(-3, 3)
+            if duplicate is not None:
+                raw_data = duplicate
+            else:
+                raw_data = self._advertise(tag)
+                next_timestamp = timestamp + self.interval * rng.uniform(0.9, 1.1)
+                heapq.heappush(
+                    schedule,
+                    (next_timestamp, next(self._tiebreaker), index, None),
+                )
+                if rng.random() < self.duplicate_probability:
+                    heapq.heappush(
+                        schedule,
+                        (
+                            timestamp + rng.uniform(0, _DUPLICATE_DELAY),
+                            next(self._tiebreaker),
+                            index,
+                            raw_data,
+                        ),
+                    )
+            produced += 1
+            yield SimulatedAdvert(timestamp, tag.address, rssi, raw_data)
+
+    def _advertise(self, tag: _Tag) -> bytes:
+        rng = self._random
+        values = tag.values
+        for name, (_, step, low, high) in _WALKS.items():
+            if name in values:
+                values[name] = min(max(values[name] + rng.gauss(0, step), low), high)
+        payload = {
+            name: round(value) if name in _INTEGERS else value
+            for name, value in values.items()
+        }
+        moved = rng.random() < _MOVE_PROBABILITY
+        if moved:
+            tag.movements += 1
+        if "acceleration_vector_mg" in self._names:
+            jitter = 200 if moved else 10
+            payload["acceleration_vector_mg"] = (
+                rng.randint(-jitter, jitter),
+                rng.randint(-jitter, jitter),
+                1000 + rng.randint(-jitter, jitter),
+            )
+        if "movement_counter" in self._names:
+            payload["movement_counter"] = tag.movements & 0xFF
+        if "tx_power_dbm" in self._names:
+            payload["tx_power_dbm"] = 4
+        if "measurement_sequence_number" in self._names:
+            payload["measurement_sequence_number"] = tag.sequence
+            tag.sequence = (tag.sequence + 1) & self._sequence_mask
+        if "mac" in self._names:
+            payload["mac"] = (
+                tag.address[-8:] if self.data_format == 0x06 else tag.address
+            )
+        return self._encode(payload)
+
+
+def _address(value: int) -> str:
+    return value.to_bytes(6, "big").hex(":").upper()
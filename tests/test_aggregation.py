@@ -0,0 +1,170 @@
+import pytest
+
+from ruuvitag_ble import RuuvitagBluetoothDeviceData
+from ruuvitag_ble.aggregation import WindowAggregate, WindowAggregator
+from ruuvitag_ble.encoders import encode_e1
+from ruuvitag_ble.parser import decode_advertisement
+from tests.test_parser import _df6
+from tests.test_v5 import V5_OUTDOOR_SENSOR_DATA
+from tests.utils import bytes_to_service_info
+
+
+def _temperatures(aggregates: list[WindowAggregate]) -> list[tuple[float, ...]]:
+    return [
+        (a.start, a.end, a.samples, a.minimum, a.maximum, a.mean, a.last)
+        for a in aggregates
+        if a.key == "temperature"
+    ]
+
+
+def test_tumbling_windows():
+    aggregator = WindowAggregator(60)
+    closed = []
+    for timestamp, value in ((0, 1), (30, 3), (59, 2), (61, 5), (200, 7)):
+        closed += aggregator.add("tag", "temperature", timestamp, value)
+    assert _temperatures(closed) == [
+        (0, 60, 3, 1, 3, 2.0, 2),
+        (60, 120, 1, 5, 5, 5.0, 5),
+    ]
+    assert _temperatures(aggregator.flush()) == [(180, 240, 1, 7, 7, 7.0, 7)]
+    assert aggregator.flush() == []
+
+
+def test_sliding_windows():
+    aggregator = WindowAggregator(180, slide=60)
+    closed = []
+    for timestamp, value in ((0, 1), (70, 2), (130, 3), (400, 4)):
+        closed += aggregator.add("tag", "temperature", timestamp, value)
+    assert _temperatures(closed) == [
+        (-120, 60, 1, 1, 1, 1.0, 1),
+        (-60, 120, 2, 1, 2, 1.5, 2),
+        (0, 180, 3, 1, 3, 2.0, 3),
+        (60, 240, 2, 2, 3, 2.5, 3),
+        (120, 300, 1, 3, 3, 3.0, 3),
+    ]
+    # Nothing between 300 and 360 (no empty windows are emitted), and the
+    # windows with the last reading are closed by flushing.
+    assert [a.start for a in aggregator.flush()] == [240, 300, 360]
+
+
+def test_late_readings():
+    aggregator = WindowAggregator(60, allowed_lateness=30)
+    assert aggregator.add("tag", "temperature", 50, 1) == []
+    assert aggregator.add("tag", "temperature", 80, 2) == []
+    # Still within the allowed lateness: the first window is open.
+    assert aggregator.add("tag", "temperature", 40, 3) == []
+    closed = aggregator.add("tag", "temperature", 95, 4)
+    assert _temperatures(closed) == [(0, 60, 2, 1, 3, 2.0, 1)]
+    assert aggregator.add("tag", "temperature", 10, 5) == []
+    assert aggregator.late == 1
+    # Silent series are closed with flush(now).
+    assert aggregator.flush(now=140) == []
+    assert _temperatures(aggregator.flush(now=150)) == [(60, 120, 2, 2, 4, 3.0, 4)]
+
+
+def test_series_are_separate():
+    aggregator = WindowAggregator(60, keys={"temperature", "humidity"})
+    aggregator.add("a", "temperature", 0, 1)
+    aggregator.add("b", "temperature", 0, 2)
+    aggregator.add("a", "humidity", 0, 50)
+    assert aggregator.add("a", "pressure", 0, 1000) == []
+    closed = aggregator.add("a", "temperature", 60, 1)
+    assert [(a.tag, a.key, a.mean) for a in closed] == [("a", "temperature", 1.0)]
+    assert sorted((a.tag, a.key) for a in aggregator.flush()) == [
+        ("a", "humidity"),
+        ("a", "temperature"),
+        ("b", "temperature"),
+    ]
+
+
+def test_duplicate_sequence_numbers():
+    aggregator = WindowAggregator(60)
+    closed = []
+    for timestamp, sequence, temperature in (
+        (0, 254, 2000),
+        (1, 254, 2000),  # Duplicate
+        (3, 0, 2400),
+        (2, 255, 2200),  # Reordered, not a duplicate
+        (4, 255, 2200),  # Duplicate
+        (60, 1, 2600),
+    ):
+        decoded = decode_advertisement(_df6(sequence, temperature))
+        assert decoded is not None
+        closed += aggregator.add_advertisement("4C:88:4F", decoded, timestamp)
+    assert aggregator.duplicates == 2
+    assert _temperatures(closed) == [(0, 60, 3, 10.0, 12.0, 11.0, 12.0)]
+    iaqs = [a for a in closed if a.key == "iaqs"]
+    assert len(iaqs) == 1
+
+
+def test_sequence_window():
+    aggregator = WindowAggregator(60)
+    for sequence in (100, 40, 40, 30):
+        decoded = decode_advertisement(_df6(sequence, 2000))
+        assert decoded is not None
+        aggregator.add_advertisement("tag", decoded, 0)
+    # 40 is within the window of remembered sequence numbers (and seen twice),
+    # 30 is further back, so the counter was reset.
+    assert aggregator.duplicates == 1
+    assert aggregator.resets == 1
+
+
+def test_counter_reset_after_reboot():
+    aggregator = WindowAggregator(60)
+    closed = []
+    sequences = [*range(50000, 50010), *range(2000)]
+    for timestamp, sequence in enumerate(sequences):
+        decoded = decode_advertisement(
+            encode_e1(
+                temperature_celsius=20.0,
+                measurement_sequence_number=sequence,
+                mac="C7:1F:D4:FE:63:82",
+            ),
+        )
+        assert decoded is not None
+        closed += aggregator.add_advertisement("tag", decoded, timestamp)
+    closed += aggregator.flush()
+    assert aggregator.duplicates == 0
+    assert aggregator.resets == 1
+    assert sum(a.samples for a in closed if a.key == "temperature") == 2010
+
+
+def test_data_formats_are_separate():
+    # Ruuvi Air advertises DF6 and E1 with separate sequence counters
+    aggregator = WindowAggregator(60)
+    for sequence in range(200, 206):
+        for raw_data in (
+            _df6(sequence, 2000),
+            encode_e1(
+                measurement_sequence_number=sequence - 195,
+                mac="4C:88:4F:AA:BB:CC",
+            ),
+        ):
+            decoded = decode_advertisement(raw_data)
+            assert decoded is not None
+            aggregator.add_advertisement("tag", decoded, 0)
+    assert aggregator.duplicates == 0
+    assert aggregator.resets == 0
+
+
+def test_parser_updates():
+    aggregator = WindowAggregator(60)
+    update = RuuvitagBluetoothDeviceData().update(
+        bytes_to_service_info(V5_OUTDOOR_SENSOR_DATA),
+    )
+    aggregator.add_update("tag", update, 0)
+    aggregates = {a.key: a for a in aggregator.flush()}
+    # The same keys as the parser's entities
+    assert aggregates.keys() == {
+        device_key.key
+        for device_key, value in update.entity_values.items()
+        if value.native_value is not None
+    }
+    assert aggregates["temperature"].last == 7.2
+
+
+def test_invalid_options():
+    with pytest.raises(ValueError, match="must be positive"):
+        WindowAggregator(0)
+    with pytest.raises(ValueError, match="must divide size"):
+        WindowAggregator(60, slide=25)
@@ -0,0 +1,157 @@
+from pathlib import Path
+
+import pytest
+
+from ruuvitag_ble.archive import ArchiveReader, ArchiveWriter
+from ruuvitag_ble.df5_decoder import DataFormat5Decoder
+from ruuvitag_ble.dfe1_decoder import DataFormatE1Decoder
+from tests.test_e1 import E1_VALID_DATA
+from tests.test_v5 import V5_OUTDOOR_SENSOR_DATA
+
+TAG_A = "C7:1F:D4:FE:63:82"
+TAG_B = "DE:AD:7B:3F:EF:AF"
+
+
+def _write(path: Path, chunk_size: int = 4) -> None:
+    with ArchiveWriter(path, chunk_size=chunk_size) as writer:
+        for i in range(10):
+            if i % 2:
+                writer.append(100.0 + i, TAG_B, None, E1_VALID_DATA)
+            else:
+                writer.append(100.0 + i, TAG_A, -60 - i, V5_OUTDOOR_SENSOR_DATA)
+
+
+def test_round_trip(tmp_path):
+    path = tmp_path / "adverts.rva"
+    _write(path)
+    with ArchiveReader(path) as reader:
+        assert len(reader) == 10
+        assert [chunk.records for chunk in reader.chunks] == [4, 4, 2]
+        records = [
+            (r.timestamp, r.address, r.rssi, bytes(r.raw_data)) for r in reader.scan()
+        ]
+    assert records[0] == (100.0, TAG_A, -60, V5_OUTDOOR_SENSOR_DATA)
+    assert records[1] == (101.0, TAG_B, None, E1_VALID_DATA)
+    assert [timestamp for timestamp, _, _, _ in records] == [
+        100.0 + i for i in range(10)
+    ]
+
+
+def test_records_are_compact(tmp_path):
+    path = tmp_path / "adverts.rva"
+    with ArchiveWriter(path) as writer:
+        for i in range(1000):
+            writer.append(i, TAG_A, -60, V5_OUTDOOR_SENSOR_DATA)
+    with ArchiveReader(path) as reader:
+        assert reader.chunks[0].width == 16 + len(V5_OUTDOOR_SENSOR_DATA)
+    assert path.stat().st_size < 1000 * 41
+
+
+def test_range_and_address_scans(tmp_path):
+    path = tmp_path / "adverts.rva"
+    _write(path)
+    with ArchiveReader(path) as reader:
+        assert [r.timestamp for r in reader.scan(103, 107)] == [
+            103.0,
+            104.0,
+            105.0,
+            106.0,
+        ]
+        assert [r.timestamp for r in reader.scan(address=TAG_B)] == [
+            101.0,
+            103.0,
+            105.0,
+            107.0,
+            109.0,
+        ]
+        assert [r.timestamp for r in reader.scan(start=105, address=TAG_A)] == [
+            106.0,
+            108.0,
+        ]
+        assert list(reader.scan(address="00:11:22:33:44:55")) == []
+        assert list(reader.scan(end=100)) == []
+
+
+def test_decode_in_place(tmp_path):
+    path = tmp_path / "adverts.rva"
+    _write(path)
+    with ArchiveReader(path) as reader:
+        decoded = [
+            (record.address, type(decoder), decoder.temperature_celsius)
+            for record, decoder in reader.decode(start=100, end=102)
+        ]
+    assert decoded == [
+        (TAG_A, DataFormat5Decoder, 7.2),
+        (TAG_B, DataFormatE1Decoder, 29.5),
+    ]
+
+
+def test_append_to_existing_archive(tmp_path):
+    path = tmp_path / "adverts.rva"
+    _write(path)
+    with ArchiveWriter(path) as writer:
+        writer.append(200.0, TAG_A, -50, V5_OUTDOOR_SENSOR_DATA)
+    with ArchiveReader(path) as reader:
+        assert len(reader) == 11
+        assert [r.rssi for r in reader.scan(start=200)] == [-50]
+
+
+def test_truncated_chunk_is_ignored(tmp_path):
+    path = tmp_path / "adverts.rva"
+    _write(path)
+    path.write_bytes(path.read_bytes()[:-10])
+    with ArchiveReader(path) as reader:
+        assert len(reader) == 8
+
+
+def test_append_after_crash(tmp_path):
+    path = tmp_path / "adverts.rva"
+    _write(path)
+    # A crash while writing the last chunk
+    path.write_bytes(path.read_bytes()[:-100])
+    with ArchiveWriter(path) as writer:
+        for i in range(20):
+            writer.append(200.0 + i, TAG_A, -50, V5_OUTDOOR_SENSOR_DATA)
+    with ArchiveReader(path) as reader:
+        assert len(reader) == 28
+        appended = list(reader.scan(start=200))
+        assert [record.timestamp for record in appended] == [
+            200.0 + i for i in range(20)
+        ]
+        assert {record.address for record in appended} == {TAG_A}
+        assert [record.timestamp for record in reader.scan(end=200)] == [
+            100.0 + i for i in range(8)
+        ]
+    # A crash while writing the file header
+    path.write_bytes(b"RUUVI")
+    with ArchiveWriter(path) as writer:
+        writer.append(300.0, TAG_B, None, E1_VALID_DATA)
+    with ArchiveReader(path) as reader:
+        assert [record.timestamp for record in reader.scan()] == [300.0]
+
+
+def test_close_with_views_left(tmp_path):
+    path = tmp_path / "adverts.rva"
+    _write(path)
+    with ArchiveReader(path) as reader:
+        for record, decoded in reader.decode(address=TAG_B):
+            assert decoded.temperature_celsius == 29.5
+    # The views still referenced after closing stay valid
+    assert bytes(record.raw_data) == E1_VALID_DATA
+
+
+def test_invalid_input(tmp_path):
+    path = tmp_path / "adverts.rva"
+    path.write_bytes(b"btsnoop\0" + bytes(16))
+    with pytest.raises(ValueError, match="Not an advertisement archive"):
+        ArchiveReader(path)
+    with ArchiveWriter(tmp_path / "other.rva") as writer:
+        with pytest.raises(ValueError, match="Invalid MAC address"):
+            writer.append(0.0, "C7:1F", None, V5_OUTDOOR_SENSOR_DATA)
+        with pytest.raises(ValueError, match="too long"):
+            writer.append(0.0, TAG_A, None, bytes(256))
+    with pytest.raises(ValueError, match="Not an advertisement archive"):
+        ArchiveWriter(path)
+    assert path.read_bytes().startswith(b"btsnoop")
+    with pytest.raises(ValueError, match="between 1 and 4294967295, got 0"):
+        ArchiveWriter(tmp_path / "other.rva", chunk_size=0)
@@ -0,0 +1,63 @@
+import pytest
+
+from ruuvitag_ble.batch import COLUMNS, decode_batch
+from ruuvitag_ble.core import decoder_classes
+from tests.test_e1 import (
+    E1_INVALID_VALUES,
+    E1_MAX_VALUES,
+    E1_MIN_VALUES,
+    E1_VALID_DATA,
+)
+from tests.test_v3 import V3_SENSOR_DATA, V3_SENSOR_DATA_SUBZERO
+from tests.test_v5 import (
+    V5_OUTDOOR_SENSOR_DATA,
+    V5_OUTDOOR_SENSOR_DATA_INVALID_ACCEL,
+)
+from tests.test_v6 import (
+    V6_BASELINE_SENSOR_DATA,
+    V6_BREATH_HIGH_CO2_DATA,
+    V6_C_TEST_DATA,
+    V6_LOW_LUMINOSITY_DATA,
+)
+
+PAYLOADS = [
+    V3_SENSOR_DATA,
+    V5_OUTDOOR_SENSOR_DATA,
+    V6_BASELINE_SENSOR_DATA,
+    E1_VALID_DATA,
+    V3_SENSOR_DATA_SUBZERO,
+    V5_OUTDOOR_SENSOR_DATA_INVALID_ACCEL,
+    V6_BREATH_HIGH_CO2_DATA,
+    V6_LOW_LUMINOSITY_DATA,
+    V6_C_TEST_DATA,
+    bytes.fromhex("068000FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF"),
+    E1_MAX_VALUES,
+    E1_MIN_VALUES,
+    E1_INVALID_VALUES,
+]
+
+
+def test_batch_matches_decoders():
+    columns = decode_batch(PAYLOADS)
+    assert set(columns) == set(COLUMNS)
+    for index, raw_data in enumerate(PAYLOADS):
+        assert columns["data_format"][index] == raw_data[0]
+        decoder = decoder_classes[raw_data[0]](raw_data)
+        for name in COLUMNS[1:]:
+            expected = getattr(decoder, name, None)
+            assert columns[name][index] == expected, (index, name)
+
+
+def test_batch_unsupported_and_short():
+    short = V5_OUTDOOR_SENSOR_DATA[:10]
+    columns = decode_batch([b"", b"\x07\x00", short, V5_OUTDOOR_SENSOR_DATA])
+    assert columns["data_format"] == [None, 7, 5, 5]
+    assert columns["temperature_celsius"] == [None, None, None, 7.2]
+    assert columns["mac"] == [None, None, None, "DE:AD:7B:3F:EF:AF"]
+
+
+@pytest.mark.parametrize("payloads", [[], iter([V6_C_TEST_DATA] * 3)])
+def test_batch_iterables(payloads):
+    columns = decode_batch(payloads)
+    assert len(columns["mac"]) == len(columns["data_format"])
+    assert all(mac == "4C:88:4F" for mac in columns["mac"])
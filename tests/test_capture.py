@@ -0,0 +1,145 @@
+import struct
+
+import pytest
+
+from ruuvitag_ble.capture import read_capture
+from tests.test_e1 import E1_VALID_DATA
+from tests.test_v5 import V5_OUTDOOR_SENSOR_DATA
+
+ADDRESS = "C7:1F:D4:FE:63:82"
+ADDRESS_LE = bytes.fromhex(ADDRESS.replace(":", ""))[::-1]
+BTSNOOP_EPOCH_DELTA_US = 0x00DCDDB30F2F8000
+
+
+def _ad(payload: bytes) -> bytes:
+    flags = b"\x02\x01\x06"
+    return flags + bytes([len(payload) + 3, 0xFF, 0x99, 0x04]) + payload
+
+
+def _le_meta_event(subevent: int, reports: list[bytes]) -> bytes:
+    parameters = bytes([subevent, len(reports)]) + b"".join(reports)
+    return bytes([0x3E, len(parameters)]) + parameters
+
+
+def _advertising_report(payload: bytes, rssi: int) -> bytes:
+    data = _ad(payload)
+    return (
+        bytes([0x03, 0x01])
+        + ADDRESS_LE
+        + bytes([len(data)])
+        + data
+        + struct.pack("b", rssi)
+    )
+
+
+def _extended_advertising_report(payload: bytes, rssi: int) -> bytes:
+    data = _ad(payload)
+    return (
+        b"\x10\x00\x01"
+        + ADDRESS_LE
+        + struct.pack("<BBBbbHB6sB", 1, 0, 0xFF, 127, rssi, 0, 0, bytes(6), len(data))
+        + data
+    )
+
+
+def _btsnoop(packets: list[tuple[float, bytes]]) -> bytes:
+    records = b"".join(
+        struct.pack(
+            ">IIIIq",
+            len(packet),
+            len(packet),
+            0x03,
+            0,
+            round(timestamp * 1e6) + BTSNOOP_EPOCH_DELTA_US,
+        )
+        + packet
+        for timestamp, packet in packets
+    )
+    return struct.pack(">8sII", b"btsnoop\0", 1, 1002) + records
+
+
+def _pcap(linktype: int, packets: list[tuple[float, bytes]]) -> bytes:
+    records = b"".join(
+        struct.pack(
+            "<IIII",
+            int(timestamp),
+            round(timestamp % 1 * 1e6),
+            len(packet),
+            len(packet),
+        )
+        + packet
+        for timestamp, packet in packets
+    )
+    return struct.pack("<IHHiIII", 0xA1B2C3D4, 2, 4, 0, 0, 65535, linktype) + records
+
+
+def test_btsnoop_legacy_and_extended_reports(tmp_path):
+    event = _le_meta_event(
+        0x02,
+        [
+            _advertising_report(b"\x05\x00", -70),  # Too short, skipped
+            _advertising_report(V5_OUTDOOR_SENSOR_DATA, -70),
+        ],
+    )
+    extended_event = _le_meta_event(
+        0x0D,
+        [_extended_advertising_report(E1_VALID_DATA, -55)],
+    )
+    path = tmp_path / "capture.btsnoop"
+    path.write_bytes(
+        _btsnoop(
+            [
+                (1700000000.5, b"\x01\x0c\x20\x02\x01\x00"),  # A command
+                (1700000001.25, b"\x04" + event),
+                (1700000002.0, b"\x04" + extended_event),
+            ],
+        )
+        + struct.pack(">IIIIq", 50, 50, 0x03, 0, 0)
+        + b"\x04\x3e",  # Truncated record
+    )
+    readings = list(read_capture(path))
+    assert len(readings) == 2
+    v5, e1 = readings
+    assert v5.timestamp == 1700000001.25
+    assert (v5.address, v5.rssi, v5.raw_data) == (ADDRESS, -70, V5_OUTDOOR_SENSOR_DATA)
+    assert v5.decoded.temperature_celsius == 7.2
+    assert (e1.address, e1.rssi, e1.raw_data) == (ADDRESS, -55, E1_VALID_DATA)
+    assert e1.decoded.temperature_celsius == 29.5
+
+
+def test_pcap_hci_h4(tmp_path):
+    event = _le_meta_event(0x02, [_advertising_report(V5_OUTDOOR_SENSOR_DATA, -80)])
+    path = tmp_path / "capture.pcap"
+    path.write_bytes(_pcap(187, [(1700000000.25, b"\x04" + event)]))
+    (reading,) = read_capture(path)
+    assert reading.timestamp == 1700000000.25
+    assert (reading.address, reading.rssi) == (ADDRESS, -80)
+
+
+def test_pcap_link_layer(tmp_path):
+    pdu = ADDRESS_LE + _ad(V5_OUTDOOR_SENSOR_DATA)
+    packet = b"\xd6\xbe\x89\x8e" + bytes([0x02, len(pdu)]) + pdu + b"\x00\x00\x00"
+    phdr = struct.pack("<BbbBIH", 37, -65, -100, 0, 0x8E89BED6, 0x0002)
+    ll_path = tmp_path / "ll.pcap"
+    ll_path.write_bytes(_pcap(251, [(1.0, packet)]))
+    phdr_path = tmp_path / "ll_phdr.pcap"
+    phdr_path.write_bytes(_pcap(256, [(1.0, phdr + packet)]))
+    (ll,) = read_capture(ll_path)
+    (with_phdr,) = read_capture(phdr_path)
+    assert (ll.address, ll.rssi) == (ADDRESS, None)
+    assert (with_phdr.address, with_phdr.rssi) == (ADDRESS, -65)
+    assert with_phdr.decoded.humidity_percentage == 61.84
+
+
+def test_unsupported_files(tmp_path):
+    empty = tmp_path / "empty"
+    empty.write_bytes(b"")
+    assert list(read_capture(empty)) == []
+    other = tmp_path / "other"
+    other.write_bytes(b"\x0a\x0d\x0d\x0a" + bytes(28))  # pcapng
+    with pytest.raises(ValueError, match="Not a btsnoop or pcap file"):
+        list(read_capture(other))
+    ethernet = tmp_path / "ethernet.pcap"
+    ethernet.write_bytes(_pcap(1, []))
+    with pytest.raises(ValueError, match="Unsupported pcap link type: 1"):
+        list(read_capture(ethernet))
@@ -0,0 +1,136 @@
+import pytest
+
+from ruuvitag_ble.compression import SeriesEncoder, SeriesReader, decode_series
+from ruuvitag_ble.encoders import encode_df5, encode_df6
+from ruuvitag_ble.simulator import FleetSimulator
+from tests.test_e1 import E1_VALID_DATA
+from tests.test_v5 import V5_OUTDOOR_SENSOR_DATA
+
+MAC = "C7:1F:D4:FE:63:82"
+
+
+def _encode(encoder: SeriesEncoder, readings: list[tuple[float, bytes]]) -> bytes:
+    blocks = [encoder.append(timestamp, raw_data) for timestamp, raw_data in readings]
+    return b"".join(block for block in blocks if block) + encoder.flush()
+
+
+@pytest.mark.parametrize("data_format", [0x03, 0x05, 0x06, 0xE1])
+def test_round_trip(data_format):
+    simulator = FleetSimulator(1, data_format=data_format, rate=1, seed=1)
+    readings = [
+        (advert.timestamp, bytes(advert.raw_data)) for advert in simulator.adverts(3000)
+    ]
+    data = _encode(SeriesEncoder(data_format), readings)
+    decoded = list(decode_series(data))
+    assert [payload for _, payload in decoded] == [raw for _, raw in readings]
+    assert all(
+        abs(timestamp - expected) <= 0.0005
+        for (timestamp, _), (expected, _) in zip(decoded, readings, strict=True)
+    )
+    # Every value drifts in the simulation, yet readings take less than payloads
+    assert len(data) < len(readings) * len(readings[0][1])
+
+
+def test_regular_series_is_tiny():
+    readings = [
+        (
+            1_700_000_000.0 + 10 * i,
+            encode_df5(
+                temperature_celsius=21.5 + 0.005 * (i // 100),
+                humidity_percentage=40,
+                pressure_hpa=1000,
+                acceleration_vector_mg=(0, 0, 1000),
+                battery_voltage_mv=3000,
+                tx_power_dbm=4,
+                movement_counter=0,
+                measurement_sequence_number=i % 65536,
+                mac=MAC,
+            ),
+        )
+        for i in range(1000)
+    ]
+    data = _encode(SeriesEncoder(0x05), readings)
+    assert len(data) < 200
+    assert [payload for _, payload in decode_series(data)] == [
+        raw for _, raw in readings
+    ]
+
+
+def test_sequence_wraparound():
+    readings = [
+        (float(i), encode_df6(measurement_sequence_number=i % 256, mac="4C:88:4F"))
+        for i in range(600)
+    ]
+    data = _encode(SeriesEncoder(0x06, timestamp_resolution=1), readings)
+    assert list(decode_series(data)) == readings
+
+
+def test_streaming_and_block_access():
+    encoder = SeriesEncoder(0x05, block_size=100)
+    simulator = FleetSimulator(1, data_format=0x05, rate=1, seed=2)
+    adverts = list(simulator.adverts(1050))
+    blocks = [encoder.append(advert.timestamp, advert.raw_data) for advert in adverts]
+    assert sum(block is not None for block in blocks) == 10
+    data = b"".join(block for block in blocks if block) + encoder.flush()
+
+    reader = SeriesReader(data)
+    assert len(reader) == 1050
+    assert [block.readings for block in reader.blocks] == [100] * 10 + [50]
+    assert reader.blocks[3].first_timestamp == pytest.approx(adverts[300].timestamp)
+    fourth = reader.block(3)
+    assert (
+        [
+            decoded.measurement_sequence_number  # type: ignore[union-attr]
+            for _, decoded in fourth
+        ]
+        == [
+            int.from_bytes(advert.raw_data[16:18], "big") for advert in adverts[300:400]
+        ]
+    )
+    start, end = adverts[420].timestamp, adverts[480].timestamp
+    in_range = list(reader.range(start - 0.0005, end - 0.0005))
+    assert len(in_range) == 60
+    assert sum(1 for _ in reader) == 1050
+
+
+def test_out_of_order_readings():
+    encoder = SeriesEncoder(0x05, block_size=3, timestamp_resolution=1)
+    payload = V5_OUTDOOR_SENSOR_DATA
+    timestamps = [10.0, 5.0, 11.0, 12.0, 20.0, 13.0]
+    data = b"".join(
+        encoder.append(timestamp, payload) or b"" for timestamp in timestamps
+    )
+    reader = SeriesReader(data)
+    assert [
+        (block.first_timestamp, block.last_timestamp) for block in reader.blocks
+    ] == [
+        (5.0, 11.0),
+        (12.0, 20.0),
+    ]
+    assert [timestamp for timestamp, _ in reader] == timestamps
+    assert [timestamp for timestamp, _ in reader.range(4, 6)] == [5.0]
+    assert [timestamp for timestamp, _ in reader.range(19, 21)] == [20.0]
+
+
+def test_reserved_bytes_are_not_kept():
+    raw_data = bytearray(E1_VALID_DATA)
+    raw_data[30] = 0xAB  # Reserved
+    encoder = SeriesEncoder(0xE1)
+    encoder.append(0.0, raw_data)
+    [(_, payload)] = decode_series(encoder.flush())
+    assert payload == E1_VALID_DATA
+
+
+def test_invalid_input():
+    with pytest.raises(ValueError, match="Unsupported data format"):
+        SeriesEncoder(0x04)
+    with pytest.raises(ValueError, match="whole fraction of a second"):
+        SeriesEncoder(0x05, timestamp_resolution=0.3)
+    with pytest.raises(ValueError, match="Expected data format 0x05, got e1"):
+        SeriesEncoder(0x05).append(0.0, E1_VALID_DATA)
+    with pytest.raises(ValueError, match="Expected at least 24 bytes"):
+        SeriesEncoder(0x05).append(0.0, V5_OUTDOOR_SENSOR_DATA[:20])
+    encoder = SeriesEncoder(0x05)
+    encoder.append(0.0, V5_OUTDOOR_SENSOR_DATA)
+    with pytest.raises(ValueError, match="Truncated block"):
+        SeriesReader(encoder.flush()[:-1])
@@ -0,0 +1,80 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import ruuvitag_ble
+from ruuvitag_ble.core import (
+    DataFormat5Decoder,
+    DataFormatE1Decoder,
+    calculate_iaqs,
+    decode,
+)
+from tests.test_e1 import E1_VALID_DATA
+from tests.test_v5 import V5_OUTDOOR_SENSOR_DATA
+
+THIRD_PARTY = (
+    "bluetooth_data_tools",
+    "bluetooth_sensor_state_data",
+    "home_assistant_bluetooth",
+    "sensor_state_data",
+)
+
+# Modules that decode bytes without the Home Assistant integration
+STANDALONE = (
+    "ruuvitag_ble.core",
+    "ruuvitag_ble.aggregation",
+    "ruuvitag_ble.archive",
+    "ruuvitag_ble.batch",
+    "ruuvitag_ble.capture",
+    "ruuvitag_ble.encoders",
+    "ruuvitag_ble.hci",
+    "ruuvitag_ble.history",
+    "ruuvitag_ble.peek",
+    "ruuvitag_ble.replay",
+    "ruuvitag_ble.simulator",
+)
+
+
+def _imported_modules(module: str) -> set[str]:
+    """Return the modules loaded by importing `module` in a fresh interpreter."""
+    output = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            f"import sys, {module}; print(' '.join(sys.modules))",
+        ],
+        check=True,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+    ).stdout
+    return set(output.split())
+
+
+@pytest.mark.parametrize("module", STANDALONE)
+def test_no_third_party_imports(module):
+    modules = _imported_modules(module)
+    assert "ruuvitag_ble.parser" not in modules
+    assert not modules.intersection(THIRD_PARTY)
+
+
+def test_parser_is_imported_lazily():
+    assert "ruuvitag_ble.parser" not in _imported_modules("ruuvitag_ble")
+    parser_cls = ruuvitag_ble.RuuvitagBluetoothDeviceData
+    assert parser_cls.__module__ == "ruuvitag_ble.parser"
+    with pytest.raises(AttributeError, match="no attribute 'nope'"):
+        ruuvitag_ble.nope
+
+
+def test_decode():
+    v5 = decode(V5_OUTDOOR_SENSOR_DATA)
+    assert isinstance(v5, DataFormat5Decoder)
+    assert v5.temperature_celsius == 7.2
+    e1 = decode(memoryview(E1_VALID_DATA))
+    assert isinstance(e1, DataFormatE1Decoder)
+    assert calculate_iaqs(e1.co2_ppm, e1.pm25_ug_m3) is not None
+    assert decode(b"") is None
+    assert decode(b"\x07\x00") is None  # Unsupported data format
+    assert decode(b"\x05\x00") is None  # Too short
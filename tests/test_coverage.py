@@ -0,0 +1,93 @@
+from typing import Any
+
+import pytest
+
+from ruuvitag_ble.coverage import CoverageTracker
+from ruuvitag_ble.parser import decode_advertisement
+from ruuvitag_ble.peek import peek
+from tests.test_e1 import E1_VALID_DATA
+from tests.test_parser import _df6
+
+TAG = "C7:1F:D4:FE:63:82"
+
+
+def _track(
+    sequences: list[int],
+    data_format: int = 0x05,
+    **kwargs: Any,
+) -> dict[str, Any]:
+    tracker = CoverageTracker(**kwargs)
+    for sequence in sequences:
+        tracker.add(TAG, data_format, sequence)
+    return tracker.snapshot()[TAG]
+
+
+def test_counts_gaps():
+    stats = _track([10, 11, 13, 14, 20, 120])
+    assert stats["received"] == 6
+    assert stats["expected"] == 111
+    assert stats["lost"] == 105
+    assert stats["loss_rate"] == pytest.approx(105 / 111)
+    assert stats["gaps"]["buckets"] == [1, 2, 5, 10, 50, 100, 1000]
+    # One measurement missed, then five, then 99
+    assert stats["gaps"]["counts"] == [1, 0, 1, 0, 0, 1, 0, 0]
+
+
+def test_duplicates_and_late_arrivals():
+    stats = _track([1, 2, 2, 5, 3, 3, 4, 1, 6])
+    assert stats["received"] == 6
+    assert stats["expected"] == 6
+    assert stats["lost"] == 0
+    assert stats["late"] == 2
+    assert stats["duplicates"] == 3
+    assert stats["duplicate_rate"] == pytest.approx(3 / 9)
+
+
+def test_wraparound():
+    stats = _track([n % 256 for n in range(250, 300)], data_format=0x06)
+    assert stats["wraps"] == 1
+    assert stats["received"] == stats["expected"] == 50
+    assert stats["resets"] == 0
+
+
+def test_resets():
+    # A jump back beyond the reordering window is a reset, not a late arrival
+    stats = _track([1000, 1001, 5, 6])
+    assert stats["resets"] == 1
+    assert stats["received"] == stats["expected"] == 4
+    # Forward jumps beyond max_gap are resets too
+    stats = _track([1000, 1001, 5000, 5001], max_gap=100)
+    assert stats["resets"] == 1
+    assert stats["lost"] == 0
+    assert _track([1000, 1001, 5000, 5001])["lost"] == 3998
+
+
+def test_data_formats_counted_separately():
+    tracker = CoverageTracker()
+    for n in range(10):
+        tracker.add(TAG, 0x06, n)
+        tracker.add(TAG, 0xE1, 1000 + 2 * n)
+    tracker.add(TAG, 0x03, None)
+    tracker.add(TAG, 0xE1, None)
+    [stats] = tracker.snapshot().values()
+    assert stats["received"] == 20
+    assert stats["expected"] == 29
+    assert stats["gaps"]["counts"][0] == 9
+    assert len(tracker) == 1
+
+
+def test_add_advertisement():
+    tracker = CoverageTracker()
+    for sequence in (1, 2, 4):
+        tracker.add_advertisement(TAG, decode_advertisement(_df6(sequence, 2000)))  # type: ignore[arg-type]
+    tracker.add_advertisement("other", peek(E1_VALID_DATA))  # type: ignore[arg-type]
+    assert tracker.snapshot(TAG)[TAG]["lost"] == 1
+    assert tracker.snapshot("other")["other"]["received"] == 1
+    tracker.remove(TAG)
+    assert list(tracker.snapshot()) == ["other"]
+    assert tracker.snapshot(TAG) == {}
+
+
+def test_invalid_max_gap():
+    with pytest.raises(ValueError, match="max_gap must be at least 1, got 0"):
+        CoverageTracker(max_gap=0)
@@ -0,0 +1,182 @@
+import asyncio
+import random
+from typing import Any
+
+import pytest
+
+from ruuvitag_ble.core import decoder_classes
+from ruuvitag_ble.df3_decoder import DataFormat3Decoder
+from ruuvitag_ble.df5_decoder import DataFormat5Decoder
+from ruuvitag_ble.df6_decoder import DataFormat6Decoder
+from ruuvitag_ble.dfe1_decoder import DataFormatE1Decoder
+from ruuvitag_ble.encoders import encode, encode_df3, encode_df5, encode_df6, encode_e1
+from ruuvitag_ble.schema import SchemaDecoder
+from ruuvitag_ble.simulator import FleetSimulator, SimulatedAdvert
+from tests.test_e1 import E1_MAX_VALUES, E1_MIN_VALUES, E1_VALID_DATA
+from tests.test_v3 import V3_SENSOR_DATA, V3_SENSOR_DATA_SUBZERO
+from tests.test_v5 import V5_OUTDOOR_SENSOR_DATA
+from tests.test_v6 import (
+    V6_BASELINE_SENSOR_DATA,
+    V6_BREATH_HIGH_CO2_DATA,
+    V6_C_TEST_DATA,
+)
+
+
+def _values(decoder: SchemaDecoder) -> dict[str, Any]:
+    return {name: getattr(decoder, name) for name in decoder.format.names}
+
+
+@pytest.mark.parametrize(
+    "raw_data",
+    [
+        V3_SENSOR_DATA,
+        V3_SENSOR_DATA_SUBZERO,
+        V5_OUTDOOR_SENSOR_DATA,
+        V6_BASELINE_SENSOR_DATA,
+        V6_BREATH_HIGH_CO2_DATA,
+        V6_C_TEST_DATA,
+        E1_VALID_DATA,
+        E1_MAX_VALUES,
+        E1_MIN_VALUES,
+    ],
+)
+def test_test_vectors_round_trip(raw_data):
+    decoded = decoder_classes[raw_data[0]](raw_data)
+    assert encode(raw_data[0], **_values(decoded)) == raw_data
+
+
+@pytest.mark.parametrize("decoder_cls", decoder_classes.values())
+def test_fuzz_round_trip(decoder_cls):
+    # Decoding isn't injective (e.g. partly invalid acceleration vectors, DF6
+    # luminosity and values rounded below the format's resolution), but what
+    # decodes from an encoded payload must be what was encoded.
+    fmt = decoder_cls.format
+    rng = random.Random(fmt.data_format)
+    out_of_range = 0
+    for _ in range(2000):
+        raw_data = bytes([fmt.data_format]) + rng.randbytes(fmt.size - 1)
+        decoded = _values(decoder_cls(raw_data))
+        try:
+            encoded = fmt.encode(decoded)
+        except ValueError:
+            # A raw value at the end of its range, rounded up past it
+            out_of_range += 1
+            continue
+        assert _values(decoder_cls(encoded)) == decoded
+    assert out_of_range < 10
+
+
+def test_unavailable_values():
+    data = encode_df5(mac="C7:1F:D4:FE:63:82")
+    assert data == bytes.fromhex("058000ffffffff800080008000ffff000000C71FD4FE6382")
+    decoded = DataFormat5Decoder(data)
+    assert decoded.temperature_celsius is None
+    assert decoded.acceleration_vector_mg == (None, None, None)
+    assert decoded.battery_voltage_mv is None
+    assert decoded.tx_power_dbm is None
+    assert DataFormat3Decoder(encode_df3()).temperature_celsius is None
+    e1 = DataFormatE1Decoder(encode_e1(mac="C7:1F:D4:FE:63:82"))
+    assert (e1.voc_index, e1.nox_index) == (None, None)
+    assert e1.luminosity_lux is None
+    assert e1.measurement_sequence_number is None
+
+
+def test_split_flag_bits():
+    data = encode_df6(
+        voc_index=0x101,
+        nox_index=0x100,
+        sound_avg_dba=18,
+        mac="4C:88:4F",
+    )
+    assert (data[11], data[12], data[16]) == (0x80, 0x80, 0b0100_0000)
+    decoded = DataFormat6Decoder(data)
+    assert (decoded.voc_index, decoded.nox_index) == (0x101, 0x100)
+    data = encode_e1(
+        voc_index=2,
+        nox_index=1,
+        calibration_in_progress=True,
+        mac="C7:1F:D4:FE:63:82",
+    )
+    assert data[28] == 0b1000_0001
+
+
+def test_df3_temperature():
+    for temperature in (-127.99, -0.5, 0.0, 21.37, 127.99):
+        data = encode_df3(temperature_celsius=temperature)
+        assert DataFormat3Decoder(data).temperature_celsius == temperature
+    assert encode_df3(temperature_celsius=-0.0)[2:4] == b"\x80\x00"
+    assert encode_df3(temperature_celsius=1.999)[2:4] == b"\x02\x00"
+
+
+def test_invalid_values():
+    with pytest.raises(ValueError, match="mac is required"):
+        encode_df5()
+    with pytest.raises(ValueError, match="mac must be 3 bytes long"):
+        encode_df6(mac="C7:1F:D4:FE:63:82")
+    with pytest.raises(ValueError, match="co2_ppm out of range"):
+        encode_df6(co2_ppm=70000, mac="4C:88:4F")
+    with pytest.raises(ValueError, match="Value out of range for data format 5"):
+        encode_df5(temperature_celsius=200, mac="C7:1F:D4:FE:63:82")
+    with pytest.raises(ValueError, match="temperature_celsius out of range"):
+        encode_df3(temperature_celsius=128)
+    with pytest.raises(TypeError, match="Unknown values for data format 5: temp"):
+        encode_df5(temp=20, mac="C7:1F:D4:FE:63:82")
+    with pytest.raises(ValueError, match="Data format not supported: 0x02"):
+        encode(0x02)
+
+
+@pytest.mark.parametrize("data_format", decoder_classes)
+def test_simulator(data_format):
+    simulator = FleetSimulator(
+        100,
+        data_format=data_format,
+        rate=50,
+        duplicate_probability=0.2,
+        start=1700000000.0,
+        seed=1,
+    )
+    adverts = list(simulator.adverts(1000))
+    timestamps = [advert.timestamp for advert in adverts]
+    assert timestamps == sorted(timestamps)
+    assert 1700000000 < timestamps[0] < timestamps[-1] < 1700000000 + 1000 / 50 * 1.1
+    assert len({advert.address for advert in adverts}) == 100
+    unique = {(advert.address, advert.raw_data) for advert in adverts}
+    assert 0.1 < 1 - len(unique) / len(adverts) < 0.3
+    for advert in adverts:
+        decoded = decoder_classes[data_format](advert.raw_data)
+        assert decoded.temperature_celsius is not None
+        assert -40 < decoded.temperature_celsius < 85
+        if decoded.mac is not None:
+            assert advert.address.endswith(decoded.mac)
+    # The same seed gives the same traffic.
+    again = FleetSimulator(
+        100,
+        data_format=data_format,
+        rate=50,
+        duplicate_probability=0.2,
+        start=1700000000.0,
+        seed=1,
+    )
+    assert list(again.adverts(1000)) == adverts
+
+
+def test_simulator_sequence_numbers():
+    simulator = FleetSimulator(2, data_format=0x06, rate=1000, seed=0)
+    sequences = [
+        DataFormat6Decoder(advert.raw_data).measurement_sequence_number
+        for advert in simulator.adverts(600)
+        if advert.address == simulator.tags[0].address
+    ]
+    assert sequences == [i % 256 for i in range(len(sequences))]
+
+
+def test_simulator_realtime():
+    async def collect() -> tuple[list[SimulatedAdvert], float]:
+        simulator = FleetSimulator(5, rate=100, realtime=True, seed=0)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        adverts = [advert async for advert in simulator.async_adverts(10)]
+        return adverts, loop.time() - started
+
+    adverts, elapsed = asyncio.run(collect())
+    assert elapsed >= adverts[-1].timestamp - 0.01
@@ -0,0 +1,57 @@
+from ruuvitag_ble.dfe1_decoder import DataFormatE1Decoder
+from ruuvitag_ble.hci import decode_hci_event, manufacturer_data_span
+from tests.test_capture import (
+    ADDRESS,
+    _advertising_report,
+    _extended_advertising_report,
+    _le_meta_event,
+)
+from tests.test_e1 import E1_VALID_DATA
+from tests.test_v5 import V5_OUTDOOR_SENSOR_DATA
+from tests.test_v6 import V6_C_TEST_DATA
+
+
+def test_multiple_reports():
+    event = _le_meta_event(
+        0x02,
+        [
+            _advertising_report(V5_OUTDOOR_SENSOR_DATA, -70),
+            _advertising_report(b"\x07\x00", -71),  # Unsupported format
+            _advertising_report(V6_C_TEST_DATA, 127),  # RSSI not available
+        ],
+    )
+    v5, v6 = decode_hci_event(event)
+    assert (v5.address, v5.rssi) == (ADDRESS, -70)
+    assert v5.decoded.temperature_celsius == 7.2
+    assert (v6.address, v6.rssi) == (ADDRESS, None)
+    assert v6.decoded.mac == "4C:88:4F"
+
+
+def test_extended_report_in_memoryview():
+    event = _le_meta_event(
+        0x0D,
+        [
+            _extended_advertising_report(E1_VALID_DATA, -55),
+            _extended_advertising_report(E1_VALID_DATA[:20], -56),  # Too short
+        ],
+    )
+    buffer = bytearray(b"\x04" + event)
+    (reading,) = decode_hci_event(memoryview(buffer), 1)
+    assert reading.rssi == -55
+    assert isinstance(reading.decoded, DataFormatE1Decoder)
+    assert reading.decoded.temperature_celsius == 29.5
+
+
+def test_other_and_malformed_events():
+    assert decode_hci_event(b"\x0e\x04\x01\x0c\x20\x00") == []  # Command complete
+    event = _le_meta_event(0x02, [_advertising_report(V5_OUTDOOR_SENSOR_DATA, -70)])
+    assert decode_hci_event(event[:-1]) == []
+    assert decode_hci_event(event[:-1] + b"\x00") != []
+
+
+def test_manufacturer_data_span():
+    ad = b"\x02\x01\x06\x05\xff\x4c\x00\x01\x02\x04\xff\x99\x04\x05"
+    assert manufacturer_data_span(ad, 0, len(ad)) == (13, 14)
+    assert manufacturer_data_span(ad, 0, 9) is None
+    assert manufacturer_data_span(ad, 0, len(ad), 0x004C) == (7, 9)
+    assert manufacturer_data_span(b"\x00\x00", 0, 2) is None
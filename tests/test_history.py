@@ -0,0 +1,147 @@
+import statistics
+
+import pytest
+
+from ruuvitag_ble import RuuvitagBluetoothDeviceData
+from ruuvitag_ble.history import HistoryStore, RingBuffer
+from ruuvitag_ble.parser import decode_advertisement
+from tests.test_v5 import (
+    V5_OUTDOOR_SENSOR_DATA,
+    V5_OUTDOOR_SENSOR_DATA_INVALID_ACCEL,
+)
+from tests.test_v6 import V6_C_TEST_DATA
+from tests.utils import bytes_to_service_info
+
+
+def test_ring_buffer():
+    buffer = RingBuffer(4)
+    assert (buffer.first_offset, buffer.last_offset) == (None, None)
+    for offset in range(6):
+        buffer.append(offset * 10, offset / 2)
+    assert len(buffer) == 4
+    assert (buffer.first_offset, buffer.last_offset) == (20, 50)
+    assert list(buffer.range()) == [(20, 1.0), (30, 1.5), (40, 2.0), (50, 2.5)]
+    assert list(buffer.range(25, 50)) == [(30, 1.5), (40, 2.0)]
+    assert list(buffer.range(60)) == []
+    assert buffer.pop_before(40) == [1.0, 1.5]
+    assert list(buffer.range()) == [(40, 2.0), (50, 2.5)]
+    assert buffer.nbytes == 32
+    with pytest.raises(ValueError, match="capacity must be at least 1"):
+        RingBuffer(0)
+
+
+def test_ring_buffer_grows():
+    buffer = RingBuffer(20)
+    assert buffer.nbytes == 0
+    assert buffer.pop_before(10) == []
+    buffer.append(0, 0.0)
+    assert buffer.nbytes == 8 * 8
+    for offset in range(1, 8):
+        buffer.append(offset, offset)
+    # Wrap around before growing
+    assert buffer.pop_before(3) == [0.0, 1.0, 2.0]
+    for offset in range(8, 14):
+        buffer.append(offset, offset)
+    assert buffer.nbytes == 16 * 8
+    assert list(buffer.range()) == [(i, float(i)) for i in range(3, 14)]
+    for offset in range(14, 40):
+        buffer.append(offset, offset)
+    assert buffer.nbytes == 20 * 8
+    assert list(buffer.range()) == [(i, float(i)) for i in range(20, 40)]
+
+
+def test_store_ranges_and_eviction():
+    store = HistoryStore(5, resolution=1)
+    for second in range(8):
+        assert store.add("tag", "temperature", 1000 + second, 20 + second)
+    assert list(store.readings("tag", "temperature")) == [
+        (1003, 23.0),
+        (1004, 24.0),
+        (1005, 25.0),
+        (1006, 26.0),
+        (1007, 27.0),
+    ]
+    assert list(store.readings("tag", "temperature", 1004, 1006)) == [
+        (1004, 24.0),
+        (1005, 25.0),
+    ]
+    assert list(store.readings("tag", "humidity")) == []
+    # Too old for the series, or before the epoch
+    assert not store.add("tag", "temperature", 1006, 0)
+    assert not store.add("other", "temperature", 999, 0)
+    assert store.tags() == {"tag"}
+    assert store.keys("tag") == ["temperature"]
+    with pytest.raises(OverflowError):
+        store.add("tag", "temperature", 1000 + 2**32, 0)
+
+
+def test_memory_grows_with_readings():
+    store = HistoryStore(epoch=0)
+    for second in range(10):
+        store.add("tag", "temperature", second, 20)
+    store.add("tag", "battery", 0, 3000)
+    assert store.memory_usage() == (16 + 8) * 8
+
+
+def test_values_are_float32():
+    store = HistoryStore(epoch=0)
+    store.add("tag", "pressure", 10, 1013.25)
+    store.add("tag", "pressure", 20, 0.1)
+    (_, pressure), (_, small) = store.readings("tag", "pressure")
+    assert pressure == 1013.25
+    assert small == pytest.approx(0.1, rel=1e-7)
+    assert small != 0.1
+
+
+def test_downsampling():
+    store = HistoryStore(
+        6,
+        downsample=statistics.fmean,
+        downsample_interval=3,
+        coarse_capacity=2,
+        resolution=1,
+        epoch=0,
+    )
+    for second in range(12):
+        store.add("tag", "co2", second, second * 10)
+    # Full buffers make room by reducing their oldest interval of readings.
+    assert list(store.readings("tag", "co2")) == [
+        (0, 10.0),
+        (3, 40.0),
+        (6, 60.0),
+        (7, 70.0),
+        (8, 80.0),
+        (9, 90.0),
+        (10, 100.0),
+        (11, 110.0),
+    ]
+    for second in range(12, 15):
+        store.add("tag", "co2", second, second * 10)
+    # The coarse buffer keeps the latest intervals.
+    assert list(store.readings("tag", "co2", 0, 9)) == [
+        (3, 40.0),
+        (6, 70.0),
+    ]
+    assert store.memory_usage() == store.memory_usage("tag") == (6 + 2) * 8
+    with pytest.raises(ValueError, match="downsample_interval must be at least"):
+        HistoryStore(downsample=max, downsample_interval=0.01)
+
+
+def test_fed_by_the_parser():
+    store = HistoryStore(epoch=1700000000)
+    device = RuuvitagBluetoothDeviceData()
+    update = device.update(bytes_to_service_info(V5_OUTDOOR_SENSOR_DATA))
+    store.add_update("C7:1F:D4:FE:63:82", update, 1700000001.5)
+    decoded = decode_advertisement(V6_C_TEST_DATA)
+    assert decoded is not None
+    store.add_advertisement("4C:88:4F", decoded, 1700000002)
+    assert store.tags() == {"C7:1F:D4:FE:63:82", "4C:88:4F"}
+    assert list(store.readings("C7:1F:D4:FE:63:82", "temperature")) == [
+        (1700000001.5, 7.199999809265137),
+    ]
+    assert list(store.readings("4C:88:4F", "iaqs")) == [(1700000002, 81.0)]
+    # Sensors without a value have no history.
+    update = device.update(bytes_to_service_info(V5_OUTDOOR_SENSOR_DATA_INVALID_ACCEL))
+    store.add_update("invalid", update, 1700000003)
+    assert "temperature" in store.keys("invalid")
+    assert "acceleration_x" not in store.keys("invalid")
@@ -1,4 +1,8 @@
-from ruuvitag_ble.iaqs import calculate_iaqs
+import random
+
+import pytest
+
+from ruuvitag_ble.iaqs import calculate_iaqs, calculate_iaqs_batch, use_lookup_table
 
 
 def test_ruuvi_iaqs_calculation():
@@ -10,3 +14,42 @@ def test_ruuvi_iaqs_calculation():
     assert calculate_iaqs(450, 5.0) > 90  # type: ignore[operator]
     assert calculate_iaqs(633, 11.5) < 90  # type: ignore[operator]
     assert calculate_iaqs(1000, 35.0) < 70  # type: ignore[operator]
+
+
+def _readings() -> tuple[list[int | None], list[float | None]]:
+    rng = random.Random(0)
+    co2_values: list[int | None] = [rng.randrange(300, 2600) for _ in range(5000)]
+    pm25_values: list[float | None] = [
+        round(rng.uniform(0, 80), rng.choice((1, 1, 3))) for _ in range(5000)
+    ]
+    co2_values[10] = None
+    pm25_values[20] = None
+    # Clamped values, and a score of exactly 99.5 (rounded half to even)
+    co2_values += [420, 1360, 2300, 420, 420]
+    pm25_values += [30.0, 0.0, 0.0, -1.0, 0.3]
+    return co2_values, pm25_values
+
+
+@pytest.mark.parametrize("use_numpy", [False, True], ids=["python", "numpy"])
+def test_batch_matches_scalar(use_numpy):
+    if use_numpy:
+        pytest.importorskip("numpy")
+    co2_values, pm25_values = _readings()
+    expected = list(map(calculate_iaqs, co2_values, pm25_values))
+    assert expected[-5:] == [50, 50, 0, 100, 100]
+    assert (
+        calculate_iaqs_batch(co2_values, pm25_values, use_numpy=use_numpy) == expected
+    )
+    assert calculate_iaqs_batch(iter([500]), iter([0.4])) == [96]
+
+
+def test_lookup_table_matches_calculation():
+    co2_values, pm25_values = _readings()
+    expected = list(map(calculate_iaqs, co2_values, pm25_values))
+    use_lookup_table()
+    try:
+        assert list(map(calculate_iaqs, co2_values, pm25_values)) == expected
+        assert calculate_iaqs(500, 0.4) == 96
+        assert calculate_iaqs(500.5, 0.4) == 96
+    finally:
+        use_lookup_table(False)
@@ -0,0 +1,69 @@
+import pytest
+
+from ruuvitag_ble import RuuvitagBluetoothDeviceData
+from ruuvitag_ble.core import decoder_classes
+from ruuvitag_ble.metrics import LATENCY_BUCKETS_US, DecodeMetrics
+from tests.test_e1 import E1_VALID_DATA
+from tests.test_v5 import V5_OUTDOOR_SENSOR_DATA
+from tests.test_v6 import V6_BASELINE_SENSOR_DATA
+from tests.utils import bytes_to_service_info
+
+
+def test_metrics_disabled_by_default():
+    device = RuuvitagBluetoothDeviceData()
+    assert device.metrics is None
+    assert "update" not in vars(device)
+
+
+def test_counters():
+    device = RuuvitagBluetoothDeviceData(metrics=True)
+    for payload in (
+        V5_OUTDOOR_SENSOR_DATA,
+        V5_OUTDOOR_SENSOR_DATA,  # From the cache, still counted
+        V6_BASELINE_SENSOR_DATA,
+        E1_VALID_DATA,
+        b"\x07\x00\x00",  # Unsupported
+    ):
+        device.update(bytes_to_service_info(payload))
+    without_ruuvi_data = bytes_to_service_info(b"")
+    without_ruuvi_data.manufacturer_data = {76: b"\x02\x15"}
+    device.update(without_ruuvi_data)
+    for malformed in (b"\x05\x00", b""):
+        with pytest.raises((ValueError, IndexError)):
+            device.update(bytes_to_service_info(malformed))
+    assert device.metrics is not None
+    snapshot = device.metrics.snapshot()
+    assert snapshot["decoded"] == {0x05: 2, 0x06: 1, 0xE1: 1}
+    assert (snapshot["missing"], snapshot["unsupported"]) == (1, 1)
+    assert (snapshot["malformed"], snapshot["errors"]) == (2, 0)
+    latency = snapshot["latency"]
+    assert latency["count"] == 8
+    assert sum(latency["counts"]) == 8
+    assert latency["mean_us"] > 0
+
+
+def test_errors(monkeypatch):
+    def fail(raw_data: bytes) -> None:
+        raise RuntimeError("Decoder bug")
+
+    # Patched where it is looked up at runtime, which holds for compiled builds
+    monkeypatch.setitem(decoder_classes, 0x05, fail)
+    device = RuuvitagBluetoothDeviceData(metrics=True)
+    with pytest.raises(RuntimeError):
+        device.update(bytes_to_service_info(V5_OUTDOOR_SENSOR_DATA))
+    assert device.metrics is not None
+    assert device.metrics.errors == 1
+    assert device.metrics.decoded == {}
+
+
+def test_latency_buckets():
+    metrics = DecodeMetrics()
+    for elapsed_us in (1, 5, 6, 4999, 5000, 5001, 60000):
+        metrics.observe_latency(elapsed_us * 1000)
+    counts = metrics.snapshot()["latency"]["counts"]
+    assert len(counts) == len(LATENCY_BUCKETS_US) + 1
+    assert (counts[0], counts[1], counts[-2], counts[-1]) == (2, 1, 2, 2)
+    metrics.reset()
+    snapshot = metrics.snapshot()
+    assert snapshot["latency"]["count"] == 0
+    assert snapshot["latency"]["mean_us"] is None
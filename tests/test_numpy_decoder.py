@@ -0,0 +1,183 @@
+from typing import Any
+
+import pytest
+
+from ruuvitag_ble.df5_decoder import DataFormat5Decoder
+from ruuvitag_ble.df6_decoder import DataFormat6Decoder
+from ruuvitag_ble.dfe1_decoder import DataFormatE1Decoder
+from ruuvitag_ble.iaqs import calculate_iaqs
+from tests.test_e1 import (
+    E1_INVALID_VALUES,
+    E1_MAX_VALUES,
+    E1_MIN_VALUES,
+    E1_VALID_DATA,
+)
+from tests.test_v5 import (
+    V5_OUTDOOR_SENSOR_DATA,
+    V5_OUTDOOR_SENSOR_DATA_INVALID_ACCEL,
+)
+from tests.test_v6 import (
+    V6_BASELINE_SENSOR_DATA,
+    V6_BREATH_HIGH_CO2_DATA,
+    V6_C_TEST_DATA,
+    V6_LOW_LUMINOSITY_DATA,
+)
+
+np = pytest.importorskip("numpy")
+numpy_decoder = pytest.importorskip("ruuvitag_ble.numpy_decoder")
+
+
+@pytest.mark.parametrize(
+    ("data_format", "decoder_cls", "payloads"),
+    [
+        (
+            0x05,
+            DataFormat5Decoder,
+            [V5_OUTDOOR_SENSOR_DATA, V5_OUTDOOR_SENSOR_DATA_INVALID_ACCEL],
+        ),
+        (
+            0x06,
+            DataFormat6Decoder,
+            [
+                V6_BASELINE_SENSOR_DATA,
+                V6_BREATH_HIGH_CO2_DATA,
+                V6_C_TEST_DATA,
+                V6_LOW_LUMINOSITY_DATA,
+                bytes.fromhex("068000" + "FF" * 17),
+                bytes.fromhex("0680010000000000000000000000000000000000"),
+            ],
+        ),
+        (
+            0xE1,
+            DataFormatE1Decoder,
+            [E1_VALID_DATA, E1_MAX_VALUES, E1_MIN_VALUES, E1_INVALID_VALUES],
+        ),
+    ],
+)
+def test_numpy_matches_decoders(data_format, decoder_cls, payloads):
+    columns = numpy_decoder.decoders[data_format](b"".join(payloads))
+    for index, raw_data in enumerate(payloads):
+        decoder = decoder_cls(raw_data)
+        for name, column in columns.items():
+            expected = getattr(decoder, name)
+            value = column[index]
+            if name == "mac":
+                assert value == int(expected.replace(":", ""), 16)
+            elif expected is None or expected == (None, None, None):
+                assert np.ma.getmaskarray(value).all(), name
+            elif isinstance(expected, tuple):
+                assert tuple(value) == expected, name
+            else:
+                assert value == expected, name
+
+
+def _records(dtype: Any, data_format: int) -> Any:
+    records = np.zeros(0x10000, dtype=dtype)
+    records["data_format"] = data_format
+    return records
+
+
+def _assert_exact(
+    columns: dict[str, Any],
+    decoder_cls: type[Any],
+    records: Any,
+    names: list[str],
+) -> None:
+    payloads = [record.tobytes() for record in records]
+    decoders = [decoder_cls(raw_data) for raw_data in payloads]
+    for name in names:
+        expected = [getattr(decoder, name) for decoder in decoders]
+        assert columns[name].tolist() == expected, name
+
+
+def test_numpy_exact_df5():
+    records = _records(numpy_decoder.DF5_DTYPE, 0x05)
+    raw = np.arange(0x10000)
+    records["temperature"] = raw.astype(np.uint16).view(np.int16)
+    records["humidity"] = raw
+    records["pressure"] = raw
+    names = ["temperature_celsius", "humidity_percentage", "pressure_hpa"]
+    columns = numpy_decoder.decode_df5(records.tobytes())
+    _assert_exact(columns, DataFormat5Decoder, records, names)
+
+
+def test_numpy_exact_df6():
+    records = _records(numpy_decoder.DF6_DTYPE, 0x06)
+    raw = np.arange(0x10000)
+    records["temperature"] = raw.astype(np.uint16).view(np.int16)
+    records["humidity"] = raw
+    records["pressure"] = raw
+    records["pm25"] = raw
+    # All 9-bit sound values, the lowest bit being a flag
+    records["sound"] = (raw >> 1) & 0xFF
+    records["flags"] = (raw & 1) << 4
+    names = [
+        "temperature_celsius",
+        "humidity_percentage",
+        "pressure_hpa",
+        "pm25_ug_m3",
+        "sound_avg_dba",
+    ]
+    columns = numpy_decoder.decode_df6(records.tobytes())
+    _assert_exact(columns, DataFormat6Decoder, records, names)
+
+
+def test_numpy_exact_e1():
+    records = _records(numpy_decoder.E1_DTYPE, 0xE1)
+    raw = np.arange(0x10000)
+    records["temperature"] = raw.astype(np.uint16).view(np.int16)
+    for name in ("humidity", "pressure", "pm1", "pm25", "pm4", "pm10"):
+        records[name] = raw
+    # Luminosity has 24 bits; cover its range in steps of 257
+    luminosity = raw * 257
+    records["luminosity"] = np.stack(
+        [luminosity >> 16, luminosity >> 8 & 0xFF, luminosity & 0xFF],
+        axis=-1,
+    )
+    names = [
+        "temperature_celsius",
+        "humidity_percentage",
+        "pressure_hpa",
+        "pm1_ug_m3",
+        "pm25_ug_m3",
+        "pm4_ug_m3",
+        "pm10_ug_m3",
+        "luminosity_lux",
+    ]
+    columns = numpy_decoder.decode_e1(records.tobytes())
+    _assert_exact(columns, DataFormatE1Decoder, records, names)
+
+
+def test_numpy_nan_filled():
+    columns = numpy_decoder.decode_e1(E1_VALID_DATA + E1_INVALID_VALUES)
+    temperatures = columns["temperature_celsius"].filled(np.nan)
+    assert temperatures[0] == 29.5
+    assert np.isnan(temperatures[1])
+
+
+def test_numpy_bad_data():
+    with pytest.raises(ValueError):
+        numpy_decoder.decode_df6(V6_C_TEST_DATA + V6_C_TEST_DATA[:10])
+    with pytest.raises(ValueError):
+        numpy_decoder.decode_df5(V5_OUTDOOR_SENSOR_DATA + E1_VALID_DATA[:24])
+
+
+def test_calculate_iaqs_array():
+    buffer = V6_BASELINE_SENSOR_DATA + V6_BREATH_HIGH_CO2_DATA + V6_C_TEST_DATA
+    columns = numpy_decoder.decode_df6(buffer)
+    scores = numpy_decoder.calculate_iaqs_array(
+        columns["co2_ppm"],
+        columns["pm25_ug_m3"],
+    )
+    assert scores.tolist() == [
+        calculate_iaqs(d.co2_ppm, d.pm25_ug_m3)
+        for d in map(
+            DataFormat6Decoder,
+            [V6_BASELINE_SENSOR_DATA, V6_BREATH_HIGH_CO2_DATA, V6_C_TEST_DATA],
+        )
+    ]
+    masked = numpy_decoder.calculate_iaqs_array(
+        np.ma.MaskedArray([500, 500, 500], mask=[False, True, False]),
+        [0.4, 0.4, float("nan")],
+    )
+    assert masked.tolist() == [96, None, None]
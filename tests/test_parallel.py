@@ -0,0 +1,182 @@
+import sys
+import threading
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from home_assistant_bluetooth import BluetoothServiceInfo
+from sensor_state_data import SensorUpdate
+
+from ruuvitag_ble import RuuvitagBluetoothDeviceData, iaqs
+from ruuvitag_ble.batch import decode_batch
+from ruuvitag_ble.core import decode
+from ruuvitag_ble.parallel import ThreadPoolIngestor
+from ruuvitag_ble.parser import decode_advertisement
+from ruuvitag_ble.peek import peek
+from ruuvitag_ble.registry import FleetRegistry
+from ruuvitag_ble.simulator import FleetSimulator
+from tests.test_parser import _df6
+from tests.utils import KEY_TEMPERATURE, bytes_to_service_info
+
+THREADS = 8
+
+
+def _service_infos(tags: int, count: int, seed: int) -> list[BluetoothServiceInfo]:
+    adverts = FleetSimulator(
+        tags,
+        data_format=0x06 if seed % 2 else 0xE1,
+        duplicate_probability=0.2,
+        seed=seed,
+    ).adverts(count)
+    service_infos = []
+    for advert in adverts:
+        service_info = bytes_to_service_info(advert.raw_data, advert.rssi)
+        service_info.address = advert.address
+        service_infos.append(service_info)
+    return service_infos
+
+
+def _factory() -> RuuvitagBluetoothDeviceData:
+    # State that depends on the order of each tag's advertisements
+    return RuuvitagBluetoothDeviceData(deduplicate=True, delta_updates=True)
+
+
+def _sequential(service_infos: list[BluetoothServiceInfo]) -> list[SensorUpdate | None]:
+    registry = FleetRegistry(factory=_factory)
+    return [registry.update(service_info) for service_info in service_infos]
+
+
+@pytest.fixture
+def contended() -> Iterator[None]:
+    """Switch threads as often as possible, to surface races under the GIL."""
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+
+def _run_threads(target: Callable[[int], None]) -> None:
+    barrier = threading.Barrier(THREADS)
+    errors: list[BaseException] = []
+
+    def run(index: int) -> None:
+        barrier.wait()
+        try:
+            target(index)
+        except BaseException as err:  # pragma: no cover
+            errors.append(err)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+
+
+def test_matches_sequential_updates():
+    service_infos = _service_infos(32, 2000, seed=1)
+    service_infos.append(bytes_to_service_info(b"\x07\x00"))
+    expected = _sequential(service_infos)
+    with ThreadPoolIngestor(workers=4, factory=_factory) as ingestor:
+        updates = [
+            update
+            for start in range(0, len(service_infos), 300)
+            for update in ingestor.update_many(service_infos[start : start + 300])
+        ]
+        assert len(ingestor) == 32
+        assert len(ingestor.registries) == 16
+    assert updates == expected
+    assert updates[-1] is None
+
+
+def test_updates_of_a_tag_in_one_batch():
+    service_infos = [
+        bytes_to_service_info(_df6(sequence, temperature))
+        for sequence, temperature in ((1, 2000), (2, 2200), (3, 2400))
+    ]
+    with ThreadPoolIngestor(workers=2) as ingestor:
+        updates = ingestor.update_many(service_infos)
+    assert [
+        update.entity_values[KEY_TEMPERATURE].native_value
+        for update in updates
+        if update is not None
+    ] == [10.0, 11.0, 12.0]
+
+
+@pytest.mark.usefixtures("contended")
+def test_concurrent_batches():
+    # Each thread feeds its own tags, so their expected updates are known.
+    batches = [_service_infos(8, 500, seed=seed) for seed in range(THREADS)]
+    expected = [_sequential(service_infos) for service_infos in batches]
+    results: list[list[SensorUpdate | None]] = [[] for _ in range(THREADS)]
+    ingestor = ThreadPoolIngestor(workers=4, partitions=5, factory=_factory)
+
+    def ingest(index: int) -> None:
+        service_infos = batches[index]
+        for start in range(0, len(service_infos), 25):
+            chunk = service_infos[start : start + 25]
+            results[index] += ingestor.update_many(chunk)
+
+    with ingestor:
+        _run_threads(ingest)
+    assert results == expected
+    assert len(ingestor) == 8 * THREADS
+
+
+@pytest.mark.usefixtures("contended")
+def test_stateless_decoding_from_threads():
+    payloads = [
+        service_info.manufacturer_data[0x0499]
+        for service_info in _service_infos(16, 500, seed=1)
+        + _service_infos(16, 500, seed=2)
+    ]
+    expected = (
+        [repr(decode(payload)) for payload in payloads],
+        [decode_advertisement(payload) for payload in payloads],
+        [peek(payload) for payload in payloads],
+        decode_batch(payloads),
+    )
+    iaqs.use_lookup_table()
+    table = iaqs._table
+    stop = threading.Event()
+
+    def toggle_table() -> None:
+        # Swap the IAQS lookup table in and out under the decoding threads.
+        while not stop.is_set():
+            iaqs._table = None if iaqs._table else table
+
+    def check(index: int) -> None:
+        for _ in range(3):
+            assert (
+                [repr(decode(payload)) for payload in payloads],
+                [decode_advertisement(payload) for payload in payloads],
+                [peek(payload) for payload in payloads],
+                decode_batch(payloads),
+            ) == expected
+
+    toggler = threading.Thread(target=toggle_table)
+    toggler.start()
+    try:
+        _run_threads(check)
+    finally:
+        stop.set()
+        toggler.join()
+        iaqs.use_lookup_table(False)
+
+
+def test_shared_executor_and_options():
+    with ThreadPoolExecutor(2) as executor:
+        ingestor = ThreadPoolIngestor(executor=executor, partitions=3, max_tags=5)
+        ingestor.update_many(_service_infos(20, 200, seed=3))
+        assert [registry.max_tags for registry in ingestor.registries] == [2, 2, 2]
+        assert len(ingestor) <= 6
+        ingestor.close()
+        # The executor belongs to the caller and is still running
+        assert executor.submit(len, "abc").result() == 3
+    service_info = _service_infos(1, 1, seed=3)[0]
+    assert ingestor.partition(service_info) == ingestor.partition(service_info)
+    with pytest.raises(ValueError, match="partitions must be at least 1, got 0"):
+        ThreadPoolIngestor(partitions=0)
+    with pytest.raises(ValueError, match="max_tags must be at least 1, got 0"):
+        ThreadPoolIngestor(max_tags=0)
@@ -0,0 +1,154 @@
+from sensor_state_data import DeviceKey
+
+from ruuvitag_ble import RuuvitagBluetoothDeviceData
+from ruuvitag_ble.parser import decode_advertisement
+from tests.test_e1 import E1_VALID_DATA
+from tests.test_v5 import (
+    V5_OUTDOOR_SENSOR_DATA,
+    V5_OUTDOOR_SENSOR_DATA_INVALID_ACCEL,
+)
+from tests.test_v6 import V6_BASELINE_SENSOR_DATA, V6_C_TEST_DATA
+from tests.utils import (
+    KEY_SIGNAL_STRENGTH,
+    KEY_TEMPERATURE,
+    bytes_to_service_info,
+)
+
+
+def test_cache_hits_and_misses():
+    device = RuuvitagBluetoothDeviceData()
+    first = device.update(bytes_to_service_info(V5_OUTDOOR_SENSOR_DATA))
+    second = device.update(bytes_to_service_info(V5_OUTDOOR_SENSOR_DATA))
+    assert (device.cache_hits, device.cache_misses) == (1, 1)
+    assert second.entity_values == first.entity_values
+    assert second.entity_values[KEY_TEMPERATURE].native_value == 7.2
+
+
+def test_cache_is_bounded():
+    device = RuuvitagBluetoothDeviceData(cache_size=2)
+    for payload in (
+        V5_OUTDOOR_SENSOR_DATA,
+        V5_OUTDOOR_SENSOR_DATA_INVALID_ACCEL,
+        V6_BASELINE_SENSOR_DATA,
+        V5_OUTDOOR_SENSOR_DATA,
+    ):
+        device.update(bytes_to_service_info(payload))
+    assert (device.cache_hits, device.cache_misses) == (0, 4)
+    device.update(bytes_to_service_info(V5_OUTDOOR_SENSOR_DATA))
+    assert device.cache_hits == 1
+    device.clear_cache()
+    device.update(bytes_to_service_info(V5_OUTDOOR_SENSOR_DATA))
+    assert device.cache_misses == 5
+
+
+def test_cache_disabled():
+    device = RuuvitagBluetoothDeviceData(cache_size=0)
+    for _ in range(3):
+        up = device.update(bytes_to_service_info(E1_VALID_DATA))
+    assert (device.cache_hits, device.cache_misses) == (0, 0)
+    assert up.entity_values[KEY_TEMPERATURE].native_value == 29.5
+
+
+def test_decode_advertisement():
+    decoded = decode_advertisement(V6_C_TEST_DATA)
+    assert decoded is not None
+    assert decoded.mac == "4C:88:4F"
+    assert ("iaqs", "aqi", None, 81) in decoded.sensors
+    assert decode_advertisement(b"\x07\x00") is None
+
+
+def _df6(sequence: int, temperature: int) -> bytes:
+    data = bytearray(V6_C_TEST_DATA)
+    data[1:3] = temperature.to_bytes(2, "big", signed=True)
+    data[15] = sequence
+    return bytes(data)
+
+
+def test_deduplicate_repeats_and_stale(monkeypatch):
+    now = 1000.0
+    monkeypatch.setattr("ruuvitag_ble.parser.monotonic", lambda: now)
+    device = RuuvitagBluetoothDeviceData(deduplicate=True)
+
+    def temperature(payload: bytes) -> float:
+        up = device.update(bytes_to_service_info(payload))
+        return up.entity_values[KEY_TEMPERATURE].native_value  # type: ignore[return-value]
+
+    assert temperature(_df6(255, 2000)) == 10.0
+    assert temperature(_df6(255, 2200)) == 10.0  # repeat
+    assert temperature(_df6(0, 2400)) == 12.0  # wrapped around
+    assert temperature(_df6(255, 2600)) == 12.0  # stale
+    now += 10
+    assert temperature(_df6(255, 2800)) == 14.0  # stale, but outside window
+    assert temperature(_df6(255, 3000)) == 14.0  # repeat, even outside window
+
+
+def test_deduplicate_off_by_default():
+    device = RuuvitagBluetoothDeviceData()
+    device.update(bytes_to_service_info(_df6(1, 2000)))
+    up = device.update(bytes_to_service_info(_df6(1, 2200)))
+    assert up.entity_values[KEY_TEMPERATURE].native_value == 11.0
+
+
+def test_deduplicate_prefer_strongest_rssi():
+    device = RuuvitagBluetoothDeviceData(
+        deduplicate=True,
+        prefer_strongest_rssi=True,
+    )
+    payload = _df6(7, 2000)
+    for rssi, expected in ((-70, -70), (-50, -50), (-80, -50), (-60, -50)):
+        up = device.update(bytes_to_service_info(payload, rssi=rssi))
+        assert up.entity_values[KEY_SIGNAL_STRENGTH].native_value == expected
+    up = device.update(bytes_to_service_info(_df6(8, 2000), rssi=-90))
+    assert up.entity_values[KEY_SIGNAL_STRENGTH].native_value == -90
+
+
+def test_signal_strength_after_non_ruuvi_advert():
+    device = RuuvitagBluetoothDeviceData(
+        deduplicate=True,
+        prefer_strongest_rssi=True,
+    )
+    payload = _df6(7, 2000)
+    device.update(bytes_to_service_info(payload, rssi=-50))
+    device.update(bytes_to_service_info(payload, rssi=-80))  # suppressed
+    service_info = bytes_to_service_info(b"", rssi=-40)
+    service_info.manufacturer_data = {0x004C: b"\x02\x15"}
+    up = device.update(service_info)
+    assert up.entity_values[KEY_SIGNAL_STRENGTH].native_value == -40
+
+
+def test_delta_updates(monkeypatch):
+    now = 1000.0
+    monkeypatch.setattr("ruuvitag_ble.parser.monotonic", lambda: now)
+    device = RuuvitagBluetoothDeviceData(
+        delta_updates=True,
+        deadbands={"temperature": 0.05},
+        max_silence=60,
+    )
+
+    def update(temperature: int, rssi: int = -60) -> dict[DeviceKey, object]:
+        up = device.update(bytes_to_service_info(_df6(1, temperature), rssi=rssi))
+        assert up.entity_values.keys() == up.entity_descriptions.keys()
+        return {key: value.native_value for key, value in up.entity_values.items()}
+
+    first = update(2000)
+    assert first[KEY_TEMPERATURE] == 10.0
+    assert KEY_SIGNAL_STRENGTH in first
+    assert update(2000) == {}
+    assert update(2008) == {}  # 10.04 °C, within the deadband
+    assert update(2012) == {KEY_TEMPERATURE: 10.06}
+    assert update(2012, rssi=-61) == {KEY_SIGNAL_STRENGTH: -61}
+    now += 60
+    assert update(2012, rssi=-61) == first | {
+        KEY_TEMPERATURE: 10.06,
+        KEY_SIGNAL_STRENGTH: -61,
+    }
+
+
+def test_delta_updates_none_values():
+    device = RuuvitagBluetoothDeviceData(delta_updates=True, max_silence=None)
+    data = bytearray(_df6(1, 2000))
+    device.update(bytes_to_service_info(bytes(data)))
+    data[1:3] = b"\x80\x00"  # Temperature not available
+    up = device.update(bytes_to_service_info(bytes(data)))
+    assert up.entity_values[KEY_TEMPERATURE].native_value is None
+    assert len(up.entity_values) == 1
@@ -0,0 +1,51 @@
+import pytest
+
+from ruuvitag_ble.core import decoder_classes
+from ruuvitag_ble.peek import peek
+from tests.test_e1 import E1_INVALID_VALUES, E1_VALID_DATA
+from tests.test_v3 import V3_SENSOR_DATA
+from tests.test_v5 import V5_OUTDOOR_SENSOR_DATA
+from tests.test_v6 import V6_BASELINE_SENSOR_DATA, V6_C_TEST_DATA
+
+
+@pytest.mark.parametrize(
+    "raw_data",
+    [
+        V3_SENSOR_DATA,
+        V5_OUTDOOR_SENSOR_DATA,
+        V6_BASELINE_SENSOR_DATA,
+        V6_C_TEST_DATA,
+        E1_VALID_DATA,
+        E1_INVALID_VALUES,
+    ],
+)
+def test_peek_matches_decoding(raw_data):
+    peeked = peek(memoryview(raw_data))
+    assert peeked is not None
+    decoded = decoder_classes[raw_data[0]](raw_data)
+    assert peeked.data_format == raw_data[0]
+    assert peeked.mac == decoded.mac
+    assert peeked.measurement_sequence_number == getattr(
+        decoded,
+        "measurement_sequence_number",
+        None,
+    )
+    assert repr(peeked.decode()) == repr(decoded)
+
+
+def test_peek_header_fields():
+    peeked = peek(E1_VALID_DATA)
+    assert peeked is not None
+    assert (peeked.mac, peeked.measurement_sequence_number) == (
+        "CB:B8:33:4C:88:4F",
+        0xDECDEE,
+    )
+    peeked = peek(V6_C_TEST_DATA)
+    assert peeked is not None
+    assert (peeked.mac, peeked.measurement_sequence_number) == ("4C:88:4F", 0xCD)
+
+
+def test_peek_unsupported():
+    assert peek(b"") is None
+    assert peek(b"\x07\x00\x00") is None
+    assert peek(V5_OUTDOOR_SENSOR_DATA[:20]) is None
@@ -0,0 +1,118 @@
+import asyncio
+from collections.abc import AsyncIterator
+
+import pytest
+from sensor_state_data import SensorUpdate
+
+from ruuvitag_ble.parser import DecodedAdvertisement
+from ruuvitag_ble.pipeline import Advertisement, IngestionPipeline, Reading
+from tests.test_parser import _df6
+from tests.utils import KEY_TEMPERATURE, bytes_to_service_info
+
+
+async def _source(
+    advertisements: list[Advertisement],
+    error: Exception | None = None,
+) -> AsyncIterator[Advertisement]:
+    for advertisement in advertisements:
+        yield advertisement
+        await asyncio.sleep(0)
+    if error is not None:
+        raise error
+
+
+def _sequence_numbers(readings: list[Reading]) -> list[int | None]:
+    return [
+        r.measurement_sequence_number
+        for r in readings
+        if isinstance(r, DecodedAdvertisement)
+    ]
+
+
+def test_decodes_service_infos_and_raw_data():
+    async def run() -> list[Reading]:
+        source = _source(
+            [bytes_to_service_info(_df6(1, 2000)), _df6(2, 2000), b"\x06\x00"],
+        )
+        async with IngestionPipeline(source) as pipeline:
+            readings = [reading async for reading in pipeline]
+        assert (pipeline.received, pipeline.errors, pipeline.dropped) == (3, 1, 0)
+        return readings
+
+    update, decoded = asyncio.run(run())
+    assert isinstance(update, SensorUpdate)
+    assert update.entity_values[KEY_TEMPERATURE].native_value == 10.0
+    assert _sequence_numbers([decoded]) == [2]
+
+
+def test_queued_updates_keep_their_values():
+    async def run() -> list[Reading]:
+        source = _source(
+            [
+                bytes_to_service_info(_df6(sequence, temperature))
+                for sequence, temperature in ((1, 2000), (2, 2200), (3, 2400))
+            ],
+        )
+        pipeline = IngestionPipeline(source)
+        pipeline.start()
+        for _ in range(10):  # Let the consumer task queue them all
+            await asyncio.sleep(0)
+        assert pipeline.received == 3
+        return [reading async for reading in pipeline]
+
+    assert [
+        reading.entity_values[KEY_TEMPERATURE].native_value
+        for reading in asyncio.run(run())
+        if isinstance(reading, SensorUpdate)
+    ] == [10.0, 11.0, 12.0]
+
+
+def test_decodes_bytearray_and_memoryview():
+    async def run() -> list[Reading]:
+        source = _source([bytearray(_df6(1, 2000)), memoryview(_df6(2, 2000))])
+        async with IngestionPipeline(source) as pipeline:
+            return [reading async for reading in pipeline]
+
+    assert _sequence_numbers(asyncio.run(run())) == [1, 2]
+
+
+@pytest.mark.parametrize(
+    ("overflow", "expected"),
+    [
+        ("drop_oldest", [7, 8, 9]),
+        ("drop_newest", [0, 1, 2]),
+        ("block", list(range(10))),
+    ],
+)
+def test_overflow(overflow, expected):
+    async def run() -> list[Reading]:
+        source = _source([_df6(i, 2000) for i in range(10)])
+        pipeline = IngestionPipeline(source, queue_size=3, overflow=overflow)
+        pipeline.start()
+        for _ in range(30):  # Let the consumer task run ahead
+            await asyncio.sleep(0)
+        assert pipeline.depth == 3
+        assert pipeline.max_depth == 3
+        assert pipeline.dropped == 10 - len(expected)
+        return [reading async for reading in pipeline]
+
+    assert _sequence_numbers(asyncio.run(run())) == expected
+
+
+def test_source_error_is_raised():
+    async def run() -> None:
+        pipeline = IngestionPipeline(_source([_df6(1, 2000)], OSError("gone")))
+        assert _sequence_numbers([await pipeline.__anext__()]) == [1]
+        with pytest.raises(OSError, match="gone"):
+            await pipeline.__anext__()
+        with pytest.raises(StopAsyncIteration):
+            await pipeline.__anext__()
+
+    asyncio.run(run())
+
+
+def test_invalid_options():
+    with pytest.raises(ValueError, match="queue_size"):
+        IngestionPipeline(_source([]), queue_size=0)
+    with pytest.raises(ValueError, match="Unknown overflow policy"):
+        IngestionPipeline(_source([]), overflow="drop_all")  # type: ignore[arg-type]
@@ -0,0 +1,106 @@
+import pytest
+from home_assistant_bluetooth import BluetoothServiceInfo
+
+from ruuvitag_ble import RuuvitagBluetoothDeviceData
+from ruuvitag_ble.encoders import encode_e1
+from ruuvitag_ble.registry import FleetRegistry
+from tests.test_parser import _df6
+from tests.test_v5 import V5_OUTDOOR_SENSOR_DATA
+from tests.utils import KEY_TEMPERATURE, bytes_to_service_info
+
+
+def _tag(mac_suffix: int, temperature: int = 2000) -> BluetoothServiceInfo:
+    data = bytearray(_df6(0, temperature))
+    data[19] = mac_suffix
+    return bytes_to_service_info(bytes(data))
+
+
+def test_routes_to_per_tag_parsers():
+    registry = FleetRegistry()
+    first = registry.update(_tag(1, 2000))
+    second = registry.update(_tag(2, 2400))
+    assert first is not None
+    assert second is not None
+    assert first.entity_values[KEY_TEMPERATURE].native_value == 10.0
+    assert second.entity_values[KEY_TEMPERATURE].native_value == 12.0
+    assert list(registry) == ["4C:88:01", "4C:88:02"]
+    # Keyed by the MAC the tag broadcasts, not the advertiser address
+    registry.update(bytes_to_service_info(V5_OUTDOOR_SENSOR_DATA))
+    assert "3F:EF:AF" in registry
+    parser = registry.get("4C:88:01")
+    assert isinstance(parser, RuuvitagBluetoothDeviceData)
+    assert parser is not registry.get("4C:88:02")
+    assert registry.created == 3
+
+
+def test_data_formats_of_one_tag():
+    registry = FleetRegistry()
+    for sequence in range(3):
+        registry.update(bytes_to_service_info(_df6(sequence, 2000)))
+        registry.update(
+            bytes_to_service_info(
+                encode_e1(
+                    measurement_sequence_number=sequence,
+                    mac="AA:BB:CC:4C:88:4F",
+                ),
+            ),
+        )
+    assert list(registry) == ["4C:88:4F"]
+    # The advertiser's address, where it is the tag's MAC address
+    service_info = bytes_to_service_info(_df6(3, 2000))
+    service_info.address = "aa:bb:cc:4c:88:4f"
+    registry.update(service_info)
+    assert list(registry) == ["4C:88:4F", "aa:bb:cc:4c:88:4f"]
+    assert registry.created == 2
+
+
+def test_rejected_advertisements():
+    registry = FleetRegistry()
+    assert registry.update(bytes_to_service_info(b"\x07\x00")) is None
+    assert registry.update(bytes_to_service_info(b"\x05\x00")) is None
+    other = bytes_to_service_info(b"")
+    other.manufacturer_data = {76: b"\x02\x15"}
+    assert registry.update(other) is None
+    assert (len(registry), registry.rejected) == (0, 3)
+
+
+def test_lru_eviction():
+    registry = FleetRegistry(max_tags=2)
+    registry.update(_tag(1))
+    registry.update(_tag(2))
+    registry.update(_tag(1))
+    registry.update(_tag(3))
+    assert list(registry) == ["4C:88:01", "4C:88:03"]
+    assert registry.evicted == 1
+
+
+def test_ttl_eviction(monkeypatch):
+    now = 1000.0
+    monkeypatch.setattr("ruuvitag_ble.registry.monotonic", lambda: now)
+    registry = FleetRegistry(ttl=60)
+    registry.update(_tag(1))
+    now += 30
+    registry.update(_tag(2))
+    now += 40
+    registry.update(_tag(2))
+    assert list(registry) == ["4C:88:02"]
+    assert registry.evict_idle(now + 59) == 0
+    assert registry.evict_idle(now + 61) == 1
+    assert len(registry) == 0
+    assert registry.evicted == 2
+
+
+def test_memory_usage():
+    registry = FleetRegistry(factory=lambda: RuuvitagBluetoothDeviceData(cache_size=0))
+    for suffix in range(10):
+        registry.update(_tag(suffix))
+    per_tag = registry.memory_usage("4C:88:00")
+    assert 1000 < per_tag < 50000
+    assert registry.memory_usage() == pytest.approx(10 * per_tag, rel=0.1)
+    registry.remove("4C:88:00")
+    assert registry.get("4C:88:00") is None
+
+
+def test_invalid_options():
+    with pytest.raises(ValueError, match="max_tags must be at least 1"):
+        FleetRegistry(max_tags=0)
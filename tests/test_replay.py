@@ -0,0 +1,86 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from ruuvitag_ble.batch import decode_batch
+from ruuvitag_ble.encoders import encode_e1
+from ruuvitag_ble.iaqs import calculate_iaqs
+from ruuvitag_ble.replay import COLUMNS, ReplayRecord, replay, replay_chunks
+from tests.test_e1 import E1_VALID_DATA
+from tests.test_parser import _df6
+from tests.test_v5 import V5_OUTDOOR_SENSOR_DATA
+
+
+def _records(count: int) -> list[ReplayRecord]:
+    records = []
+    for i in range(count):
+        address = f"AA:BB:CC:DD:EE:{i % 7:02X}"
+        if i % 3 == 0:
+            raw_data = _df6(i % 256, i)
+        elif i % 3 == 1:
+            raw_data = V5_OUTDOOR_SENSOR_DATA
+        else:
+            raw_data = E1_VALID_DATA
+        records.append(ReplayRecord(float(i), address, raw_data))
+    return records
+
+
+def test_replay_matches_batch_decoding():
+    records = _records(500)
+    records.insert(10, ReplayRecord(9.5, "AA:BB:CC:DD:EE:00", b"\x05\x00"))
+    result = replay(records, workers=2, shards=3, chunk_size=40)
+    expected = decode_batch([record.raw_data for record in records])
+    del records[10]
+    assert tuple(result) == COLUMNS
+    assert result["timestamp"] == [record.timestamp for record in records]
+    assert result["address"] == [record.address for record in records]
+    for name in expected:
+        assert result[name] == expected[name][:10] + expected[name][11:]
+    assert result["iaqs"] == list(
+        map(calculate_iaqs, result["co2_ppm"], result["pm25_ug_m3"]),
+    )
+    assert result["iaqs"][2] is not None  # E1
+
+
+def test_chunks_keep_per_tag_order():
+    records = _records(300)
+    with ThreadPoolExecutor(3) as executor:
+        chunks = list(
+            replay_chunks(records, executor=executor, shards=4, chunk_size=16),
+        )
+    assert all(0 < len(chunk["timestamp"]) <= 16 for chunk in chunks)
+    by_address: dict[str, list[float]] = {}
+    for chunk in chunks:
+        for address, timestamp in zip(chunk["address"], chunk["timestamp"]):
+            by_address.setdefault(address, []).append(timestamp)
+    assert sum(map(len, by_address.values())) == 300
+    assert all(times == sorted(times) for times in by_address.values())
+
+
+def test_deduplicate_across_chunks():
+    records = [
+        ReplayRecord(float(i), "AA:BB:CC:DD:EE:FF", _df6(sequence, 2000))
+        for i, sequence in enumerate([1, 1, 2, 2, 2, 1, 3, 3, 4])
+    ]
+    records.append(ReplayRecord(20.0, "AA:BB:CC:DD:EE:FF", _df6(1, 2000)))
+    with ThreadPoolExecutor(1) as executor:
+        result = replay(records, executor=executor, chunk_size=2, deduplicate=True)
+    assert result["measurement_sequence_number"] == [1, 2, 3, 4, 1]
+    assert result["timestamp"] == [0.0, 2.0, 6.0, 8.0, 20.0]
+
+
+def test_deduplicate_per_data_format():
+    # Ruuvi Air advertises DF6 and E1 with separate sequence counters
+    address = "AA:BB:CC:DD:EE:FF"
+    records = []
+    for i in range(6):
+        records.append(ReplayRecord(2.0 * i, address, _df6(200 + i, 2000)))
+        e1 = encode_e1(measurement_sequence_number=5 + i, mac=address)
+        records.append(ReplayRecord(2.0 * i + 1, address, e1))
+    with ThreadPoolExecutor(1) as executor:
+        result = replay(records, executor=executor, deduplicate=True)
+    assert result["timestamp"] == [record.timestamp for record in records]
+
+
+def test_replay_nothing():
+    with ThreadPoolExecutor(1) as executor:
+        result = replay([], executor=executor)
+    assert result == {name: [] for name in COLUMNS}
@@ -0,0 +1,106 @@
+import struct
+
+import pytest
+
+from ruuvitag_ble.core import (
+    DataFormat3Decoder,
+    DataFormat5Decoder,
+    DataFormat6Decoder,
+    DataFormatE1Decoder,
+)
+from ruuvitag_ble.schema import CompiledFormat, Field, FormatSpec, SchemaDecoder
+from tests.test_e1 import E1_VALID_DATA
+from tests.test_v3 import V3_SENSOR_DATA
+from tests.test_v5 import V5_OUTDOOR_SENSOR_DATA
+from tests.test_v6 import V6_C_TEST_DATA
+
+EXAMPLE_SPEC = FormatSpec(
+    data_format=0x7F,
+    name="test",
+    fields=(
+        Field(name="level", offset=1, width=2, signed=True, sentinel=-1, scale=0.5),
+        Field(name="counter", offset=4, width=3, sentinel=0xFFFFFF),
+        Field(name="mode", offset=7, shift=4, bits=2),
+        Field(name="index", offset=8, lsb_flag=(7, 0), maximum=500, base=1),
+        Field(name="id", offset=9, width=2, kind="mac"),
+    ),
+)
+
+
+class ExampleDecoder(SchemaDecoder):
+    format = CompiledFormat(EXAMPLE_SPEC)
+
+    level: float | None
+    counter: int | None
+    mode: int
+    index: int | None
+    id: str
+
+
+def test_custom_format():
+    d = ExampleDecoder(bytes.fromhex("7F0010AA0000FF3180ABCD"))
+    assert d.level == 8.0
+    assert d.counter == 0xFF
+    assert d.mode == 3
+    assert d.index == 258
+    assert d.id == "AB:CD"
+    assert repr(d).startswith("ExampleDecoder(level=8.0, counter=255,")
+    d = ExampleDecoder(bytes.fromhex("7FFFFFAAFFFFFF01FFABCD" + "00"))
+    assert (d.level, d.counter, d.index) == (None, None, None)
+
+
+def test_custom_format_errors():
+    with pytest.raises(ValueError, match="at least 11 bytes"):
+        ExampleDecoder(bytes.fromhex("7F00"))
+    with pytest.raises(ValueError, match="expected 0x7f"):
+        ExampleDecoder(bytes(11))
+    with pytest.raises(ValueError, match="Conflicting"):
+        CompiledFormat(
+            FormatSpec(
+                data_format=0x7F,
+                name="bad",
+                fields=(
+                    Field(name="a", offset=1, width=2),
+                    Field(name="b", offset=1),
+                ),
+            ),
+        )
+    with pytest.raises(ValueError, match="Overlapping"):
+        CompiledFormat(
+            FormatSpec(
+                data_format=0x7F,
+                name="bad",
+                fields=(
+                    Field(name="a", offset=1, width=2),
+                    Field(name="b", offset=2),
+                ),
+            ),
+        )
+
+
+def test_convert_matches_decoder():
+    fmt = DataFormat5Decoder.format
+    decoder = DataFormat5Decoder(V5_OUTDOOR_SENSOR_DATA + b"trailing")
+    row = fmt.struct.unpack_from(V5_OUTDOOR_SENSOR_DATA)
+    values = dict(zip(fmt.names, fmt.convert(row)))
+    assert values == {name: getattr(decoder, name) for name in fmt.names}
+
+
+@pytest.mark.parametrize(
+    ("decoder_cls", "layout", "raw_data"),
+    [
+        (DataFormat3Decoder, ">BBbBHhhhH", V3_SENSOR_DATA),
+        (DataFormat5Decoder, ">BhHHhhhHBH6B", V5_OUTDOOR_SENSOR_DATA),
+        (DataFormat6Decoder, ">BhHHHHBBBBBB3B", V6_C_TEST_DATA),
+        (DataFormatE1Decoder, ">BhHHHHHHHBB3s3s3sB5s6s", E1_VALID_DATA),
+    ],
+)
+def test_data_is_unpacked_as_before(decoder_cls, layout, raw_data):
+    # The tuple the hand-written decoders exposed
+    assert decoder_cls(raw_data).data == struct.unpack(layout, raw_data)
+
+
+def test_data_of_custom_format():
+    raw_data = bytes.fromhex("7F0010AA0000FF3180ABCD")
+    fmt = ExampleDecoder.format
+    assert ExampleDecoder(raw_data).data == fmt.struct.unpack_from(raw_data)
@@ -0,0 +1,19 @@
+import pytest
+
+from ruuvitag_ble.sequence import sequence_delta
+
+
+@pytest.mark.parametrize(
+    ("current", "previous", "bits", "expected"),
+    [
+        (5, 3, 8, 2),
+        (3, 5, 8, -2),
+        (0, 255, 8, 1),
+        (255, 0, 8, -1),
+        (1, 65535, 16, 2),
+        (0xFFFFFE, 2, 24, -4),
+        (128, 0, 8, -128),
+    ],
+)
+def test_sequence_delta(current, previous, bits, expected):
+    assert sequence_delta(current, previous, bits) == expected
@@ -12,16 +12,17 @@ KEY_MOVEMENT = DeviceKey(key="movement_counter", device_id=None)
 KEY_NOX_INDEX = DeviceKey(key="nox_index", device_id=None)
 KEY_PM25 = DeviceKey(key="pm25", device_id=None)
 KEY_PRESSURE = DeviceKey(key=DeviceClass.PRESSURE, device_id=None)
+KEY_SIGNAL_STRENGTH = DeviceKey(key=DeviceClass.SIGNAL_STRENGTH, device_id=None)
 KEY_TEMPERATURE = DeviceKey(key=DeviceClass.TEMPERATURE, device_id=None)
 KEY_VOC_INDEX = DeviceKey(key="voc_index", device_id=None)
 KEY_VOLTAGE = DeviceKey(key=DeviceClass.VOLTAGE, device_id=None)
 
 
-def bytes_to_service_info(payload: bytes) -> BluetoothServiceInfo:
+def bytes_to_service_info(payload: bytes, rssi: int = -60) -> BluetoothServiceInfo:
     return BluetoothServiceInfo(
         name="Test",
         address="00:00:00:00:00:00",
-        rssi=-60,
+        rssi=rssi,
         manufacturer_data={1177: payload},
         service_data={},
         service_uuids=[],